@@ -0,0 +1,311 @@
+import threading
+
+import streamlit as st
+
+import compartidos
+import conjuntos
+import utilidades as util
+
+np = util.importar_diferido("numpy")
+pd = util.importar_diferido("pandas")
+
+## Cubo de agregados
+#
+# El cubo guarda la suma y el número de valores de cada métrica por combinación de
+# dimensiones. Con eso cualquier promedio sobre un subconjunto de dimensiones (o un
+# filtro sobre ellas) se obtiene sumando filas del cubo, sin volver a recorrer los datos.
+
+
+# Construye el cubo: columnas (métrica, 'sum') y (métrica, 'count') por combinación de dimensiones.
+# Las combinaciones con valores nulos se conservan; se descartan al resumir, como en un groupby normal.
+def construir_cubo(df, dimensiones, metricas):
+    return df.groupby(list(dimensiones), dropna=False)[list(metricas)].agg(['sum', 'count'])
+
+
+# Promedio de las métricas agrupando por `por`, opcionalmente filtrando dimensiones
+# (p. ej. filtro={'MS_FuelType': 'Diesel'}). Equivale a df[filtro].groupby(por)[metricas].mean().
+def promedios(cubo, por, metricas, filtro=None):
+    if filtro:
+        mascara = np.ones(len(cubo), dtype=bool)
+        for dimension, valor in filtro.items():
+            mascara &= cubo.index.get_level_values(dimension) == valor
+        cubo = cubo[mascara]
+
+    resumen = cubo[list(metricas)].groupby(level=list(por)).sum()
+    sumas = resumen.xs('sum', axis=1, level=1)
+    conteos = resumen.xs('count', axis=1, level=1)
+    return (sumas / conteos.where(conteos > 0))[list(metricas)].reset_index()
+
+
+# Suma dos cubos con las mismas dimensiones y métricas (las combinaciones que faltan en uno cuentan como cero)
+def sumar_cubos(cubo, otro):
+    niveles = list(range(cubo.index.nlevels))
+    return pd.concat([cubo, otro]).groupby(level=niveles, dropna=False).sum()
+
+
+# Cubos acumulados por (conjunto, dimensiones, métricas): el último cubo calculado, la
+# versión de los datos de los que salió, su número de filas y la huella del CSV.
+@st.cache_resource(show_spinner=False)
+def _cubos_acumulados():
+    return {"candado": threading.Lock(), "cubos": {}}
+
+
+# True si los datos de huella `actual` son los de huella `previa` con filas agregadas al
+# final: ambas deben ser prefijos del CSV que hay ahora en disco.
+def _es_anexo_de(nombre, previa, actual):
+    if previa is None or actual is None or previa["bytes"] >= actual["bytes"]:
+        return False
+    if conjuntos.huella_archivo(conjuntos.ruta_dataset(nombre), actual["bytes"]) != actual:
+        return False
+    return conjuntos.es_anexo(nombre, previa)
+
+
+# Cubo de un conjunto de datos, compartido entre sesiones y de solo lectura. Si el
+# CSV solo creció desde el último cubo, se le suma el cubo de las filas nuevas en lugar
+# de recorrer todo el conjunto.
+def cubo_dataset(nombre, dimensiones, metricas):
+    dimensiones, metricas = tuple(dimensiones), tuple(metricas)
+    df = conjuntos.cargar_datos(nombre, dimensiones + metricas)
+    version, huella = df.attrs.get("version_datos"), df.attrs.get("huella_csv")
+    acumulados = _cubos_acumulados()
+    with acumulados["candado"]:
+        previo = acumulados["cubos"].get((nombre, dimensiones, metricas))
+        if previo is not None and (previo["version"] == version or (huella is not None and previo["huella"] == huella)):
+            return previo["cubo"]
+
+        if previo is not None and previo["filas"] <= len(df) and _es_anexo_de(nombre, previo["huella"], huella):
+            cubo = sumar_cubos(previo["cubo"], construir_cubo(df.iloc[previo["filas"]:], dimensiones, metricas))
+        else:
+            cubo = construir_cubo(df, dimensiones, metricas)
+        compartidos.compartir(("cubo", nombre, dimensiones, metricas), cubo)
+        acumulados["cubos"][(nombre, dimensiones, metricas)] = {
+            "cubo": cubo, "version": version, "filas": len(df), "huella": huella,
+        }
+        return cubo
+
+
+## Agregados por página
+
+# Cubo del trayecto nacional: todas las métricas LHL_/LHR_ por categoría, marca y combustible
+DIMENSIONES_NACIONAL = ['MS_VehicleCategoryCode', 'OEM_Make', 'MS_FuelType']
+METRICAS_NACIONAL = [
+    columna for columna, tipo in conjuntos.DATASETS["nacional"]["esquema"].items()
+    if columna.startswith(('LHL_', 'LHR_')) and tipo == "float64"
+]
+
+
+def cubo_nacional():
+    return cubo_dataset("nacional", DIMENSIONES_NACIONAL, METRICAS_NACIONAL)
+
+
+# Columnas del conjunto regional que usa su página (se cargan solo estas)
+COLUMNAS_REGIONAL = [
+    'OEM_Make', 'OEM_Model', 'Mission', 'MS_FuelType', 'MS_VehicleCategoryCode',
+    'L_Payload_kg', 'L_CO2_gkm', 'R_CO2_gkm', 'Emision_CO2_avg', 'Consumo_avg',
+]
+
+
+def datos_regionales():
+    return conjuntos.cargar_datos("regional", COLUMNAS_REGIONAL)
+
+
+# Columnas de emisiones que se pueden elegir en la página regional
+COLUMNAS_EMISIONES_REGIONAL = ['Emision_CO2_avg', 'L_CO2_gkm', 'R_CO2_gkm']
+
+
+# Emisiones promedio por fabricante y misión, y por fabricante (trayecto regional), para
+# cada columna de emisiones. Devuelve {columna: (por_fabricante_y_mision, por_fabricante)};
+# en ambos DataFrame la columna de valores se llama 'Emision_CO2_avg'. Se comparten entre
+# sesiones (de solo lectura); agregados_regionales() entrega vistas. Se guardan solo la
+# versión vigente y la anterior: cada anexo al CSV crea una versión nueva.
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _agregados_regionales(version):
+    # Sumas y conteos por fabricante y misión de todas las columnas (incremental con los anexos)
+    cubo = cubo_dataset("regional", ['OEM_Make', 'Mission'], COLUMNAS_EMISIONES_REGIONAL)
+
+    agregados = {}
+    for columna in COLUMNAS_EMISIONES_REGIONAL:
+        emisiones_por_vehiculo_mision = promedios(cubo, ['OEM_Make', 'Mission'], [columna]).rename(
+            columns={columna: 'Emision_CO2_avg'}
+        )
+
+        # Emisión promedio por fabricante
+        emisiones_promedio_por_fabricante = emisiones_por_vehiculo_mision.groupby('OEM_Make')['Emision_CO2_avg'].mean().reset_index()
+        emisiones_promedio_por_fabricante = emisiones_promedio_por_fabricante.sort_values('Emision_CO2_avg')
+
+        agregados[columna] = (
+            compartidos.compartir(("regional_por_mision", version, columna), emisiones_por_vehiculo_mision),
+            compartidos.compartir(("regional_por_fabricante", version, columna), emisiones_promedio_por_fabricante),
+        )
+    return agregados
+
+
+def agregados_regionales():
+    agregados = _agregados_regionales(conjuntos.version_dataset("regional"))
+    return {columna: tuple(compartidos.vista(df) for df in par) for columna, par in agregados.items()}
+
+
+# Índice de modelos por marca para la calculadora de flota (trayecto regional): emisión
+# promedio por (marca, modelo), ordenada por marca y emisión, con la posición de cada marca
+# y el orden descendente dentro de cada marca. Es de solo lectura y se comparte sin copiar
+# entre sesiones, así que consultar los k modelos de menor o mayor emisión de una marca
+# cuesta O(k). Como los agregados, se guardan dos versiones por columna.
+@st.cache_resource(max_entries=2 * len(COLUMNAS_EMISIONES_REGIONAL), show_spinner=False)
+def _indice_modelos_regional(version, columna):
+    df = conjuntos.cargar_datos("regional", ['OEM_Make', 'OEM_Model', columna])
+
+    promedios = df.groupby(['OEM_Make', 'OEM_Model'])[columna].mean().dropna().reset_index()
+    # Orden estable: en los empates se conserva el orden alfabético del modelo (como nsmallest)
+    promedios = promedios.sort_values(['OEM_Make', columna], kind='stable', ignore_index=True)
+
+    marcas = promedios['OEM_Make'].to_numpy()
+    inicios = np.flatnonzero(np.r_[True, marcas[1:] != marcas[:-1]]) if len(marcas) else np.array([], dtype=int)
+    finales = np.r_[inicios[1:], len(marcas)]
+    posiciones = {marcas[i]: (int(i), int(f)) for i, f in zip(inicios, finales)}
+    # Filas de mayor a menor emisión dentro de cada marca; también estable (como nlargest)
+    descendente = promedios.sort_values(['OEM_Make', columna], ascending=[True, False], kind='stable').index.to_numpy()
+    descendente.setflags(write=False)
+
+    return {
+        "modelos": compartidos.compartir(("indice_modelos_regional", version, columna), promedios),
+        "posiciones": posiciones,
+        "descendente": descendente,
+        # Marcas ordenadas por número de referencias en los datos (de más a menos); se omiten
+        # las que no tienen ningún modelo con emisión registrada
+        "marcas": [m for m in df['OEM_Make'].value_counts().index if m in posiciones],
+    }
+
+
+def indice_modelos_regional(columna='Emision_CO2_avg'):
+    return _indice_modelos_regional(conjuntos.version_dataset("regional"), columna)
+
+
+# Marcas del trayecto regional ordenadas por número de referencias
+def marcas_regionales():
+    return indice_modelos_regional()["marcas"]
+
+
+# Los k modelos de una marca con menor (o mayor) emisión promedio, como DataFrame
+# ['OEM_Model', columna] ordenado del extremo hacia adentro
+def modelos_por_emision(marca, k=5, menores=True, columna='Emision_CO2_avg'):
+    indice = indice_modelos_regional(columna)
+    inicio, fin = indice["posiciones"].get(marca, (0, 0))
+    # Se cortan las filas antes de elegir las columnas: seleccionar columnas copia las filas
+    if menores:
+        return indice["modelos"].iloc[inicio:min(fin, inicio + k)][['OEM_Model', columna]].reset_index(drop=True)
+    filas = indice["descendente"][inicio:min(fin, inicio + k)]
+    return indice["modelos"].iloc[filas][['OEM_Model', columna]].reset_index(drop=True)
+
+
+# Emisión de referencia de cada marca: promedio de sus k modelos de menor emisión
+# (todos si k es None). Devuelve una Series indexada por marca.
+def emision_referencia_marcas(marcas=None, k=None, columna='Emision_CO2_avg'):
+    indice = indice_modelos_regional(columna)
+    modelos = indice["modelos"]
+    if marcas is not None:
+        modelos = modelos[modelos['OEM_Make'].isin(marcas)]
+    if k is not None:
+        modelos = modelos.groupby('OEM_Make', sort=False).head(k)
+    referencia = modelos.groupby('OEM_Make', sort=False)[columna].mean()
+    return referencia.reindex(marcas) if marcas is not None else referencia
+
+
+# Tareas de precalentamiento: cargan los datos y agregados que usan las páginas,
+# con las mismas llaves de caché que usarán ellas
+def tareas_precalentamiento():
+    return [
+        ("Datos urbanos", lambda: conjuntos.cargar_datos("urbano")),
+        ("Datos regionales", datos_regionales),
+        ("Agregados regionales", agregados_regionales),
+        ("Índice de modelos regionales", indice_modelos_regional),
+        ("Datos nacionales", lambda: conjuntos.cargar_datos("nacional")),
+        ("Cubo nacional", cubo_nacional),
+        ("Datos eléctricos", lambda: conjuntos.cargar_datos("electricos")),
+        ("Filtro de atípicos eléctricos", filas_sin_atipicos_electricos),
+    ]
+
+
+## Extremos por grupo
+
+# Máximo y mínimo de `metrica` por cada valor de `grupo`, con todos los `etiqueta` empatados
+# en cada extremo, en una sola pasada de groupby/transform (sin filtrar el DataFrame por grupo).
+# Devuelve un DataFrame indexado por grupo (en orden de aparición) con las columnas
+# 'maximo', 'modelos_maximo', 'minimo' y 'modelos_minimo'.
+def extremos_por_grupo(df, metrica, grupo, etiqueta):
+    valores = df[metrica]
+    por_grupo = valores.groupby(df[grupo], sort=False)
+    maximo = por_grupo.transform('max')
+    minimo = por_grupo.transform('min')
+
+    resultado = pd.DataFrame({'maximo': por_grupo.max(), 'minimo': por_grupo.min()})
+    for columna, mascara in (('modelos_maximo', valores == maximo), ('modelos_minimo', valores == minimo)):
+        empatados = df.loc[mascara, etiqueta].groupby(df.loc[mascara, grupo], sort=False).agg(list)
+        resultado[columna] = empatados.reindex(resultado.index)
+        resultado[columna] = resultado[columna].apply(lambda modelos: modelos if isinstance(modelos, list) else [])
+
+    return resultado[['maximo', 'modelos_maximo', 'minimo', 'modelos_minimo']]
+
+
+## Valores atípicos
+#
+# Filtro robusto por grupo: un valor es atípico si se aleja de la mediana de su grupo
+# (p. ej. categoría) más de `umbral` veces la dispersión robusta del grupo.
+#   - 'mad': z modificado = 0.6745 · (x - mediana) / MAD, atípico si |z| > umbral (3.5);
+#     si la MAD del grupo es 0 se usa la desviación absoluta media (× 1.2533);
+#   - 'iqr': atípico si está fuera de [Q1 - umbral · IQR, Q3 + umbral · IQR] (umbral 1.5).
+# A diferencia de un z-score global, la mediana y la MAD no se desplazan por los propios
+# atípicos, y cada categoría se compara con sus pares. Los valores nulos no pasan el filtro.
+
+UMBRALES_ATIPICOS = {'mad': 3.5, 'iqr': 1.5}
+
+# Columna y grupos del filtro del catálogo de eléctricos e híbridos. La misma columna guarda
+# kWh (eléctricos) o litros (híbridos) por 100 km, así que la motorización es parte del grupo.
+COLUMNA_ATIPICOS_ELECTRICOS = 'Consumo_electrico_kWh/10km'
+GRUPOS_ATIPICOS_ELECTRICOS = ['Motorizacion', 'Categoria']
+
+
+# Máscara booleana (arreglo de NumPy) de las filas de `df` cuyo valor de `columna` no es
+# atípico dentro de su grupo. Los grupos con menos de 3 valores se conservan completos.
+def mascara_sin_atipicos(df, columna, grupos, metodo='mad', umbral=None):
+    if metodo not in UMBRALES_ATIPICOS:
+        raise ValueError(f"Método de atípicos desconocido: {metodo!r} (use 'mad' o 'iqr')")
+    umbral = UMBRALES_ATIPICOS[metodo] if umbral is None else umbral
+    valores = df[columna].astype(float)
+    por_grupo = valores.groupby([df[g] for g in grupos], dropna=False, sort=False)
+    conteo = por_grupo.transform('count')
+
+    if metodo == 'mad':
+        mediana = por_grupo.transform('median')
+        desvio = (valores - mediana).abs()
+        por_desvio = desvio.groupby([df[g] for g in grupos], dropna=False, sort=False)
+        escala = por_desvio.transform('median') / 0.6745
+        escala = escala.where(escala > 0, por_desvio.transform('mean') * 1.2533)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            atipico = (desvio > umbral * escala) & (escala > 0)
+    else:
+        q1 = por_grupo.transform('quantile', q=0.25)
+        q3 = por_grupo.transform('quantile', q=0.75)
+        rango = q3 - q1
+        atipico = (valores < q1 - umbral * rango) | (valores > q3 + umbral * rango)
+
+    return (valores.notna() & ((conteo < 3) | ~atipico)).to_numpy()
+
+
+# Máscara de un conjunto de datos, una vez por versión del archivo. Se devuelve como Series
+# booleana de solo lectura con el índice del conjunto (compartida entre sesiones): para
+# aplicarla a un subconjunto, df[mascara.loc[df.index]]. Se guardan pocas entradas: con
+# cada versión nueva del archivo las anteriores dejan de usarse.
+@st.cache_resource(max_entries=4 * len(UMBRALES_ATIPICOS), show_spinner=False)
+def _filas_sin_atipicos(nombre, version, columna, grupos, metodo, umbral):
+    df = conjuntos.cargar_datos(nombre, [columna, *grupos])
+    mascara = mascara_sin_atipicos(df, columna, list(grupos), metodo, umbral)
+    mascara.setflags(write=False)
+    return pd.Series(mascara, index=df.index, name=f"{columna} sin atípicos", copy=False)
+
+
+def filas_sin_atipicos(nombre, columna, grupos, metodo='mad', umbral=None):
+    return _filas_sin_atipicos(nombre, conjuntos.version_dataset(nombre), columna, tuple(grupos), metodo, umbral)
+
+
+def filas_sin_atipicos_electricos(metodo='mad'):
+    return filas_sin_atipicos("electricos", COLUMNA_ATIPICOS_ELECTRICOS, GRUPOS_ATIPICOS_ELECTRICOS, metodo)
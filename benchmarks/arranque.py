@@ -0,0 +1,148 @@
+# Benchmark de arranque en frío por página.
+#
+# Cada página se ejecuta en un intérprete nuevo (con `python -X importtime`) usando AppTest
+# de Streamlit, y se registra:
+#   - importaciones_ms: tiempo acumulado de importación de cada librería pesada
+#   - primer_elemento_ms: desde el inicio del script hasta el primer elemento enviado (menú)
+#   - primer_contenido_ms: hasta el primer elemento del área principal de la página
+#   - total_ms: ejecución completa del script
+# y se compara con el presupuesto de arranque de cada página.
+#
+# Uso: python benchmarks/arranque.py [--salida arranque.json] [pages/urbano.py ...]
+# Termina con código 1 si alguna página excede su presupuesto.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGINAS = ["main.py", "pages/urbano.py", "pages/regional.py", "pages/nacional.py", "pages/electricos.py", "pages/analisis.py", "pages/memoria.py"]
+
+# Presupuesto de arranque en frío (ms) para el primer contenido visible de cada página
+PRESUPUESTO_PRIMER_CONTENIDO_MS = {
+    "main.py": 1500,
+    "pages/urbano.py": 3000,
+    "pages/regional.py": 3000,
+    "pages/nacional.py": 3000,
+    "pages/electricos.py": 3000,
+    "pages/analisis.py": 3000,
+    "pages/memoria.py": 3000,
+}
+
+# Librerías cuyo tiempo de importación se reporta
+LIBRERIAS = ["streamlit", "pandas", "numpy", "pyarrow", "matplotlib", "seaborn", "scipy", "plotly"]
+
+MARCA_INICIO = "### inicio de la página ###"
+
+
+# Ejecución dentro del proceso hijo: corre la página y escribe las mediciones en stdout
+def _medir_pagina(pagina):
+    from streamlit.testing.v1 import AppTest
+    from streamlit.runtime.scriptrunner_utils import script_run_context
+
+    tiempos = {}
+    enqueue_original = script_run_context.ScriptRunContext.enqueue
+
+    def enqueue(self, msg):
+        if msg.HasField("delta"):
+            ahora = time.perf_counter()
+            tiempos.setdefault("primer_elemento", ahora)
+            if msg.metadata.delta_path and msg.metadata.delta_path[0] == 0:
+                tiempos.setdefault("primer_contenido", ahora)
+        return enqueue_original(self, msg)
+
+    script_run_context.ScriptRunContext.enqueue = enqueue
+
+    app = AppTest.from_file(os.path.join(RAIZ, "main.py"), default_timeout=600)
+    if pagina != "main.py":
+        app.switch_page(pagina)
+
+    print(MARCA_INICIO, file=sys.stderr, flush=True)
+    inicio = time.perf_counter()
+    app.run()
+    fin = time.perf_counter()
+
+    def desde_inicio(clave):
+        return round((tiempos[clave] - inicio) * 1000, 1) if clave in tiempos else None
+
+    print(json.dumps({
+        "primer_elemento_ms": desde_inicio("primer_elemento"),
+        "primer_contenido_ms": desde_inicio("primer_contenido"),
+        "total_ms": round((fin - inicio) * 1000, 1),
+        "excepciones": [e.message for e in app.exception],
+    }))
+
+
+# Tiempo acumulado (ms) de importación de cada librería, antes y después de la marca
+def _importaciones(salida_importtime):
+    resultado = {}
+    despues_de_marca = False
+    for linea in salida_importtime.splitlines():
+        if linea.startswith(MARCA_INICIO):
+            despues_de_marca = True
+            continue
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        partes = linea.split("|")
+        # La sangría del nombre indica la profundidad; cada librería se importa una sola vez
+        nombre = partes[2].strip()
+        if nombre not in LIBRERIAS:
+            continue
+        try:
+            acumulado_ms = int(partes[1].strip()) / 1000
+        except ValueError:
+            continue
+        clave = "pagina" if despues_de_marca else "arranque"
+        resultado.setdefault(clave, {})[nombre] = round(acumulado_ms, 1)
+    return resultado
+
+
+def medir(pagina):
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--hijo", pagina],
+        cwd=RAIZ, capture_output=True, text=True,
+    )
+    lineas = [linea for linea in proceso.stdout.splitlines() if linea.startswith("{")]
+    if proceso.returncode != 0 or not lineas:
+        return {"pagina": pagina, "error": proceso.stderr.strip().splitlines()[-1:]}
+
+    medicion = json.loads(lineas[-1])
+    importaciones = _importaciones(proceso.stderr)
+    medicion = {
+        "pagina": pagina,
+        **medicion,
+        "importaciones_ms": importaciones.get("pagina", {}),
+        "importaciones_previas_ms": importaciones.get("arranque", {}),
+        "presupuesto_ms": PRESUPUESTO_PRIMER_CONTENIDO_MS.get(pagina),
+    }
+    primer_contenido = medicion["primer_contenido_ms"]
+    medicion["dentro_del_presupuesto"] = (
+        primer_contenido is not None and primer_contenido <= medicion["presupuesto_ms"]
+    ) if medicion["presupuesto_ms"] is not None else None
+    return medicion
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paginas", nargs="*", default=PAGINAS)
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto, stdout)")
+    parser.add_argument("--hijo", help=argparse.SUPPRESS)
+    argumentos = parser.parse_args()
+
+    if argumentos.hijo:
+        sys.path.insert(0, RAIZ)
+        _medir_pagina(argumentos.hijo)
+        sys.exit(0)
+
+    resultados = [medir(pagina) for pagina in argumentos.paginas]
+    texto = json.dumps({"python": sys.version.split()[0], "resultados": resultados}, indent=2, ensure_ascii=False)
+    if argumentos.salida:
+        with open(argumentos.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto)
+    else:
+        print(texto)
+
+    sys.exit(0 if all(r.get("dentro_del_presupuesto") is not False and "error" not in r for r in resultados) else 1)
@@ -0,0 +1,130 @@
+# Generador de datos sintéticos para pruebas de escala.
+#
+# Produce versiones N veces más grandes de los conjuntos de datos de la aplicación con las
+# mismas columnas, tipos, opciones de lectura y valores de las columnas categóricas
+# (Motorizacion, Categoria, OEM_Make, Mission, MS_FuelType...):
+#   - la primera copia son las filas originales, así que todas las categorías aparecen;
+#   - las demás se obtienen remuestreando filas completas (se conservan las distribuciones
+#     de cada categoría y las relaciones entre columnas) y multiplicando todas las columnas
+#     numéricas de la fila por un mismo factor aleatorio cercano a 1, con el redondeo y los
+#     límites [mínimo, máximo] de cada columna original. Los ceros y nulos se mantienen;
+#   - las columnas identificadoras (nombres de modelo) reciben un sufijo por copia, de modo
+#     que el número de modelos distintos crece con la escala, como en un registro real.
+#
+# Uso: python benchmarks/datos_sinteticos.py --escala 100 --destino /tmp/datos_x100 [electricos ...]
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import conjuntos  # noqa: E402
+
+# Desviación del factor multiplicativo aplicado a las columnas numéricas de cada fila
+RUIDO = 0.03
+
+# Filas generadas por bloque al escribir (acota la memoria en escalas grandes)
+FILAS_POR_BLOQUE = 500_000
+
+# Una columna de texto con más valores distintos que esta fracción de filas es identificadora
+FRACCION_IDENTIFICADOR = 0.5
+
+
+# Número de decimales con que están escritos los valores de una columna (hasta 6)
+def _decimales(valores):
+    valores = valores[np.isfinite(valores)]
+    for decimales in range(7):
+        if np.allclose(valores, np.round(valores, decimales), rtol=0, atol=1e-9):
+            return decimales
+    return None
+
+
+# Describe cómo generar cada columna a partir del DataFrame original
+def perfil_columnas(df):
+    perfil = {}
+    for columna in df.columns:
+        serie = df[columna]
+        if pd.api.types.is_numeric_dtype(serie):
+            valores = serie.to_numpy(dtype=float)
+            if pd.api.types.is_integer_dtype(serie) and np.array_equal(valores, np.arange(len(df))):
+                perfil[columna] = {"tipo": "indice"}
+            else:
+                perfil[columna] = {
+                    "tipo": "numerica",
+                    "entera": pd.api.types.is_integer_dtype(serie),
+                    "decimales": _decimales(valores),
+                    "minimo": np.nanmin(valores) if len(valores) else np.nan,
+                    "maximo": np.nanmax(valores) if len(valores) else np.nan,
+                }
+        elif serie.nunique() > FRACCION_IDENTIFICADOR * len(df):
+            perfil[columna] = {"tipo": "identificador"}
+        else:
+            perfil[columna] = {"tipo": "categorica"}
+    return perfil
+
+
+# Genera las filas [inicio, fin) del conjunto escalado. Las filas < len(df) son las originales.
+def generar_bloque(df, perfil, inicio, fin, rng, ruido=RUIDO):
+    n = len(df)
+    posiciones = np.arange(inicio, fin)
+    originales = posiciones < n
+    filas = np.where(originales, posiciones, rng.integers(0, n, len(posiciones)))
+    copia = posiciones // n
+
+    bloque = df.iloc[filas].reset_index(drop=True)
+    factor = np.where(originales, 1.0, rng.lognormal(0.0, ruido, len(posiciones)))
+
+    for columna, info in perfil.items():
+        if info["tipo"] == "indice":
+            bloque[columna] = posiciones
+        elif info["tipo"] == "identificador":
+            sufijo = pd.Series(copia).map(lambda k: f" #{k}" if k else "")
+            bloque[columna] = bloque[columna].astype(str).where(bloque[columna].notna()) + sufijo
+        elif info["tipo"] == "numerica":
+            valores = np.clip(bloque[columna].to_numpy(dtype=float) * factor, info["minimo"], info["maximo"])
+            if info["decimales"] is not None:
+                valores = np.round(valores, info["decimales"])
+            bloque[columna] = valores.astype(df[columna].dtype) if info["entera"] else valores
+    return bloque
+
+
+# Escribe el conjunto `nombre` escalado `escala` veces en la carpeta `destino`
+def escribir_dataset(nombre, escala, destino, semilla=0, ruido=RUIDO):
+    config = conjuntos.DATASETS[nombre]
+    df = conjuntos._leer_csv(nombre)
+    perfil = perfil_columnas(df)
+    rng = np.random.default_rng(semilla)
+
+    os.makedirs(destino, exist_ok=True)
+    salida = os.path.join(destino, config["archivo"])
+    opciones = {
+        "index": False,
+        "encoding": config["lectura"].get("encoding", "utf-8"),
+        "sep": config["lectura"].get("sep", ","),
+    }
+    total = len(df) * escala
+    for inicio in range(0, max(total, 1), FILAS_POR_BLOQUE):
+        bloque = generar_bloque(df, perfil, inicio, min(inicio + FILAS_POR_BLOQUE, total), rng, ruido)
+        bloque.to_csv(salida, mode="w" if inicio == 0 else "a", header=inicio == 0, **opciones)
+    return salida, total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera conjuntos de datos sintéticos escalados")
+    parser.add_argument("nombres", nargs="*", default=list(conjuntos.DATASETS))
+    parser.add_argument("--escala", type=int, required=True)
+    parser.add_argument("--destino", required=True)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--ruido", type=float, default=RUIDO)
+    argumentos = parser.parse_args()
+
+    for nombre in argumentos.nombres:
+        if not os.path.exists(conjuntos.ruta_dataset(nombre)):
+            print(f"{nombre}: no existe {conjuntos.ruta_dataset(nombre)}, se omite")
+            continue
+        salida, filas = escribir_dataset(nombre, argumentos.escala, argumentos.destino, argumentos.semilla, argumentos.ruido)
+        print(f"{nombre}: {filas} filas -> {salida}")
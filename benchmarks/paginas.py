@@ -0,0 +1,232 @@
+# Benchmark de rendimiento por página.
+#
+# Cada página se ejecuta sin interfaz con AppTest de Streamlit, en un proceso nuevo y sobre
+# una copia temporal de la aplicación con los datos a la escala indicada (1 = tamaño
+# original; N = datos sintéticos N veces más grandes, ver datos_sinteticos.py). Por ejecución se registra:
+#   - tiempo_ms: duración de la ejecución del script
+#   - memoria_pico_mb: pico de memoria asignada por Python/NumPy durante la ejecución (tracemalloc)
+#   - rss_pico_mb: memoria residente máxima del proceso
+#   - figuras_renderizadas: figuras de matplotlib guardadas como imagen (savefig)
+#   - elementos_enviados / bytes_enviados: mensajes al navegador y su tamaño, incluidas las
+#     imágenes y archivos servidos aparte por el gestor de medios
+# Cada página se ejecuta dos veces en el mismo proceso: "fria" (cachés vacíos) y
+# "caliente" (segunda visita, como una recarga del usuario). tracemalloc hace mucho más
+# lentas las ejecuciones, así que la memoria se mide en un proceso aparte del de los tiempos.
+#
+# Uso:
+#   python benchmarks/paginas.py [--escalas 1 10] [--salida resultados.json] [pages/urbano.py ...]
+#   python benchmarks/paginas.py --comparar base.json [--tolerancia 0.25] ...
+# Con --comparar termina con código 1 si alguna medición empeora más que la tolerancia.
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from arranque import PAGINAS, RAIZ
+
+# Mediciones que se comparan contra la base (mayor es peor)
+METRICAS_COMPARADAS = ["tiempo_ms", "memoria_pico_mb", "bytes_enviados"]
+
+# Archivos que no se copian a la aplicación temporal
+IGNORAR_AL_COPIAR = shutil.ignore_patterns(".git", "benchmarks", "datos_arrow", "__pycache__", "*.csv")
+
+
+# Ejecución dentro del proceso hijo: corre la página y escribe las mediciones en stdout
+def _medir_pagina(raiz_app, pagina, medir_memoria):
+    import resource
+    import tracemalloc
+
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.scriptrunner_utils import script_run_context
+    from streamlit.testing.v1 import AppTest
+
+    contadores = {"figuras": 0, "elementos": 0, "bytes": 0}
+
+    savefig_original = Figure.savefig
+    enqueue_original = script_run_context.ScriptRunContext.enqueue
+    add_original = MediaFileManager.add
+
+    def savefig(self, *args, **kwargs):
+        contadores["figuras"] += 1
+        return savefig_original(self, *args, **kwargs)
+
+    def enqueue(self, msg):
+        if msg.HasField("delta"):
+            contadores["elementos"] += 1
+        contadores["bytes"] += msg.ByteSize()
+        return enqueue_original(self, msg)
+
+    def add(self, path_or_data, *args, **kwargs):
+        if isinstance(path_or_data, bytes):
+            contadores["bytes"] += len(path_or_data)
+        elif isinstance(path_or_data, str) and os.path.exists(path_or_data):
+            contadores["bytes"] += os.path.getsize(path_or_data)
+        return add_original(self, path_or_data, *args, **kwargs)
+
+    Figure.savefig = savefig
+    script_run_context.ScriptRunContext.enqueue = enqueue
+    MediaFileManager.add = add
+
+    app = AppTest.from_file(os.path.join(raiz_app, "main.py"), default_timeout=3600)
+    if pagina != "main.py":
+        app.switch_page(pagina)
+
+    ejecuciones = {}
+    if medir_memoria:
+        tracemalloc.start()
+    for nombre in ("fria", "caliente"):
+        for clave in contadores:
+            contadores[clave] = 0
+        if medir_memoria:
+            tracemalloc.reset_peak()
+            memoria_inicial = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        app.run()
+        fin = time.perf_counter()
+        if medir_memoria:
+            pico = tracemalloc.get_traced_memory()[1] - memoria_inicial
+            ejecuciones[nombre] = {"memoria_pico_mb": round(pico / 2**20, 2)}
+        else:
+            ejecuciones[nombre] = {
+                "tiempo_ms": round((fin - inicio) * 1000, 1),
+                "figuras_renderizadas": contadores["figuras"],
+                "elementos_enviados": contadores["elementos"],
+                "bytes_enviados": contadores["bytes"],
+                "excepciones": [e.message for e in app.exception],
+            }
+
+    # ru_maxrss está en KB en Linux
+    rss_pico_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"ejecuciones": ejecuciones, "rss_pico_mb": round(rss_pico_mb, 1)}))
+
+
+# Copia la aplicación a `destino` con los datos a la escala indicada
+def preparar_aplicacion(destino, escala):
+    # Se importan aquí: el proceso hijo debe importar los módulos de la aplicación desde la copia temporal
+    import conjuntos
+    from datos_sinteticos import escribir_dataset
+
+    shutil.copytree(RAIZ, destino, ignore=IGNORAR_AL_COPIAR, dirs_exist_ok=True)
+    datos = {}
+    for nombre, config in conjuntos.DATASETS.items():
+        origen = conjuntos.ruta_dataset(nombre)
+        if not os.path.exists(origen):
+            continue
+        if escala == 1:
+            salida = os.path.join(destino, config["archivo"])
+            shutil.copyfile(origen, salida)
+        else:
+            salida, _ = escribir_dataset(nombre, escala, destino)
+        datos[nombre] = {"filas": _contar_filas(salida, config), "bytes": os.path.getsize(salida)}
+    return datos
+
+
+def _contar_filas(ruta, config):
+    with open(ruta, encoding=config["lectura"].get("encoding", "utf-8")) as archivo:
+        return sum(1 for _ in archivo) - 1
+
+
+def _ejecutar_hijo(raiz_app, pagina, *opciones):
+    proceso = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--hijo", raiz_app, pagina, *opciones],
+        cwd=raiz_app, capture_output=True, text=True,
+    )
+    lineas = [linea for linea in proceso.stdout.splitlines() if linea.startswith("{")]
+    if proceso.returncode != 0 or not lineas:
+        return {"error": proceso.stderr.strip().splitlines()[-1:]}
+    return json.loads(lineas[-1])
+
+
+# Mide una página: tiempos y envíos en un proceso, memoria en otro
+def medir(raiz_app, pagina):
+    tiempos = _ejecutar_hijo(raiz_app, pagina)
+    if "error" in tiempos:
+        return {"pagina": pagina, **tiempos}
+    memoria = _ejecutar_hijo(raiz_app, pagina, "--memoria")
+    for nombre, ejecucion in tiempos["ejecuciones"].items():
+        ejecucion["memoria_pico_mb"] = memoria.get("ejecuciones", {}).get(nombre, {}).get("memoria_pico_mb")
+    return {"pagina": pagina, **tiempos}
+
+
+def ejecutar(paginas, escalas):
+    resultados, datos = [], {}
+    for escala in escalas:
+        with tempfile.TemporaryDirectory(prefix=f"benchmark_x{escala}_") as raiz_app:
+            datos[escala] = preparar_aplicacion(raiz_app, escala)
+            for pagina in paginas:
+                medicion = medir(raiz_app, pagina)
+                resultados.append({"escala": escala, **medicion})
+                print(f"x{escala} {pagina}: {_resumen(medicion)}", file=sys.stderr, flush=True)
+    return resultados, datos
+
+
+def _resumen(medicion):
+    if "error" in medicion:
+        return f"error {medicion['error']}"
+    fria, caliente = medicion["ejecuciones"]["fria"], medicion["ejecuciones"]["caliente"]
+    return f"{fria['tiempo_ms']:.0f} ms en frío, {caliente['tiempo_ms']:.0f} ms en caliente"
+
+
+# Compara los resultados con una ejecución base; devuelve las mediciones que empeoraron
+def comparar(resultados, base, tolerancia):
+    def indexar(lista):
+        return {
+            (r["escala"], r["pagina"]): r["ejecuciones"]
+            for r in lista if "ejecuciones" in r
+        }
+
+    actuales, anteriores = indexar(resultados), indexar(base["resultados"])
+    regresiones = []
+    for llave in sorted(actuales.keys() & anteriores.keys()):
+        for ejecucion in ("fria", "caliente"):
+            for metrica in METRICAS_COMPARADAS:
+                antes = anteriores[llave][ejecucion].get(metrica)
+                ahora = actuales[llave][ejecucion].get(metrica)
+                if antes and ahora is not None and ahora > antes * (1 + tolerancia):
+                    regresiones.append({
+                        "escala": llave[0], "pagina": llave[1], "ejecucion": ejecucion,
+                        "metrica": metrica, "base": antes, "actual": ahora,
+                        "cambio": round(ahora / antes - 1, 3),
+                    })
+    return regresiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paginas", nargs="*", default=PAGINAS)
+    parser.add_argument("--escalas", nargs="+", type=int, default=[1, 10])
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto, stdout)")
+    parser.add_argument("--comparar", help="archivo JSON de una ejecución base")
+    parser.add_argument("--tolerancia", type=float, default=0.25)
+    parser.add_argument("--hijo", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--memoria", action="store_true", help=argparse.SUPPRESS)
+    argumentos = parser.parse_args()
+    sys.path.insert(0, RAIZ)
+
+    if argumentos.hijo:
+        raiz_app, pagina = argumentos.hijo
+        sys.path.insert(0, raiz_app)
+        _medir_pagina(raiz_app, pagina, argumentos.memoria)
+        sys.exit(0)
+
+    resultados, datos = ejecutar(argumentos.paginas, argumentos.escalas)
+    salida = {"python": sys.version.split()[0], "datos": datos, "resultados": resultados}
+    if argumentos.comparar:
+        with open(argumentos.comparar, encoding="utf-8") as archivo:
+            salida["regresiones"] = comparar(salida["resultados"], json.load(archivo), argumentos.tolerancia)
+
+    texto = json.dumps(salida, indent=2, ensure_ascii=False)
+    if argumentos.salida:
+        with open(argumentos.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto)
+    else:
+        print(texto)
+
+    sys.exit(1 if salida.get("regresiones") else 0)
@@ -0,0 +1,83 @@
+import threading
+import weakref
+
+import streamlit as st
+
+from importaciones import importar_diferido
+
+np = importar_diferido("numpy")
+pd = importar_diferido("pandas")
+
+
+## Registro de datos compartidos
+#
+# Los DataFrame que se comparten entre sesiones (conjuntos de datos y agregados guardados
+# con st.cache_resource) se congelan: sus arreglos quedan de solo lectura, así que escribir
+# en sus valores (df.loc[...] = ..., fillna(inplace=True)...) lanza ValueError en lugar de
+# cambiar los datos de todas las sesiones. Las páginas reciben vistas: DataFrame propios
+# que reutilizan esos arreglos sin copiarlos, en los que renombrar o agregar columnas no
+# afecta a la copia compartida. Así la memoria por sesión no crece con el tamaño de los datos.
+
+@st.cache_resource(show_spinner=False)
+def _registro_compartido():
+    return {"candado": threading.Lock(), "datos": {}}
+
+
+# Deja de solo lectura los arreglos de los bloques de `df` (y lo devuelve)
+def congelar(df):
+    for arreglo in df._mgr.arrays:
+        if isinstance(arreglo, np.ndarray):
+            arreglo.flags.writeable = False
+    return df
+
+
+# Congela `df` y lo anota en el registro con la `clave` indicada (p. ej. (nombre, versión)).
+# El registro guarda referencias débiles: la entrada desaparece cuando el caché libera el
+# DataFrame.
+def compartir(clave, df):
+    entrada = {
+        "datos": weakref.ref(df),
+        "filas": len(df),
+        "columnas": df.shape[1],
+        "bytes": int(df.memory_usage(index=True, deep=True).sum()),
+    }
+    congelar(df)
+    registro = _registro_compartido()
+    with registro["candado"]:
+        for vieja in [c for c, e in registro["datos"].items() if e["datos"]() is None]:
+            del registro["datos"][vieja]
+        registro["datos"][clave] = entrada
+    return df
+
+
+# Vista de un DataFrame compartido (opcionalmente solo con algunas columnas): comparte sus
+# arreglos (sin copiarlos) pero tiene sus propias columnas. df[columnas] copiaría los datos.
+def vista(df, columnas=None):
+    if not columnas:
+        return df.copy(deep=False)
+    seleccion = pd.DataFrame({columna: df[columna] for columna in columnas}, copy=False)
+    seleccion.attrs.update(df.attrs)
+    return seleccion
+
+
+# Memoria total de los DataFrame compartidos vivos en el proceso (bytes)
+def bytes_compartidos():
+    registro = _registro_compartido()
+    with registro["candado"]:
+        return sum(entrada["bytes"] for entrada in registro["datos"].values() if entrada["datos"]() is not None)
+
+
+# Resumen de los DataFrame compartidos vivos en el proceso: clave, filas, columnas y MB
+def datos_compartidos():
+    registro = _registro_compartido()
+    with registro["candado"]:
+        for clave in [c for c, entrada in registro["datos"].items() if entrada["datos"]() is None]:
+            del registro["datos"][clave]
+        return pd.DataFrame(
+            [
+                {"Clave": str(clave), "Filas": entrada["filas"], "Columnas": entrada["columnas"],
+                 "MB": entrada["bytes"] / 2**20}
+                for clave, entrada in registro["datos"].items()
+            ],
+            columns=["Clave", "Filas", "Columnas", "MB"],
+        )
@@ -0,0 +1,315 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+
+import streamlit as st
+
+import compartidos
+import tiempos
+from importaciones import importar_diferido
+
+pd = importar_diferido("pandas")
+pa = importar_diferido("pyarrow")
+feather = importar_diferido("pyarrow.feather")
+
+
+## Acceso a los datos
+
+# Carpeta base del proyecto (las rutas de los CSV son relativas a ella)
+RUTA_BASE = os.path.dirname(os.path.abspath(__file__))
+
+# Conjuntos de datos de la aplicación: archivo, opciones de lectura y esquema de tipos.
+# Las columnas que no aparecen en el esquema se infieren al leer el archivo.
+DATASETS = {
+    "electricos": {
+        "archivo": "autos_eh.csv",
+        "lectura": {},
+        "esquema": {
+            "Modelo": "object",
+            "Motorizacion": "object",
+            "Categoria": "object",
+            "MTMA_Kg": "float64",
+            "Consumo_electrico_kWh/10km": "float64",
+            "Potencia_electrica_kW": "float64",
+            "Autonomia_electrica_km": "float64",
+            "Capacidad_bateria_kWh": "float64",
+            "Consumo Mínimo": "float64",
+            "Consumo Máximo": "float64",
+            "Emisiones Mínimo": "float64",
+            "Emisiones Máximo": "float64",
+        },
+    },
+    "nacional": {
+        "archivo": "BDVehiculosLHOK.csv",
+        "lectura": {},
+        "esquema": {
+            "OEM_Make": "object",
+            "OEM_Model": "object",
+            "MS_VehicleCategoryCode": "object",
+            "MS_FuelType": "object",
+            "LHL_Mission": "object",
+            "LHL_TotalVehicleMass_kg": "float64",
+            "LHL_Payload_kg": "float64",
+            "LHL_AverageSpeed_kmh": "float64",
+            "LHL_MaxSpeed_kmh": "float64",
+            "LHL_CO2_gkm": "float64",
+            "LHL_FuelConsumption_l100km": "float64",
+            "LHR_Mission": "object",
+            "LHR_TotalVehicleMass_kg": "float64",
+            "LHR_Payload_kg": "float64",
+            "LHR_AverageSpeed_kmh": "float64",
+            "LHR_MaxSpeed_kmh": "float64",
+            "LHR_CO2_gkm": "float64",
+            "LHR_FuelConsumption_l100km": "float64",
+        },
+    },
+    "urbano": {
+        "archivo": "datos_vehiculo_urbano.csv",
+        "lectura": {},
+        "esquema": {
+            "OEM_Make": "object",
+            "OEM_Model": "object",
+            "MS_VehicleCategoryCode": "object",
+            "MS_FuelType": "object",
+            "L_Payload_kg": "float64",
+            "R_Payload_kg": "float64",
+            "L_CO2_gkm": "float64",
+            "R_CO2_gkm": "float64",
+            "L_FuelConsumption_Gal_km": "float64",
+            "R_FuelConsumption_Gal_km": "float64",
+            "Cs_L_Gal_km_Ton": "float64",
+            "Cs_R_Gal_km_Ton": "float64",
+            "precio_total_COP_Gal_km": "float64",
+        },
+    },
+    "regional": {
+        "archivo": "datos_vehiculo_regional.csv",
+        "lectura": {"encoding": "latin1", "sep": ","},
+        "esquema": {
+            "OEM_Make": "object",
+            "OEM_Model": "object",
+            "MS_VehicleCategoryCode": "object",
+            "MS_FuelType": "object",
+            "Mission": "object",
+            "L_Payload_kg": "float64",
+            "R_Payload_kg": "float64",
+            "L_CO2_gkm": "float64",
+            "R_CO2_gkm": "float64",
+            "Emision_CO2_avg": "float64",
+            "Consumo_avg": "float64",
+        },
+    },
+}
+
+
+# Carpeta con las copias columnares (Arrow IPC) de los CSV
+CARPETA_ARROW = os.path.join(RUTA_BASE, "datos_arrow")
+
+
+# Ruta absoluta del archivo de un conjunto de datos
+def ruta_dataset(nombre):
+    return os.path.join(RUTA_BASE, DATASETS[nombre]["archivo"])
+
+
+# Ruta de la copia Arrow de un conjunto de datos
+def ruta_arrow(nombre):
+    base = os.path.splitext(DATASETS[nombre]["archivo"])[0]
+    return os.path.join(CARPETA_ARROW, base + ".arrow")
+
+
+# Versión del archivo en disco: cambia cuando el archivo se modifica
+def version_dataset(nombre):
+    info = os.stat(ruta_dataset(nombre))
+    return (info.st_mtime_ns, info.st_size)
+
+
+# Lectura del CSV original con su esquema (opcionalmente solo algunas columnas)
+def _leer_csv(nombre, columnas=None):
+    config = DATASETS[nombre]
+    return pd.read_csv(
+        ruta_dataset(nombre),
+        dtype=config["esquema"],
+        usecols=list(columnas) if columnas else None,
+        **config["lectura"],
+    )
+
+
+# La copia Arrow es válida si es más reciente que el CSV y la huella guardada en sus
+# metadatos (tamaño y resúmenes del inicio y del final) coincide con el CSV actual. La
+# fecha sola no basta: un CSV reemplazado conservando una fecha anterior (cp -p, rsync -a,
+# git checkout) dejaría vigente una copia desactualizada.
+def arrow_vigente(nombre):
+    destino, ruta = ruta_arrow(nombre), ruta_dataset(nombre)
+    if not os.path.exists(destino) or os.stat(destino).st_mtime_ns < os.stat(ruta).st_mtime_ns:
+        return False
+    try:
+        huella = huella_arrow(feather.read_table(destino, columns=[], memory_map=True))
+    except (OSError, pa.ArrowException):
+        return False
+    if huella is None or os.stat(ruta).st_size != huella["bytes"]:
+        return False
+    return huella_archivo(ruta, huella["bytes"]) == huella
+
+
+# Lectura de los bytes [desde, hasta) del CSV. Si `desde` > 0 no hay encabezado y los
+# nombres de las columnas se pasan en `columnas`.
+def _leer_csv_bytes(nombre, desde, hasta, columnas=None):
+    config = DATASETS[nombre]
+    with open(ruta_dataset(nombre), "rb") as archivo:
+        archivo.seek(desde)
+        datos = io.BytesIO(archivo.read(hasta - desde))
+    if desde:
+        return pd.read_csv(datos, header=None, names=list(columnas), dtype=config["esquema"], **config["lectura"])
+    return pd.read_csv(datos, dtype=config["esquema"], **config["lectura"])
+
+
+def _escribir_arrow(nombre, tabla, huella):
+    metadatos = dict(tabla.schema.metadata or {})
+    metadatos[_CLAVE_HUELLA] = json.dumps(huella).encode()
+    os.makedirs(CARPETA_ARROW, exist_ok=True)
+    destino = ruta_arrow(nombre)
+    temporal = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    feather.write_feather(tabla.replace_schema_metadata(metadatos), temporal, compression="uncompressed")
+    os.replace(temporal, destino)
+    return destino
+
+
+# Ingesta completa: convierte el CSV a Arrow IPC sin compresión, que se puede leer con
+# memory-map. Se escribe a un archivo temporal y se reemplaza de forma atómica.
+def convertir_a_arrow(nombre):
+    huella = huella_archivo(ruta_dataset(nombre))
+    df = _leer_csv_bytes(nombre, 0, huella["bytes"])
+    return _escribir_arrow(nombre, pa.Table.from_pandas(df, preserve_index=False), huella)
+
+
+# Lectura de la copia Arrow con memory-map: solo se materializan las columnas pedidas.
+# La huella del CSV queda en df.attrs["huella_csv"].
+def _leer_arrow(nombre, columnas=None):
+    tabla = feather.read_table(
+        ruta_arrow(nombre),
+        columns=list(columnas) if columnas else None,
+        memory_map=True,
+    )
+    df = tabla.to_pandas(split_blocks=True)
+    df.attrs["huella_csv"] = huella_arrow(tabla)
+    return df
+
+
+# Lectura de un conjunto de datos completo. Se guarda una sola copia por proceso y por
+# versión del archivo (la vigente y la anterior), compartida entre todas las sesiones y de
+# solo lectura (ver compartidos.py). Las selecciones de columnas son
+# vistas de esta copia, así que las columnas de texto no se repiten por selección.
+@st.cache_resource(max_entries=2 * len(DATASETS), show_spinner=False)
+def _leer_dataset(nombre, version):
+    try:
+        if not arrow_vigente(nombre):
+            actualizar_arrow(nombre)
+        df = _leer_arrow(nombre)
+    except OSError:
+        # Sin permisos de escritura: se lee directamente el CSV
+        df = _leer_csv(nombre)
+    df.attrs["version_datos"] = version
+    return compartidos.compartir((nombre, version), df)
+
+
+# Devuelve el DataFrame de un conjunto de datos, opcionalmente solo con las columnas
+# indicadas. Es una vista de la copia compartida: no copia los datos, se le pueden
+# renombrar o agregar columnas, pero sus valores son de solo lectura (para cambiarlos,
+# usar .copy() o crear columnas nuevas con .assign()).
+def cargar_datos(nombre, columnas=None):
+    with tiempos.medir_seccion(f"Carga de datos: {nombre}") as medicion:
+        df = compartidos.vista(_leer_dataset(nombre, version_dataset(nombre)), columnas)
+        medicion["filas"] = len(df)
+    return df
+
+## Actualización incremental
+#
+# Los catálogos se actualizan agregando homologaciones al final de los CSV. Cada copia
+# Arrow guarda en sus metadatos la huella del CSV que contiene: bytes leídos y resúmenes
+# del inicio y del final de esos bytes. Si el CSV solo creció (el inicio y el final
+# anteriores siguen iguales y terminaban en fin de línea), se leen únicamente los bytes
+# nuevos y se añaden a la copia; si no, se convierte el archivo completo.
+# Los cubos de agregados.py usan la misma huella para sumar solo las filas nuevas.
+
+# Bytes del inicio y del final que se resumen en la huella
+BYTES_HUELLA = 64 * 1024
+
+# Clave de la huella en los metadatos de la copia Arrow
+_CLAVE_HUELLA = b"impulso_verde.huella_csv"
+
+registro_ingesta = logging.getLogger("impulso_verde.ingesta")
+
+# Evita que dos hilos del proceso conviertan el mismo archivo a la vez
+_candado_ingesta = threading.Lock()
+
+
+def _resumen_bytes(archivo, inicio, fin):
+    archivo.seek(inicio)
+    return hashlib.blake2b(archivo.read(fin - inicio), digest_size=16).hexdigest()
+
+
+# Huella de los primeros `tamano` bytes de un archivo (todo el archivo si es None)
+def huella_archivo(ruta, tamano=None):
+    with open(ruta, "rb") as archivo:
+        if tamano is None:
+            tamano = os.fstat(archivo.fileno()).st_size
+        if tamano:
+            archivo.seek(tamano - 1)
+            fin_de_linea = archivo.read(1) == b"\n"
+        else:
+            fin_de_linea = False
+        return {
+            "bytes": tamano,
+            "inicio": _resumen_bytes(archivo, 0, min(tamano, BYTES_HUELLA)),
+            "final": _resumen_bytes(archivo, max(0, tamano - BYTES_HUELLA), tamano),
+            "fin_de_linea": fin_de_linea,
+        }
+
+
+# True si el CSV actual es el de `huella` con filas agregadas al final
+def es_anexo(nombre, huella):
+    if not huella or not huella["fin_de_linea"]:
+        return False
+    ruta = ruta_dataset(nombre)
+    if os.stat(ruta).st_size <= huella["bytes"]:
+        return False
+    prefijo = huella_archivo(ruta, huella["bytes"])
+    return prefijo["inicio"] == huella["inicio"] and prefijo["final"] == huella["final"]
+
+
+# Huella guardada en una copia Arrow (None si no tiene)
+def huella_arrow(tabla):
+    metadatos = tabla.schema.metadata or {}
+    return json.loads(metadatos[_CLAVE_HUELLA]) if _CLAVE_HUELLA in metadatos else None
+
+
+# Ingesta incremental: si el CSV solo creció desde la última conversión, añade a la copia
+# Arrow las filas de los bytes nuevos; si no (o si las filas nuevas no encajan en los
+# tipos de la copia), la convierte completa.
+# Devuelve (ruta de la copia, "vigente", "incremental" o "completa", filas leídas del CSV).
+def actualizar_arrow(nombre):
+    with _candado_ingesta:
+        destino = ruta_arrow(nombre)
+        if arrow_vigente(nombre):
+            return destino, "vigente", 0
+        if os.path.exists(destino):
+            tabla = feather.read_table(destino, memory_map=True)
+            huella = huella_arrow(tabla)
+            if es_anexo(nombre, huella):
+                nueva_huella = huella_archivo(ruta_dataset(nombre))
+                try:
+                    nuevas = _leer_csv_bytes(nombre, huella["bytes"], nueva_huella["bytes"], tabla.column_names)
+                    anexo = pa.Table.from_pandas(nuevas, schema=tabla.schema, preserve_index=False)
+                except (ValueError, TypeError, pa.ArrowException) as e:
+                    registro_ingesta.info("%s: las filas nuevas no encajan en la copia Arrow (%s), conversión completa", nombre, e)
+                else:
+                    _escribir_arrow(nombre, pa.concat_tables([tabla, anexo]), nueva_huella)
+                    registro_ingesta.info("%s: %d filas nuevas añadidas a la copia Arrow", nombre, len(nuevas))
+                    return destino, "incremental", len(nuevas)
+        convertir_a_arrow(nombre)
+        filas = feather.read_table(destino, columns=[], memory_map=True).num_rows
+        registro_ingesta.info("%s: conversión completa (%d filas)", nombre, filas)
+        return destino, "completa", filas
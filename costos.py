@@ -0,0 +1,296 @@
+import streamlit as st
+
+import compartidos
+import conjuntos
+import utilidades as util
+
+np = util.importar_diferido("numpy")
+pd = util.importar_diferido("pandas")
+
+## Motor de costos de operación
+#
+# Costo por km = consumo por km (en la unidad en que se vende la energía) × precio de la
+# energía. Los precios se ajustan desde la barra lateral y son compartidos por todas las
+# páginas de la sesión. El costo de cada conjunto de datos se guarda en caché por vector de
+# precios, y cada tramo (columna de costo × energía) por su propio precio: al cambiar el
+# precio de una energía solo se recalculan las filas que la usan.
+
+LITROS_POR_GALON = 3.78541
+
+# Unidad en que se vende cada energía (las energías no listadas se venden por galón)
+UNIDADES_ENERGIA = {
+    "Diesel": "gal",
+    "Gasolina": "gal",
+    "Electricidad": "kWh",
+    "Hidrógeno": "kg",
+}
+
+# Precios de referencia en COP por unidad de venta. Las energías sin precio quedan sin costo
+# hasta que se ingrese uno.
+PRECIOS_BASE = {
+    "Diesel": 10561,
+    "Electricidad": 1051,
+}
+
+# Energía de cada motorización del catálogo de eléctricos e híbridos
+ENERGIA_MOTORIZACION = {
+    "Eléctricos puros": "Electricidad",
+    "Autonomía extendida": "Electricidad",
+    "Híbridos enchufables": "Gasolina",
+    "Híbridos de gasolina": "Gasolina",
+    "Pila de combustible": "Hidrógeno",
+}
+
+# Consumo de cada conjunto de datos:
+#   - energia: columna con la energía de cada vehículo (y su traducción, si hace falta)
+#   - costos: columna de costo -> (columna de consumo, unidad). La unidad puede depender de
+#     la energía: en el catálogo de eléctricos la misma columna guarda kWh o litros.
+CONSUMOS = {
+    "nacional": {
+        "energia": ("MS_FuelType", None),
+        "costos": {
+            "Costo_por_km_LHL": ("LHL_FuelConsumption_l100km", "l/100km"),
+            "Costo_por_km_LHR": ("LHR_FuelConsumption_l100km", "l/100km"),
+        },
+    },
+    "urbano": {
+        "energia": ("MS_FuelType", None),
+        "costos": {
+            "Costo_por_km_L": ("L_FuelConsumption_Gal_km", "gal/km"),
+            "Costo_por_km_R": ("R_FuelConsumption_Gal_km", "gal/km"),
+        },
+    },
+    "regional": {
+        "energia": ("MS_FuelType", None),
+        "costos": {
+            "Costo_por_km": ("Consumo_avg", "l/100km"),
+        },
+    },
+    "electricos": {
+        "energia": ("Motorizacion", ENERGIA_MOTORIZACION),
+        "costos": {
+            "Costo_por_km": ("Consumo_electrico_kWh/10km", {
+                "Electricidad": "kWh/100km",
+                "Hidrógeno": "kg/100km",
+                None: "l/100km",
+            }),
+        },
+    },
+}
+
+
+# Factor que convierte un consumo en `unidad` (p. ej. 'l/100km', 'kWh/km') a unidades de
+# venta de `energia` por km
+def factor_consumo(unidad, energia):
+    medida, distancia = unidad.split("/")
+    factor = 1 / 100 if distancia == "100km" else 1.0
+    venta = UNIDADES_ENERGIA.get(energia, "gal")
+    if medida == "l" and venta == "gal":
+        factor /= LITROS_POR_GALON
+    elif medida != venta:
+        raise ValueError(f"No se puede convertir un consumo en {unidad} a {venta} de {energia}")
+    return factor
+
+
+def _unidad(unidad, energia):
+    if isinstance(unidad, dict):
+        return unidad.get(energia, unidad[None])
+    return unidad
+
+
+# Costo por km de uno o varios consumos de una misma energía (NaN si la energía no tiene precio)
+def costo_por_km(consumo, unidad, energia, precios=None):
+    precio = (precios_vigentes() if precios is None else precios).get(energia)
+    consumo = np.asarray(consumo, dtype=float)
+    if precio is None:
+        return np.full(consumo.shape, np.nan)
+    return consumo * factor_consumo(unidad, energia) * float(precio)
+
+
+# Consumos y posiciones de las filas de cada energía de un conjunto de datos. Compartido y de
+# solo lectura. Dos versiones por conjunto: la vigente y la anterior.
+@st.cache_resource(max_entries=2 * len(CONSUMOS), show_spinner=False)
+def _consumos_dataset(nombre, version):
+    config = CONSUMOS[nombre]
+    columna_energia, traduccion = config["energia"]
+    columnas = [columna_energia, *dict.fromkeys(c for c, _ in config["costos"].values())]
+    df = conjuntos.cargar_datos(nombre, columnas)
+
+    energia = df[columna_energia]
+    if traduccion is not None:
+        energia = energia.map(traduccion)
+    codigos, energias = pd.factorize(energia)
+    grupos = {e: np.flatnonzero(codigos == i) for i, e in enumerate(energias)}
+    return {
+        "indice": df.index,
+        "energia": energia.to_numpy(),
+        "grupos": grupos,
+        "consumos": {c: df[c].to_numpy(dtype=float) for c in columnas[1:]},
+    }
+
+
+# Costo de las filas de una energía para una columna de costo, a un precio dado
+@st.cache_resource(max_entries=256, show_spinner=False)
+def _costo_tramo(nombre, version, columna_costo, energia, precio):
+    datos = _consumos_dataset(nombre, version)
+    columna, unidad = CONSUMOS[nombre]["costos"][columna_costo]
+    consumo = datos["consumos"][columna][datos["grupos"][energia]]
+    return costo_por_km(consumo, _unidad(unidad, energia), energia, {energia: precio})
+
+
+# Costos por km de todos los vehículos de un conjunto de datos para un vector de precios
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _costos_dataset(nombre, version, precios):
+    datos = _consumos_dataset(nombre, version)
+    precio_energia = dict(precios)
+    costos = {"Energia": datos["energia"]}
+    for columna_costo in CONSUMOS[nombre]["costos"]:
+        costo = np.full(len(datos["indice"]), np.nan)
+        for energia, posiciones in datos["grupos"].items():
+            if precio_energia.get(energia) is not None:
+                costo[posiciones] = _costo_tramo(nombre, version, columna_costo, energia, precio_energia[energia])
+        costos[columna_costo] = costo
+    return compartidos.compartir(("costos", nombre, version, precios), pd.DataFrame(costos, index=datos["indice"]))
+
+
+# Energías presentes en un conjunto de datos
+def energias_dataset(nombre):
+    return list(_consumos_dataset(nombre, conjuntos.version_dataset(nombre))["grupos"])
+
+
+# Costos por km de todos los vehículos de un conjunto de datos, alineados fila a fila con
+# conjuntos.cargar_datos(nombre): columna 'Energia' y una columna por cada costo de CONSUMOS.
+# Devuelve una vista de la tabla compartida (valores de solo lectura).
+def costos_dataset(nombre, precios=None):
+    precios = precios_vigentes() if precios is None else precios
+    version = conjuntos.version_dataset(nombre)
+    # Solo las energías del conjunto entran en la llave del caché
+    energias = energias_dataset(nombre)
+    vector = tuple((e, float(precios[e])) for e in energias if precios.get(e) is not None)
+    return compartidos.vista(_costos_dataset(nombre, version, vector))
+
+
+## Precios de la sesión
+
+
+# Precios actuales de la sesión (los de referencia si no se han cambiado)
+def precios_vigentes():
+    return st.session_state.get("precios_energia", PRECIOS_BASE)
+
+
+def _guardar_precio(energia, clave):
+    st.session_state["precios_energia"][energia] = st.session_state[clave]
+
+
+# Controles de precios en la barra lateral para las energías de los conjuntos indicados.
+# Los valores se guardan en la sesión (no en el estado del control, que Streamlit descarta al
+# cambiar de página), así que se conservan entre páginas.
+def selector_precios(nombres=(), energias=()):
+    precios = st.session_state.setdefault("precios_energia", dict(PRECIOS_BASE))
+    energias = list(dict.fromkeys([*energias, *(e for n in nombres for e in energias_dataset(n))]))
+
+    with st.sidebar.expander("⚡ Precios de energía (COP)"):
+        for energia in energias:
+            clave = f"_precio_{energia}"
+            precio = precios.get(energia)
+            st.session_state[clave] = None if precio is None else float(precio)
+            st.number_input(
+                f"{energia} (COP/{UNIDADES_ENERGIA.get(energia, 'gal')})",
+                min_value=0.0, step=100.0, key=clave, placeholder="Sin precio",
+                on_change=_guardar_precio, args=(energia, clave),
+            )
+    return precios
+
+
+## Precio de equilibrio diésel–eléctrico
+#
+# Para un par (vehículo diésel d, eléctrico e) de la misma categoría los costos por km son
+# a_d · P_diésel y a_e · P_kWh (a = consumo en unidades de venta por km), así que se cruzan
+# sobre la recta P_kWh = (a_d / a_e) · P_diésel. En un punto (P_diésel, P_kWh) el eléctrico
+# es más barato en los pares con log(a_d) - log(a_e) > log(P_kWh / P_diésel).
+# La distribución de log(a_d) - log(a_e) sobre todos los pares se obtiene sin formar los
+# D × E pares: es la convolución (por FFT) del histograma de log(a_d) con el de -log(a_e).
+# Con eso toda la rejilla de precios se evalúa con una sola interpolación.
+
+BINS_EQUILIBRIO = 4096
+
+
+# Consumo en unidades de venta por km (costo a precio 1) y categoría de los vehículos de una
+# energía. Si el conjunto tiene varias columnas de costo se promedian (p. ej. LHL y LHR).
+def consumos_unitarios(nombre, energia, columna_categoria):
+    unitarios = costos_dataset(nombre, {energia: 1.0})
+    columnas_costo = list(CONSUMOS[nombre]["costos"])
+    df = conjuntos.cargar_datos(nombre, [columna_categoria])
+    tabla = pd.DataFrame({
+        'Categoria': df[columna_categoria].to_numpy(),
+        'Consumo': unitarios[columnas_costo].mean(axis=1).to_numpy(),
+    })
+    return tabla[(unitarios['Energia'].to_numpy() == energia) & (tabla['Consumo'] > 0)]
+
+
+# Función de distribución de log(a_d) - log(a_e) sobre todos los pares: (valores, acumulada)
+def distribucion_log_razon(consumos_diesel, consumos_electricos, bins=BINS_EQUILIBRIO):
+    log_d = np.log(np.asarray(consumos_diesel, dtype=float))
+    log_e = -np.log(np.asarray(consumos_electricos, dtype=float))
+    # Mismo ancho de intervalo para los dos histogramas; la suma cae en la rejilla de la convolución
+    ancho = max(np.ptp(log_d), np.ptp(log_e), 1e-9) / bins
+    hist_d = np.bincount(np.floor((log_d - log_d.min()) / ancho).astype(int)).astype(float)
+    hist_e = np.bincount(np.floor((log_e - log_e.min()) / ancho).astype(int)).astype(float)
+    n = len(hist_d) + len(hist_e) - 1
+    tamano = 1 << (n - 1).bit_length()
+    conteos = np.fft.irfft(np.fft.rfft(hist_d, tamano) * np.fft.rfft(hist_e, tamano), tamano)[:n]
+    acumulada = np.cumsum(np.clip(conteos, 0, None))
+    acumulada /= acumulada[-1]
+    # El intervalo k de la suma cubre [min_d + min_e + k·ancho, ... + 2·ancho)
+    valores = log_d.min() + log_e.min() + (np.arange(n) + 2) * ancho
+    return np.concatenate([[valores[0] - 2 * ancho], valores]), np.concatenate([[0.0], acumulada])
+
+
+# Fracción de pares en que el eléctrico es más barato, sobre la rejilla
+# precios_diesel × precios_kwh (arreglo de forma (len(precios_diesel), len(precios_kwh)))
+def superficie_equilibrio(distribucion, precios_diesel, precios_kwh):
+    valores, acumulada = distribucion
+    umbral = np.log(np.asarray(precios_kwh, dtype=float)[None, :] / np.asarray(precios_diesel, dtype=float)[:, None])
+    return 1 - np.interp(umbral, valores, acumulada)
+
+
+# Cuantiles de la razón de equilibrio a_d / a_e (P_kWh de equilibrio por COP de diésel)
+def cuantiles_razon(distribucion, cuantiles):
+    valores, acumulada = distribucion
+    return np.exp(np.interp(cuantiles, acumulada, valores))
+
+
+# Superficie de equilibrio de una categoría, en caché por versión de los datos y resolución
+# de la rejilla. Devuelve None si la categoría no tiene vehículos diésel o eléctricos.
+@st.cache_data(max_entries=64, show_spinner=False)
+def _equilibrio_categoria(versiones, categoria, resolucion, rango_diesel, rango_kwh):
+    diesel = consumos_unitarios("nacional", "Diesel", "MS_VehicleCategoryCode")
+    electricos = consumos_unitarios("electricos", "Electricidad", "Categoria")
+    diesel = diesel.loc[diesel['Categoria'] == categoria, 'Consumo']
+    electricos = electricos.loc[electricos['Categoria'] == categoria, 'Consumo']
+    if diesel.empty or electricos.empty:
+        return None
+
+    distribucion = distribucion_log_razon(diesel, electricos)
+    precios_diesel = np.linspace(*rango_diesel, resolucion)
+    precios_kwh = np.linspace(*rango_kwh, resolucion)
+    return {
+        "precios_diesel": precios_diesel,
+        "precios_kwh": precios_kwh,
+        "fraccion": superficie_equilibrio(distribucion, precios_diesel, precios_kwh),
+        "razones": cuantiles_razon(distribucion, [0.1, 0.5, 0.9]),
+        "pares": len(diesel) * len(electricos),
+    }
+
+
+def equilibrio_categoria(categoria, resolucion=200, rango_diesel=(5000, 20000), rango_kwh=(300, 2500)):
+    versiones = (conjuntos.version_dataset("nacional"), conjuntos.version_dataset("electricos"))
+    return _equilibrio_categoria(versiones, categoria, int(resolucion),
+                                 tuple(map(float, rango_diesel)), tuple(map(float, rango_kwh)))
+
+
+# Categorías con vehículos diésel (nacional) y eléctricos (catálogo)
+def categorias_equilibrio():
+    diesel = consumos_unitarios("nacional", "Diesel", "MS_VehicleCategoryCode")['Categoria']
+    electricos = consumos_unitarios("electricos", "Electricidad", "Categoria")['Categoria']
+    return sorted(set(diesel.dropna()) & set(electricos.dropna()))
@@ -0,0 +1,77 @@
+import utilidades as util
+
+np = util.importar_diferido("numpy")
+pd = util.importar_diferido("pandas")
+
+## Motor de escenarios de flota
+#
+# Evalúa de una vez una rejilla completa de escenarios: referencias (marcas o modelos) ×
+# tamaños de flota × recorridos diarios × inventarios de referencia. El cálculo es un solo
+# producto con broadcasting de NumPy sobre un arreglo de 4 dimensiones, y el resultado se
+# devuelve como una tabla ordenada (una fila por escenario) lista para graficar o exportar.
+
+# Columnas de la tabla de resultados
+COLUMNAS_ESCENARIOS = [
+    'Referencia', 'Cantidad_vehiculos', 'Recorrido_diario_km', 'Inventario_ton',
+    'Emision_gkm', 'Emision_diaria_ton', 'Porcentaje_inventario',
+]
+
+
+# Convierte una lista de valores a un arreglo 1-D de números, validando que no esté vacía
+def _eje(valores, nombre, minimo=0):
+    eje = np.atleast_1d(np.asarray(valores, dtype=float))
+    if eje.ndim != 1 or len(eje) == 0:
+        raise ValueError(f"'{nombre}' debe ser una lista no vacía de números")
+    if np.any(~np.isfinite(eje)) or np.any(eje < minimo):
+        raise ValueError(f"'{nombre}' solo admite números mayores o iguales a {minimo}")
+    return eje
+
+
+# Evalúa todos los escenarios de la rejilla.
+# `emisiones_gkm`: Series (o dict) {referencia: emisión promedio por vehículo en g/km}.
+# Las emisiones diarias de la flota son emisión × cantidad × recorrido (en toneladas), y se
+# comparan con cada inventario de referencia (en toneladas de CO₂).
+def evaluar_escenarios(emisiones_gkm, cantidades, recorridos_km, inventarios_ton):
+    emisiones_gkm = pd.Series(emisiones_gkm, dtype=float).dropna()
+    if emisiones_gkm.empty:
+        raise ValueError("No hay referencias con emisiones para evaluar")
+
+    emision = emisiones_gkm.to_numpy()
+    cantidad = _eje(cantidades, 'cantidades')
+    recorrido = _eje(recorridos_km, 'recorridos_km')
+    inventario = _eje(inventarios_ton, 'inventarios_ton')
+
+    # (referencias, cantidades, recorridos, 1): toneladas diarias de la flota
+    toneladas = (
+        emision[:, None, None, None]
+        * cantidad[None, :, None, None]
+        * recorrido[None, None, :, None]
+        / 1_000_000
+    )
+    forma = (len(emision), len(cantidad), len(recorrido), len(inventario))
+    toneladas = np.broadcast_to(toneladas, forma)
+
+    # Porcentaje de cada inventario (sin definir si el inventario es 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        porcentaje = np.where(inventario > 0, toneladas / inventario * 100, np.nan)
+
+    # Tabla ordenada: los ejes se repiten en el mismo orden (C) en que se aplana el arreglo
+    indices = np.indices(forma).reshape(4, -1)
+    return pd.DataFrame({
+        'Referencia': emisiones_gkm.index.to_numpy()[indices[0]],
+        'Cantidad_vehiculos': cantidad[indices[1]],
+        'Recorrido_diario_km': recorrido[indices[2]],
+        'Inventario_ton': inventario[indices[3]],
+        'Emision_gkm': emision[indices[0]],
+        'Emision_diaria_ton': toneladas.ravel(),
+        'Porcentaje_inventario': porcentaje.ravel(),
+    }, columns=COLUMNAS_ESCENARIOS)
+
+
+# Lee una lista de números separados por comas (p. ej. "10, 50, 100")
+def leer_lista_numeros(texto):
+    partes = [parte.strip() for parte in texto.replace(';', ',').split(',') if parte.strip()]
+    try:
+        return [float(parte) for parte in partes]
+    except ValueError:
+        raise ValueError(f"'{texto}' no es una lista de números separados por comas") from None
@@ -0,0 +1,104 @@
+import streamlit as st
+
+import utilidades as util
+
+np = util.importar_diferido("numpy")
+pd = util.importar_diferido("pandas")
+
+## Explorador de datos paginado
+#
+# Reemplaza a st.table para tablas grandes: el filtro, el orden y la paginación se resuelven
+# en el servidor y al navegador solo se envía la página visible, como Arrow (st.dataframe).
+# El explorador es un fragmento, así que cambiar de página, filtrar u ordenar vuelve a
+# ejecutar solo la tabla y no la página completa.
+
+# Opción del filtro que busca en todas las columnas de texto
+TODAS_LAS_COLUMNAS = "Todas las columnas de texto"
+
+FILAS_POR_PAGINA = [10, 25, 50, 100]
+
+
+# Posiciones de las filas que cumplen el filtro, en el orden pedido
+def posiciones_visibles(df, texto="", columna_filtro=None, columna_orden=None, ascendente=True):
+    posiciones = np.arange(len(df))
+
+    texto = texto.strip()
+    if texto:
+        if columna_filtro in df.columns:
+            columnas = [columna_filtro]
+        else:
+            columnas = [c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])]
+        mascara = np.zeros(len(df), dtype=bool)
+        for columna in columnas:
+            valores = df[columna].astype(str).where(df[columna].notna(), "")
+            mascara |= valores.str.contains(texto, case=False, regex=False).to_numpy()
+        posiciones = posiciones[mascara]
+
+    if columna_orden in df.columns:
+        # Orden estable y con los nulos al final, como sort_values
+        orden = df[columna_orden].iloc[posiciones].reset_index(drop=True)
+        try:
+            orden = orden.sort_values(ascending=ascendente, kind="stable", na_position="last")
+        except TypeError:
+            # Columna de texto con tipos mezclados (p. ej. números y cadenas): se ordena como texto
+            orden = orden.where(orden.isna(), orden.astype(str))
+            orden = orden.sort_values(ascending=ascendente, kind="stable", na_position="last")
+        posiciones = posiciones[orden.index.to_numpy()]
+    return posiciones
+
+
+# Llave de los datos del explorador: la `version` dada por la página (p. ej. la versión del
+# archivo y los parámetros de los que salen los datos) con las columnas y el número de filas;
+# sin `version`, un resumen del contenido. No se usa la identidad del DataFrame: las páginas
+# crean uno nuevo (una vista) en cada ejecución completa.
+def _llave_datos(df, version=None):
+    if version is not None:
+        return (version, tuple(df.columns), len(df))
+    return (tuple(df.columns), len(df), int(pd.util.hash_pandas_object(df, index=True).sum()))
+
+
+# Posiciones visibles guardadas en la sesión: solo se recalculan si cambia la consulta o los
+# datos, no al cambiar de página ni al volver a ejecutar la página
+def _posiciones_en_sesion(df, clave, consulta, version=None):
+    llave = (_llave_datos(df, version), consulta)
+    guardado = st.session_state.get(f"_{clave}_posiciones")
+    if guardado is not None and guardado["llave"] == llave:
+        return guardado["posiciones"]
+
+    posiciones = posiciones_visibles(df, *consulta)
+    st.session_state[f"_{clave}_posiciones"] = {"llave": llave, "posiciones": posiciones}
+    return posiciones
+
+
+# Muestra `df` paginado con filtro de texto y orden por columna.
+# `clave` identifica el explorador en la sesión (debe ser única en la página) y `version`,
+# si se da, identifica los datos (ver _llave_datos).
+@st.fragment
+def explorador_datos(df, clave, filas_por_pagina=10, mostrar_indice=False, version=None):
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    texto = col1.text_input("Buscar", key=f"{clave}_texto", placeholder="Texto a buscar")
+    columna_filtro = col2.selectbox("En", [TODAS_LAS_COLUMNAS, *df.columns], key=f"{clave}_columna_filtro")
+    columna_orden = col3.selectbox("Ordenar por", [None, *df.columns], key=f"{clave}_orden",
+                                   format_func=lambda c: "Sin ordenar" if c is None else str(c))
+    ascendente = col4.radio("Sentido", ["↑", "↓"], key=f"{clave}_sentido", horizontal=True) == "↑"
+
+    consulta = (texto, columna_filtro, columna_orden, ascendente)
+    posiciones = _posiciones_en_sesion(df, clave, consulta, version)
+
+    col5, col6, col7 = st.columns([1, 1, 3])
+    tamano = col5.selectbox("Filas por página", FILAS_POR_PAGINA, key=f"{clave}_tamano",
+                            index=FILAS_POR_PAGINA.index(filas_por_pagina) if filas_por_pagina in FILAS_POR_PAGINA else 0)
+    paginas = max(1, -(-len(posiciones) // tamano))
+
+    # Si el filtro redujo el número de páginas, se vuelve a la última página válida
+    if st.session_state.get(f"{clave}_pagina", 1) > paginas:
+        st.session_state[f"{clave}_pagina"] = paginas
+    pagina = col6.number_input("Página", min_value=1, max_value=paginas, step=1, key=f"{clave}_pagina")
+
+    inicio = (pagina - 1) * tamano
+    visibles = df.iloc[posiciones[inicio:inicio + tamano]]
+    col7.caption(
+        f"Filas {min(inicio + 1, len(posiciones))}–{inicio + len(visibles)} de {len(posiciones)}"
+        + (f" (filtradas de {len(df)})" if len(posiciones) != len(df) else "")
+    )
+    st.dataframe(visibles, hide_index=not mostrar_indice, use_container_width=True)
@@ -0,0 +1,381 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+import utilidades as util
+
+mfigure = util.importar_diferido("matplotlib.figure")
+backend_agg = util.importar_diferido("matplotlib.backends.backend_agg")
+np = util.importar_diferido("numpy")
+pd = util.importar_diferido("pandas")
+px = util.importar_diferido("plotly.express")
+go = util.importar_diferido("plotly.graph_objects")
+
+## Caché de figuras renderizadas (matplotlib / seaborn)
+#
+# Cada gráfico se describe con una función que recibe los datos y parámetros y devuelve
+# la figura. La figura se renderiza una sola vez a PNG/SVG y los bytes se guardan en
+# memoria: un gráfico sin cambios cuesta una búsqueda en un diccionario en lugar de un
+# render completo con Agg.
+#
+# Las funciones de dibujo crean sus figuras con `subgraficos` y no con pyplot: las figuras
+# no pasan por el gestor de figuras del proceso (compartido por todas las sesiones), así
+# que no hay nada que cerrar y una figura a medio construir se libera con sus variables.
+
+# Límite del caché (número de figuras y tamaño total en bytes)
+MAX_FIGURAS = 256
+MAX_BYTES = 256 * 1024 * 1024
+
+# Opciones de guardado (las mismas que usa st.pyplot por defecto)
+OPCIONES_GUARDADO = {"bbox_inches": "tight", "dpi": 200}
+
+
+# Almacén LRU compartido por todas las sesiones del proceso
+@st.cache_resource(show_spinner=False)
+def _almacen():
+    return {"figuras": OrderedDict(), "bytes": 0, "candado": threading.Lock()}
+
+
+# Huella de un valor: los DataFrame/Series se resumen por su contenido
+def _actualizar_huella(h, valor):
+    if isinstance(valor, pd.DataFrame):
+        h.update(repr(list(valor.columns)).encode())
+        h.update(repr(list(valor.dtypes)).encode())
+        h.update(pd.util.hash_pandas_object(valor, index=True).values.tobytes())
+    elif isinstance(valor, pd.Series):
+        h.update(repr((valor.name, valor.dtype)).encode())
+        h.update(pd.util.hash_pandas_object(valor, index=True).values.tobytes())
+    elif isinstance(valor, (list, tuple)):
+        h.update(type(valor).__name__.encode())
+        for v in valor:
+            _actualizar_huella(h, v)
+    elif isinstance(valor, dict):
+        for k in sorted(valor, key=repr):
+            h.update(repr(k).encode())
+            _actualizar_huella(h, valor[k])
+    else:
+        h.update(repr(valor).encode())
+
+
+# Llave del caché: código de la función de dibujo + datos + parámetros
+def huella_figura(dibujar, args=(), kwargs=None, formato="png"):
+    h = hashlib.blake2b(digest_size=16)
+    codigo = dibujar.__code__
+    h.update(f"{dibujar.__qualname__}:{formato}".encode())
+    h.update(codigo.co_code)
+    h.update(repr(codigo.co_consts).encode())
+    _actualizar_huella(h, args)
+    _actualizar_huella(h, kwargs or {})
+    return h.hexdigest()
+
+
+# Figura de matplotlib con su propio lienzo Agg, fuera del gestor de pyplot. Recibe los
+# mismos argumentos que plt.subplots y devuelve (figura, ejes).
+def subgraficos(filas=1, columnas=1, figsize=None, **kwargs):
+    fig = mfigure.Figure(figsize=figsize)
+    backend_agg.FigureCanvasAgg(fig)
+    return fig, fig.subplots(filas, columnas, **kwargs)
+
+
+# Renderiza una figura a bytes
+def renderizar(fig, formato="png"):
+    figura = fig if isinstance(fig, mfigure.Figure) else fig.figure  # p. ej. sns.PairGrid
+    buffer = io.BytesIO()
+    figura.savefig(buffer, format=formato, **OPCIONES_GUARDADO)
+    return buffer.getvalue()
+
+
+# Devuelve los bytes del gráfico, renderizándolo solo si no está en caché
+def figura_en_cache(dibujar, *args, formato="png", **kwargs):
+    clave = huella_figura(dibujar, args, kwargs, formato)
+    almacen = _almacen()
+    with almacen["candado"]:
+        if clave in almacen["figuras"]:
+            almacen["figuras"].move_to_end(clave)
+            return almacen["figuras"][clave]
+
+    contenido = renderizar(dibujar(*args, **kwargs), formato)
+
+    with almacen["candado"]:
+        if clave not in almacen["figuras"]:
+            almacen["figuras"][clave] = contenido
+            almacen["bytes"] += len(contenido)
+        while len(almacen["figuras"]) > MAX_FIGURAS or almacen["bytes"] > MAX_BYTES:
+            _, viejo = almacen["figuras"].popitem(last=False)
+            almacen["bytes"] -= len(viejo)
+    return contenido
+
+
+# Muestra un gráfico en Streamlit usando el caché de figuras
+def mostrar_figura(dibujar, *args, formato="png", **kwargs):
+    contenido = figura_en_cache(dibujar, *args, formato=formato, **kwargs)
+    if formato == "svg":
+        st.image(contenido.decode("utf-8"), use_container_width=True)
+    else:
+        st.image(contenido, use_container_width=True)
+
+
+# Estado del caché (para diagnóstico)
+def estado_cache_figuras():
+    almacen = _almacen()
+    with almacen["candado"]:
+        return {"figuras": len(almacen["figuras"]), "bytes": almacen["bytes"]}
+
+
+## Densidades rápidas (reemplazo del pairplot con KDE)
+#
+# La KDE se calcula agrupando los datos en una rejilla fija y convolucionando con un
+# núcleo gaussiano por FFT: el costo es O(n + G log G) y el dibujo no depende del número
+# de filas. Los pares de variables se muestran como histogramas 2D en la misma rejilla.
+
+PUNTOS_REJILLA = 512
+BINS_PARES = 64
+
+
+# KDE gaussiana sobre una rejilla fija (ancho de banda por la regla de Scott, como seaborn)
+def kde_fft(valores, puntos=PUNTOS_REJILLA, ancho_banda=None):
+    valores = np.asarray(valores, dtype=float)
+    valores = valores[np.isfinite(valores)]
+    n = len(valores)
+    if n == 0:
+        return np.zeros(puntos), np.zeros(puntos)
+
+    desviacion = valores.std(ddof=1) if n > 1 else 0.0
+    if ancho_banda is None:
+        ancho_banda = desviacion * n ** (-1 / 5) if desviacion > 0 else 1.0
+
+    minimo, maximo = valores.min() - 3 * ancho_banda, valores.max() + 3 * ancho_banda
+    conteos, bordes = np.histogram(valores, bins=puntos, range=(minimo, maximo))
+    paso = bordes[1] - bordes[0]
+    centros = (bordes[:-1] + bordes[1:]) / 2
+
+    # Núcleo truncado en ±4 anchos de banda y convolución lineal por FFT
+    mitad = int(min(puntos - 1, np.ceil(4 * ancho_banda / paso)))
+    desplazamientos = np.arange(-mitad, mitad + 1) * paso
+    nucleo = np.exp(-0.5 * (desplazamientos / ancho_banda) ** 2)
+    nucleo /= nucleo.sum()
+
+    tamano = 1 << int(np.ceil(np.log2(puntos + 2 * mitad)))
+    convolucion = np.fft.irfft(np.fft.rfft(conteos, tamano) * np.fft.rfft(nucleo, tamano), tamano)
+    densidad = np.clip(convolucion[mitad:mitad + puntos], 0, None) / (n * paso)
+    return centros, densidad
+
+
+# Matriz de pares: KDE por FFT en la diagonal e histogramas 2D fuera de ella
+def grafico_pares_densidad(datos, variables, titulo=None, bins=BINS_PARES, puntos=PUNTOS_REJILLA):
+    k = len(variables)
+    fig, ejes = subgraficos(k, k, figsize=(2.5 * k, 2.5 * k), squeeze=False)
+    columnas = {variable: datos[variable].to_numpy(dtype=float) for variable in variables}
+
+    for fila, variable_y in enumerate(variables):
+        for columna, variable_x in enumerate(variables):
+            ax = ejes[fila][columna]
+            if fila == columna:
+                centros, densidad = kde_fft(columnas[variable_x], puntos)
+                ax.plot(centros, densidad)
+                ax.fill_between(centros, densidad, alpha=0.3)
+            else:
+                x, y = columnas[variable_x], columnas[variable_y]
+                validos = np.isfinite(x) & np.isfinite(y)
+                conteos, bordes_x, bordes_y = np.histogram2d(x[validos], y[validos], bins=bins)
+                ax.pcolormesh(bordes_x, bordes_y, np.ma.masked_equal(conteos.T, 0), cmap="Blues", norm="log")
+            if fila == k - 1:
+                ax.set_xlabel(variable_x)
+            if columna == 0:
+                ax.set_ylabel(variable_y if fila != columna else "Densidad")
+
+    if titulo:
+        fig.suptitle(titulo, y=1.02)
+    fig.tight_layout()
+    return fig
+
+
+## Gráficos de plotly para datos grandes
+#
+# Con más filas que UMBRAL_FILAS estas funciones dejan de enviar cada fila al navegador:
+#   - dispersión: trazas WebGL y una muestra de hasta MAX_PUNTOS puntos, estratificada por
+#     color y que conserva los extremos de cada eje;
+#   - histograma: los conteos por intervalo se calculan en el servidor;
+#   - caja: se envían solo los estadísticos (cuartiles, bigotes, media) de cada grupo y una
+#     muestra de hasta MAX_ATIPICOS valores atípicos.
+# Por debajo del umbral se dibujan igual que con plotly express. El umbral se puede cambiar
+# con la variable de entorno UMBRAL_FILAS_GRAFICOS o con el argumento `umbral`.
+
+UMBRAL_FILAS = int(os.environ.get("UMBRAL_FILAS_GRAFICOS", 20000))
+MAX_PUNTOS = 10000
+MAX_ATIPICOS = 500
+
+
+def es_grande(df, umbral=None):
+    return len(df) > (UMBRAL_FILAS if umbral is None else umbral)
+
+
+# Muestra de aproximadamente n filas: proporcional por estrato (cada estrato conserva al menos
+# una fila) e incluyendo las filas con el mínimo y el máximo de `columnas_extremos`
+def muestra_representativa(df, n, columnas_extremos=(), estrato=None, semilla=0):
+    if len(df) <= n:
+        return df
+    rng = np.random.default_rng(semilla)
+
+    if estrato is not None:
+        grupos = df.groupby(estrato, sort=False, dropna=False).indices.values()
+    else:
+        grupos = [np.arange(len(df))]
+    elegidas = [
+        rng.choice(posiciones, min(len(posiciones), max(1, round(n * len(posiciones) / len(df)))), replace=False)
+        for posiciones in grupos
+    ]
+
+    for columna in columnas_extremos:
+        valores = df[columna].to_numpy(dtype=float)
+        if np.isfinite(valores).any():
+            elegidas.append(np.array([np.nanargmin(valores), np.nanargmax(valores)]))
+
+    return df.iloc[np.unique(np.concatenate(elegidas))]
+
+
+def _titulo_muestra(titulo, mostradas, total):
+    detalle = f"muestra de {mostradas:,} de {total:,} filas"
+    return f"{titulo} ({detalle})" if titulo else detalle.capitalize()
+
+
+# px.scatter que por encima del umbral usa WebGL y una muestra representativa
+def dispersion(df, x, y, umbral=None, max_puntos=MAX_PUNTOS, **kwargs):
+    if not es_grande(df, umbral):
+        return px.scatter(df, x=x, y=y, **kwargs)
+
+    color = kwargs.get("color") if isinstance(kwargs.get("color"), str) else None
+    columnas = [x, y] + [kwargs[k] for k in ("color", "size", "symbol") if isinstance(kwargs.get(k), str)]
+    columnas += list(kwargs.get("hover_data") or [])
+    muestra = muestra_representativa(df[list(dict.fromkeys(columnas))], max_puntos, (x, y), color)
+
+    fig = px.scatter(muestra, x=x, y=y, render_mode="webgl", **kwargs)
+    fig.update_layout(title=_titulo_muestra(kwargs.get("title"), len(muestra), len(df)))
+    return fig
+
+
+# px.histogram que por encima del umbral agrupa en el servidor y envía solo los conteos
+def histograma(df, x, nbins=20, umbral=None, **kwargs):
+    if not es_grande(df, umbral):
+        return px.histogram(df, x=x, nbins=nbins, **kwargs)
+
+    color = kwargs.pop("color", None)
+    valores = df[x].to_numpy(dtype=float)
+    validos = np.isfinite(valores)
+    bordes = np.histogram_bin_edges(valores[validos], bins=nbins)
+    centros = (bordes[:-1] + bordes[1:]) / 2
+
+    if color is None:
+        conteos = pd.DataFrame({x: centros, "count": np.histogram(valores[validos], bins=bordes)[0]})
+    else:
+        conteos = pd.concat([
+            pd.DataFrame({x: centros, "count": np.histogram(grupo[np.isfinite(grupo)], bins=bordes)[0], color: nombre})
+            for nombre, grupo in df[x].astype(float).groupby(df[color], sort=False)
+        ], ignore_index=True)
+
+    fig = px.bar(conteos, x=x, y="count", color=color, **kwargs)
+    fig.update_traces(width=bordes[1] - bordes[0])
+    fig.update_layout(bargap=0, barmode="relative", yaxis_title="count")
+    return fig
+
+
+# Cuartiles, bigotes (1.5 × rango intercuartílico) y atípicos de un grupo de valores.
+# Devuelve None si el grupo no tiene valores finitos.
+def estadisticos_caja(valores):
+    valores = valores[np.isfinite(valores)]
+    if not len(valores):
+        return None
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    rango = q3 - q1
+    dentro = valores[(valores >= q1 - 1.5 * rango) & (valores <= q3 + 1.5 * rango)]
+    inferior, superior = dentro.min(), dentro.max()
+    return {
+        "q1": q1, "mediana": mediana, "q3": q3, "media": valores.mean(),
+        "inferior": inferior, "superior": superior,
+        "atipicos": valores[(valores < inferior) | (valores > superior)],
+    }
+
+
+# px.box que por encima del umbral envía los estadísticos de cada grupo en lugar de las filas.
+# Como en px.box, con `color` hay una caja por (x, color) coloreada según la columna de color
+# (agrupadas lado a lado si es distinta de x), con una entrada de leyenda por valor de color.
+def caja(df, x, y, umbral=None, max_atipicos=MAX_ATIPICOS, **kwargs):
+    if not es_grande(df, umbral):
+        return px.box(df, x=x, y=y, **kwargs)
+
+    rng = np.random.default_rng(0)
+    color = kwargs.get("color")
+    secuencia = kwargs.get("color_discrete_sequence") or px.colors.qualitative.Plotly
+    mapa = dict(kwargs.get("color_discrete_map") or {})
+    if color is not None:
+        for valor in df[color].dropna().unique():
+            if valor not in mapa:
+                mapa[valor] = secuencia[len(mapa) % len(secuencia)]
+
+    columnas = [x] if color is None or color == x else [x, color]
+    grupos = df[y].astype(float).groupby([df[c] for c in columnas], sort=False)
+    fig = go.Figure()
+    en_leyenda = set()
+    for llave, valores in grupos:
+        grupo = llave[0]
+        valor_color = None if color is None else (grupo if color == x else llave[1])
+        e = estadisticos_caja(valores.to_numpy())
+        if e is None:
+            continue
+        nombre = str(grupo if valor_color is None else valor_color)
+        marcador = secuencia[0] if valor_color is None else mapa[valor_color]
+        fig.add_trace(go.Box(
+            x=[grupo], q1=[e["q1"]], median=[e["mediana"]], q3=[e["q3"]], mean=[e["media"]],
+            lowerfence=[e["inferior"]], upperfence=[e["superior"]],
+            name=nombre, legendgroup=nombre, showlegend=nombre not in en_leyenda,
+            offsetgroup=nombre if len(columnas) > 1 else None, marker_color=marcador, boxpoints=False,
+        ))
+        en_leyenda.add(nombre)
+        atipicos = e["atipicos"]
+        if len(atipicos) > max_atipicos:
+            atipicos = rng.choice(atipicos, max_atipicos, replace=False)
+        if len(atipicos):
+            fig.add_trace(go.Scattergl(
+                x=[grupo] * len(atipicos), y=atipicos, mode="markers",
+                marker=dict(color=marcador, size=4), name=nombre, legendgroup=nombre, showlegend=False,
+            ))
+
+    etiquetas = kwargs.get("labels") or {}
+    fig.update_layout(
+        title=kwargs.get("title"),
+        xaxis_title=etiquetas.get(x, x),
+        yaxis_title=etiquetas.get(y, y),
+        legend_title=etiquetas.get(color, color) if color else None,
+        boxmode="group" if len(columnas) > 1 else "overlay",
+    )
+    return fig
+
+
+## Bandas de incertidumbre
+#
+# Intervalos de percentiles por grupo: barra gruesa entre P25 y P75, línea entre P5 y P95,
+# marcador en la mediana y una cruz en el valor con los precios vigentes.
+
+
+def bandas_percentiles(bandas, grupo, titulo=None, etiqueta_valor="Costo por km (COP)"):
+    bandas = bandas.sort_values("P50")
+    grupos = bandas[grupo].astype(str)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=grupos, y=bandas["P95"] - bandas["P5"], base=bandas["P5"], width=0.15,
+        marker_color="lightsteelblue", name="P5–P95",
+    ))
+    fig.add_trace(go.Bar(
+        x=grupos, y=bandas["P75"] - bandas["P25"], base=bandas["P25"], width=0.5,
+        marker_color="steelblue", name="P25–P75",
+    ))
+    fig.add_trace(go.Scatter(x=grupos, y=bandas["P50"], mode="markers", name="Mediana",
+                             marker=dict(color="black", symbol="line-ew-open", size=18)))
+    fig.add_trace(go.Scatter(x=grupos, y=bandas["Costo_vigente"], mode="markers", name="Precios vigentes",
+                             marker=dict(color="firebrick", symbol="x", size=8)))
+    fig.update_layout(title=titulo, barmode="overlay", xaxis_title=grupo, yaxis_title=etiqueta_valor)
+    return fig
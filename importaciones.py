@@ -0,0 +1,28 @@
+import importlib
+
+
+## Importaciones diferidas
+#
+# Las librerías pesadas (pandas, matplotlib, seaborn, plotly, scipy...) se importan la
+# primera vez que se usa uno de sus atributos, no al cargar el módulo. Así una página
+# solo paga las librerías de las secciones que realmente ejecuta, y su primer contenido
+# aparece antes.
+
+class _ModuloDiferido:
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nombre)
+        return getattr(self._modulo, atributo)
+
+    def __repr__(self):
+        estado = "importado" if self._modulo is not None else "sin importar"
+        return f"<módulo diferido {self._nombre} ({estado})>"
+
+
+# Devuelve un módulo que se importa al primer uso
+def importar_diferido(nombre):
+    return _ModuloDiferido(nombre)
@@ -0,0 +1,25 @@
+# Ingesta de datos: convierte los CSV de la aplicación a Arrow IPC (datos_arrow/)
+# para que las páginas los carguen con memory-map y solo con las columnas necesarias.
+# Si un CSV solo creció desde la última ingesta, se leen únicamente las filas nuevas;
+# con --completa se convierte siempre el archivo entero.
+#
+# Uso: python ingesta.py [--completa] [electricos nacional urbano regional]
+import os
+import sys
+
+import conjuntos
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    completa = "--completa" in argumentos
+    nombres = [a for a in argumentos if a != "--completa"] or list(conjuntos.DATASETS)
+    for nombre in nombres:
+        if not os.path.exists(conjuntos.ruta_dataset(nombre)):
+            print(f"{nombre}: no se encontró {conjuntos.DATASETS[nombre]['archivo']}, se omite")
+            continue
+        if completa:
+            destino, tipo, filas = conjuntos.convertir_a_arrow(nombre), "completa", None
+        else:
+            destino, tipo, filas = conjuntos.actualizar_arrow(nombre)
+        detalle = f" ({filas:,} filas leídas)" if filas is not None else ""
+        print(f"{nombre}: {conjuntos.DATASETS[nombre]['archivo']} -> {os.path.relpath(destino, conjuntos.RUTA_BASE)} [{tipo}]{detalle}")
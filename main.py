@@ -1,12 +1,20 @@
 import streamlit as st
-import pandas as pd
 import utilidades as util
+import precalentamiento
+import agregados as agg
 
 # Título e icono de la página
 st.set_page_config(page_title="Impulso Verde", page_icon="🔋", layout="wide")
 
 util.generarMenu()
 
+# Cargar en segundo plano los datos de las demás páginas mientras se lee la portada
+precalentamiento.iniciar_precalentamiento(agg.tareas_precalentamiento())
+# Vigilar los CSV: los anexos se incorporan sin recalcular todo desde cero
+precalentamiento.iniciar_vigilancia(agg.tareas_precalentamiento())
+with st.sidebar:
+    precalentamiento.mostrar_precalentamiento()
+
 with st.container():
             col_img, col_text = st.columns([1, 3])
 
@@ -0,0 +1,360 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import compartidos
+import tiempos
+from importaciones import importar_diferido
+
+np = importar_diferido("numpy")
+pd = importar_diferido("pandas")
+
+
+## Memoria por sesión y página
+#
+# Cada ejecución de una página (desde generarMenu) se anota con su sesión, su página y el
+# hilo que la ejecuta. Un hilo de muestreo lee cada INTERVALO_MUESTREO_MEMORIA segundos la
+# memoria residente (RSS), la memoria trazada por tracemalloc (si el perfil está activo) y
+# las figuras de matplotlib abiertas, y atribuye cada muestra a las ejecuciones en curso:
+# así se sabe qué página estaba corriendo en los picos. Cuando termina una ejecución se
+# registra cuánto cambió la memoria (aproximado al intervalo de muestreo; con varias
+# sesiones a la vez las ejecuciones concurrentes comparten los picos).
+# Con el perfil activo, tracemalloc atribuye las asignaciones vivas a la línea de la página
+# (o del módulo) que las hizo. Las páginas pueden anotar además sus DataFrame principales
+# con anotar_objetos(); solo cuentan los arreglos propios, no los del registro compartido.
+# Cada muestra se escribe como línea JSON en el registro "impulso_verde.memoria" y, si se
+# define ARCHIVO_METRICAS_MEMORIA, en formato de texto de Prometheus en ese archivo.
+# La vista de operador está en pages/memoria.py (abrir la aplicación con ?depurar=1).
+
+INTERVALO_MUESTREO_MEMORIA = float(os.environ.get("INTERVALO_MUESTREO_MEMORIA", 5))
+
+# Muestras que se conservan (con el intervalo por defecto, la última hora)
+MUESTRAS_MEMORIA = 720
+
+# Perfil con tracemalloc desde el arranque (PERFIL_MEMORIA=1) y marcos de pila por asignación
+PERFIL_MEMORIA = os.environ.get("PERFIL_MEMORIA") == "1"
+MARCOS_PERFIL = int(os.environ.get("MARCOS_PERFIL_MEMORIA", 40))
+
+ARCHIVO_METRICAS_MEMORIA = os.environ.get("ARCHIVO_METRICAS_MEMORIA")
+
+# Sesiones sin ejecuciones durante más de este tiempo (s) dejan de listarse
+VIGENCIA_SESION = 3600
+
+registro_memoria = logging.getLogger("impulso_verde.memoria")
+if not registro_memoria.handlers:
+    _manejador = logging.StreamHandler()
+    _manejador.setFormatter(logging.Formatter("%(message)s"))
+    registro_memoria.addHandler(_manejador)
+    registro_memoria.setLevel(os.environ.get("NIVEL_REGISTRO_MEMORIA", "WARNING"))
+    registro_memoria.propagate = False
+
+
+# Estado compartido de la contabilidad de memoria
+@st.cache_resource(show_spinner=False)
+def _estado_memoria():
+    if PERFIL_MEMORIA and not tracemalloc.is_tracing():
+        tracemalloc.start(MARCOS_PERFIL)
+    return {
+        "candado": threading.Lock(),
+        "hilo": None,
+        "ejecuciones": {},
+        "paginas": {},
+        "sesiones": {},
+        "objetos": {},
+        "muestras": deque(maxlen=MUESTRAS_MEMORIA),
+    }
+
+
+# Memoria trazada por tracemalloc en bytes (None si el perfil no está activo)
+def memoria_trazada():
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+
+# Pico de memoria residente del proceso en bytes (None si no se puede leer)
+def memoria_residente_pico():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def activar_perfil_memoria(marcos=MARCOS_PERFIL):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(marcos)
+
+
+def desactivar_perfil_memoria():
+    tracemalloc.stop()
+
+
+# Figuras de matplotlib abiertas y memoria aproximada de sus lienzos RGBA (sin importar
+# matplotlib si ninguna página lo ha usado)
+def figuras_abiertas():
+    if "matplotlib.pyplot" not in sys.modules:
+        return 0, 0
+    from matplotlib._pylab_helpers import Gcf
+    figuras = [gestor.canvas.figure for gestor in Gcf.get_all_fig_managers()]
+    lienzos = sum(int(f.get_figwidth() * f.dpi) * int(f.get_figheight() * f.dpi) * 4 for f in figuras)
+    return len(figuras), lienzos
+
+
+# Bytes propios de un objeto: de los DataFrame/Series/arreglos solo cuentan los arreglos
+# que se pueden escribir (los de solo lectura son del registro compartido o vistas de él)
+# y no los objetos de texto, que suelen estar compartidos con los datos de origen.
+def bytes_propios(valor, profundidad=2):
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes if valor.flags.writeable and valor.base is None else 0
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        total = 0
+        for arreglo in valor._mgr.arrays:
+            if isinstance(arreglo, np.ndarray):
+                total += arreglo.nbytes if arreglo.flags.writeable else 0
+            else:
+                total += getattr(arreglo, "nbytes", 0)
+        return total
+    if profundidad and isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(bytes_propios(v, profundidad - 1) for v in valor.values())
+    if profundidad and isinstance(valor, (list, tuple, set)):
+        return sys.getsizeof(valor) + sum(bytes_propios(v, profundidad - 1) for v in valor)
+    return sys.getsizeof(valor)
+
+
+# Memoria propia del estado de la sesión actual
+def _bytes_estado_sesion():
+    total = 0
+    for clave in list(st.session_state.keys()):
+        try:
+            total += bytes_propios(st.session_state[clave])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return total
+
+
+def _cerrar_ejecucion(estado, ejecucion, rss, trazada):
+    pagina = estado["paginas"].setdefault(ejecucion["pagina"], {
+        "ejecuciones": 0, "rss_pico": 0, "concurrentes_pico": 0, "rss_delta_suma": 0, "trazada_delta_suma": 0,
+    })
+    pagina["ejecuciones"] += 1
+    pagina["rss_pico"] = max(pagina["rss_pico"], ejecucion["rss_pico"], rss or 0)
+    pagina["concurrentes_pico"] = max(pagina["concurrentes_pico"], ejecucion["concurrentes_pico"])
+    if rss is not None and ejecucion["rss_inicial"] is not None:
+        pagina["rss_delta_suma"] += rss - ejecucion["rss_inicial"]
+    if trazada is not None and ejecucion["trazada_inicial"] is not None:
+        pagina["trazada_delta_suma"] += trazada - ejecucion["trazada_inicial"]
+
+
+# Anota el inicio de una ejecución de la página actual (se llama desde generarMenu)
+def registrar_ejecucion():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return
+    estado = _estado_memoria()
+    iniciar_muestreo_memoria()
+    hilo = threading.current_thread()
+    rss, trazada = tiempos.memoria_residente(), memoria_trazada()
+    pagina = tiempos.pagina_actual() or "?"
+    estado_sesion = _bytes_estado_sesion()
+    with estado["candado"]:
+        anterior = estado["ejecuciones"].pop(hilo.ident, None)
+        if anterior is not None:
+            _cerrar_ejecucion(estado, anterior, rss, trazada)
+        estado["ejecuciones"][hilo.ident] = {
+            "hilo": hilo, "sesion": ctx.session_id, "pagina": pagina, "inicio": time.time(),
+            "rss_inicial": rss, "trazada_inicial": trazada, "rss_pico": rss or 0,
+            "concurrentes_pico": len(estado["ejecuciones"]) + 1,
+        }
+        sesion = estado["sesiones"].setdefault(ctx.session_id, {"ejecuciones": 0})
+        sesion.update(pagina=pagina, ultima=time.time(), estado_bytes=estado_sesion)
+        sesion["ejecuciones"] += 1
+        # Los objetos anotados se renuevan en cada ejecución de la página
+        estado["objetos"].pop((ctx.session_id, pagina), None)
+
+
+# Anota la memoria propia de objetos de la página (p. ej. anotar_objetos(Electricos=Electricos))
+def anotar_objetos(**objetos):
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return
+    estado = _estado_memoria()
+    medidos = {nombre: (len(valor) if hasattr(valor, "__len__") else None, bytes_propios(valor))
+               for nombre, valor in objetos.items()}
+    with estado["candado"]:
+        estado["objetos"].setdefault((ctx.session_id, tiempos.pagina_actual() or "?"), {}).update(medidos)
+
+
+def _muestrear_memoria(estado):
+    while True:
+        time.sleep(INTERVALO_MUESTREO_MEMORIA)
+        try:
+            muestra = _tomar_muestra(estado)
+            registro_memoria.info(json.dumps({"evento": "memoria", **muestra}, ensure_ascii=False))
+            if ARCHIVO_METRICAS_MEMORIA:
+                temporal = f"{ARCHIVO_METRICAS_MEMORIA}.{os.getpid()}.tmp"
+                with open(temporal, "w", encoding="utf-8") as archivo:
+                    archivo.write(metricas_prometheus())
+                os.replace(temporal, ARCHIVO_METRICAS_MEMORIA)
+        except Exception as e:
+            registro_memoria.warning("No se pudo tomar la muestra de memoria: %s", e)
+
+
+def _tomar_muestra(estado):
+    rss, trazada = tiempos.memoria_residente(), memoria_trazada()
+    figuras, lienzos = figuras_abiertas()
+    ahora = time.time()
+    with estado["candado"]:
+        # Cierra las ejecuciones cuyo hilo ya terminó y atribuye la muestra a las demás
+        for ident, ejecucion in list(estado["ejecuciones"].items()):
+            if not ejecucion["hilo"].is_alive():
+                del estado["ejecuciones"][ident]
+                _cerrar_ejecucion(estado, ejecucion, rss, trazada)
+        en_curso = list(estado["ejecuciones"].values())
+        for ejecucion in en_curso:
+            ejecucion["rss_pico"] = max(ejecucion["rss_pico"], rss or 0)
+            ejecucion["concurrentes_pico"] = max(ejecucion["concurrentes_pico"], len(en_curso))
+        for sesion in [s for s, datos in estado["sesiones"].items() if ahora - datos["ultima"] > VIGENCIA_SESION]:
+            del estado["sesiones"][sesion]
+            for llave in [llave for llave in estado["objetos"] if llave[0] == sesion]:
+                del estado["objetos"][llave]
+        muestra = {
+            "hora": time.strftime("%H:%M:%S", time.localtime(ahora)),
+            "rss_mb": round(rss / 2**20, 1) if rss is not None else None,
+            "trazada_mb": round(trazada / 2**20, 1) if trazada is not None else None,
+            "compartidos_mb": round(compartidos.bytes_compartidos() / 2**20, 1),
+            "figuras_abiertas": figuras,
+            "lienzos_mb": round(lienzos / 2**20, 1),
+            "paginas_en_curso": sorted({e["pagina"] for e in en_curso}),
+        }
+        estado["muestras"].append(muestra)
+    return muestra
+
+
+# Lanza (una vez por proceso) el hilo de muestreo de memoria
+def iniciar_muestreo_memoria():
+    estado = _estado_memoria()
+    with estado["candado"]:
+        if estado["hilo"] is not None and estado["hilo"].is_alive():
+            return
+        estado["hilo"] = threading.Thread(target=_muestrear_memoria, args=(estado,), name="muestreo_memoria", daemon=True)
+        estado["hilo"].start()
+
+
+# Copia de la contabilidad: muestras, páginas, sesiones y objetos anotados
+def contabilidad_memoria():
+    estado = _estado_memoria()
+    with estado["candado"]:
+        return {
+            "muestras": list(estado["muestras"]),
+            "paginas": {pagina: dict(datos) for pagina, datos in estado["paginas"].items()},
+            "en_curso": [
+                {"sesion": e["sesion"], "pagina": e["pagina"], "inicio": e["inicio"], "rss_pico": e["rss_pico"]}
+                for e in estado["ejecuciones"].values()
+            ],
+            "sesiones": {sesion: dict(datos) for sesion, datos in estado["sesiones"].items()},
+            "objetos": {llave: dict(objetos) for llave, objetos in estado["objetos"].items()},
+        }
+
+
+# Archivo y línea a los que se atribuye una asignación: el primer marco de una página;
+# si no hay, el marco más reciente de un módulo del proyecto; si tampoco, "otros"
+def _origen_asignacion(traza):
+    modulo = None
+    for marco in traza:
+        if not marco.filename.startswith(tiempos.RUTA_BASE):
+            continue
+        relativo = os.path.relpath(marco.filename, tiempos.RUTA_BASE)
+        if relativo == "main.py" or relativo.startswith("pages" + os.sep):
+            return relativo, marco.lineno
+        modulo = (relativo, marco.lineno)
+    return modulo or ("otros", None)
+
+
+# Memoria viva trazada por tracemalloc agrupada por archivo y línea de origen.
+# Devuelve una lista de {"archivo", "linea", "bytes", "bloques"} de mayor a menor.
+def memoria_por_origen():
+    if not tracemalloc.is_tracing():
+        return []
+    instantanea = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*"),
+    ])
+    origenes = {}
+    for estadistica in instantanea.statistics("traceback"):
+        llave = _origen_asignacion(estadistica.traceback)
+        acumulado = origenes.setdefault(llave, [0, 0])
+        acumulado[0] += estadistica.size
+        acumulado[1] += estadistica.count
+    return sorted(
+        ({"archivo": archivo, "linea": linea, "bytes": tamano, "bloques": bloques}
+         for (archivo, linea), (tamano, bloques) in origenes.items()),
+        key=lambda origen: -origen["bytes"],
+    )
+
+
+def _etiquetas(**etiquetas):
+    if not etiquetas:
+        return ""
+    escapadas = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in etiquetas.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(etiquetas, escapadas)) + "}"
+
+
+# Métricas de memoria en formato de texto de Prometheus
+def metricas_prometheus():
+    contabilidad = contabilidad_memoria()
+    rss, pico, trazada = tiempos.memoria_residente(), memoria_residente_pico(), memoria_trazada()
+    figuras, lienzos = figuras_abiertas()
+    lineas = []
+
+    def metrica(nombre, tipo, ayuda, valores):
+        lineas.append(f"# HELP impulso_verde_{nombre} {ayuda}")
+        lineas.append(f"# TYPE impulso_verde_{nombre} {tipo}")
+        for etiquetas, valor in valores:
+            if valor is not None:
+                lineas.append(f"impulso_verde_{nombre}{_etiquetas(**etiquetas)} {valor}")
+
+    metrica("memoria_residente_bytes", "gauge", "Memoria residente del proceso.", [({}, rss)])
+    metrica("memoria_residente_pico_bytes", "gauge", "Pico de memoria residente del proceso.", [({}, pico)])
+    metrica("memoria_trazada_bytes", "gauge", "Memoria trazada por tracemalloc (perfil activo).", [({}, trazada)])
+    metrica("datos_compartidos_bytes", "gauge", "Memoria de los DataFrame del registro compartido.",
+            [({}, compartidos.bytes_compartidos())])
+    metrica("figuras_abiertas", "gauge", "Figuras de matplotlib abiertas.", [({}, figuras)])
+    metrica("figuras_lienzos_bytes", "gauge", "Memoria aproximada de los lienzos de las figuras abiertas.",
+            [({}, lienzos)])
+    metrica("sesiones", "gauge", "Sesiones con ejecuciones recientes.", [({}, len(contabilidad["sesiones"]))])
+    paginas = contabilidad["paginas"]
+    metrica("pagina_ejecuciones_total", "counter", "Ejecuciones terminadas por página.",
+            [({"pagina": p}, d["ejecuciones"]) for p, d in paginas.items()])
+    metrica("pagina_rss_pico_bytes", "gauge", "Memoria residente máxima observada con la página en ejecución.",
+            [({"pagina": p}, d["rss_pico"]) for p, d in paginas.items()])
+    metrica("pagina_rss_delta_bytes_total", "counter", "Suma de la variación de memoria residente por ejecución.",
+            [({"pagina": p}, d["rss_delta_suma"]) for p, d in paginas.items()])
+    metrica("pagina_trazada_delta_bytes_total", "counter", "Suma de la variación de memoria trazada por ejecución.",
+            [({"pagina": p}, d["trazada_delta_suma"]) for p, d in paginas.items()])
+    # Por sesión solo en la vista del operador: como etiqueta, el id de sesión haría crecer
+    # sin límite el número de series. Aquí se agregan por página (y objeto anotado).
+    sesiones_pagina, objetos_pagina = {}, {}
+    for d in contabilidad["sesiones"].values():
+        sesiones_pagina.setdefault(d["pagina"], []).append(d["estado_bytes"])
+    for (_, p), objetos in contabilidad["objetos"].items():
+        for o, (_, b) in objetos.items():
+            objetos_pagina.setdefault((p, o), []).append(b)
+    metrica("pagina_sesiones", "gauge", "Sesiones con ejecuciones recientes por página.",
+            [({"pagina": p}, len(b)) for p, b in sesiones_pagina.items()])
+    metrica("pagina_estado_sesion_bytes", "gauge", "Memoria propia del estado de las sesiones de cada página (suma).",
+            [({"pagina": p}, sum(b)) for p, b in sesiones_pagina.items()])
+    metrica("pagina_estado_sesion_max_bytes", "gauge", "Memoria propia del estado de sesión más grande de cada página.",
+            [({"pagina": p}, max(b)) for p, b in sesiones_pagina.items()])
+    metrica("objetos_bytes", "gauge", "Memoria propia de los objetos anotados por las páginas (suma de las sesiones).",
+            [({"pagina": p, "objeto": o}, sum(b)) for (p, o), b in objetos_pagina.items()])
+    metrica("objetos_max_bytes", "gauge", "Memoria propia del objeto anotado más grande entre las sesiones.",
+            [({"pagina": p, "objeto": o}, max(b)) for (p, o), b in objetos_pagina.items()])
+    return "\n".join(lineas) + "\n"
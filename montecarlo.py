@@ -0,0 +1,150 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import streamlit as st
+
+import conjuntos
+import utilidades as util
+import costos
+
+np = util.importar_diferido("numpy")
+pd = util.importar_diferido("pandas")
+
+## Incertidumbre de precios de energía (Monte Carlo)
+#
+# Se sortean muchos vectores de precios (uno por energía, lognormales con media en el
+# precio vigente y correlación común) y se recalcula el costo por km promedio de cada grupo
+# (vehículo, marca, categoría...). El costo es lineal en los precios, así que el costo de
+# un grupo es pesos @ precios, con pesos (grupos × energías) = consumo en unidades de venta
+# por km. Con eso los sorteos se evalúan como un producto matricial por bloques:
+#   - los grupos de una sola energía no necesitan los sorteos completos: sus percentiles son
+#     el peso por los percentiles del precio de esa energía;
+#   - los demás se evalúan en bloques de filas, repartidos en un grupo de procesos cuando el
+#     trabajo (grupos × sorteos) es grande.
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+SORTEOS = 20_000
+
+# Elementos (grupos × sorteos) por bloque: acota la memoria de cada producto a ~32 MB
+ELEMENTOS_POR_BLOQUE = 4_000_000
+
+# A partir de este número de elementos los bloques se reparten entre procesos
+UMBRAL_PARALELO = int(os.environ.get("UMBRAL_PARALELO_MONTECARLO", 20_000_000))
+
+
+# Sorteos de precios (n × energías): lognormales con media `precios`, desviación relativa
+# `volatilidades` (0.1 = 10 %) y la misma correlación entre los logaritmos de todos los pares
+def sortear_precios(precios, volatilidades, correlacion=0.0, n=SORTEOS, semilla=0):
+    precios = np.asarray(precios, dtype=float)
+    volatilidades = np.broadcast_to(np.asarray(volatilidades, dtype=float), precios.shape)
+    if np.any(precios < 0) or np.any(volatilidades < 0):
+        raise ValueError("Los precios y las volatilidades no pueden ser negativos")
+    energias = len(precios)
+    # La matriz de correlación común es definida positiva solo en (-1 / (energías - 1), 1)
+    minima = -1 / (energias - 1) if energias > 1 else -np.inf
+    if not minima < correlacion < 1:
+        raise ValueError(f"La correlación debe estar entre {max(minima, -1):.2f} y 1 (sin incluir)")
+
+    matriz = np.full((energias, energias), float(correlacion))
+    np.fill_diagonal(matriz, 1.0)
+    normales = np.random.default_rng(semilla).standard_normal((n, energias)) @ np.linalg.cholesky(matriz).T
+
+    sigma = np.sqrt(np.log1p(volatilidades ** 2))
+    with np.errstate(divide='ignore'):
+        mu = np.log(precios) - sigma ** 2 / 2
+    return np.exp(mu + sigma * normales)
+
+
+# Percentiles de pesos @ sorteos.T para un bloque de filas (se ejecuta también en los procesos)
+def _percentiles_bloque(pesos, sorteos, percentiles):
+    return np.percentile(pesos @ sorteos.T, percentiles, axis=1).T
+
+
+# Grupo de procesos compartido por todas las sesiones. Se usa "spawn": los procesos hijos no
+# heredan los hilos del servidor de Streamlit.
+@st.cache_resource(show_spinner=False)
+def _grupo_procesos():
+    return ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=get_context("spawn"))
+
+
+# Percentiles (filas × percentiles) del costo de cada fila de `pesos` (filas × energías)
+# sobre los sorteos de precios (sorteos × energías)
+def bandas(pesos, sorteos, percentiles=PERCENTILES):
+    pesos = np.asarray(pesos, dtype=float)
+    resultado = np.full((len(pesos), len(percentiles)), np.nan)
+
+    # Filas de una sola energía con peso no negativo: percentiles exactos sin el producto
+    activas = pesos != 0
+    simples = (activas.sum(axis=1) <= 1) & np.all(pesos >= 0, axis=1)
+    cuantiles = np.percentile(sorteos, percentiles, axis=0).T  # (energías, percentiles)
+    energia = activas[simples].argmax(axis=1)
+    resultado[simples] = pesos[simples, energia][:, None] * cuantiles[energia]
+
+    compuestas = np.flatnonzero(~simples)
+    if len(compuestas) == 0:
+        return resultado
+    filas_por_bloque = max(1, ELEMENTOS_POR_BLOQUE // len(sorteos))
+    bloques = [compuestas[i:i + filas_por_bloque] for i in range(0, len(compuestas), filas_por_bloque)]
+    if len(bloques) > 1 and len(compuestas) * len(sorteos) >= UMBRAL_PARALELO:
+        futuros = [_grupo_procesos().submit(_percentiles_bloque, pesos[b], sorteos, percentiles) for b in bloques]
+        for bloque, futuro in zip(bloques, futuros):
+            resultado[bloque] = futuro.result()
+    else:
+        for bloque in bloques:
+            resultado[bloque] = _percentiles_bloque(pesos[bloque], sorteos, percentiles)
+    return resultado
+
+
+# Pesos (grupos × energías) del costo por km promedio de cada grupo de un conjunto de datos:
+# el costo a precio 1 de cada vehículo, promediado dentro del grupo. Los vehículos de
+# energías fuera de `energias` no entran en el promedio.
+def pesos_por_grupo(nombre, grupo, energias, columna_costo):
+    unitarios = costos.costos_dataset(nombre, {e: 1.0 for e in energias})
+    df = conjuntos.cargar_datos(nombre, [grupo])
+    tabla = pd.DataFrame({
+        'Grupo': df[grupo].to_numpy(),
+        'Energia': unitarios['Energia'].to_numpy(),
+        'Costo': unitarios[columna_costo].to_numpy(),
+    }).dropna()
+    sumas = tabla.pivot_table(index='Grupo', columns='Energia', values='Costo', aggfunc='sum', fill_value=0.0)
+    sumas = sumas.reindex(columns=list(energias), fill_value=0.0)
+    return sumas.div(tabla.groupby('Grupo').size(), axis=0)
+
+
+# Bandas de percentiles del costo por km promedio de cada grupo, para las energías con precio.
+# `volatilidades`: {energía: desviación relativa}. Devuelve un DataFrame con una fila por
+# grupo, el costo con los precios vigentes y una columna por percentil.
+@st.cache_data(max_entries=32, show_spinner=False)
+def _bandas_dataset(nombre, version, grupo, columna_costo, precios, volatilidades, correlacion, n, semilla):
+    energias = [e for e, _ in precios]
+    pesos = pesos_por_grupo(nombre, grupo, energias, columna_costo)
+    sorteos = sortear_precios([p for _, p in precios], [volatilidades.get(e, 0.0) for e in energias],
+                              correlacion, n, semilla)
+    resultado = pd.DataFrame(bandas(pesos.to_numpy(), sorteos), index=pesos.index,
+                             columns=[f"P{p}" for p in PERCENTILES])
+    resultado.insert(0, 'Costo_vigente', pesos.to_numpy() @ np.array([p for _, p in precios]))
+    return resultado.rename_axis(grupo).reset_index()
+
+
+def bandas_dataset(nombre, grupo, columna_costo, volatilidades, correlacion=0.0, n=SORTEOS, semilla=0, precios=None):
+    precios = costos.precios_vigentes() if precios is None else precios
+    energias = costos.energias_dataset(nombre)
+    vector = tuple((e, float(precios[e])) for e in energias if precios.get(e) is not None)
+    if not vector:
+        raise ValueError("Ninguna energía de los datos tiene precio")
+    return _bandas_dataset(nombre, conjuntos.version_dataset(nombre), grupo, columna_costo, vector,
+                           dict(volatilidades), float(correlacion), int(n), int(semilla))
+
+
+# Controles del análisis de incertidumbre para las energías indicadas
+def controles_incertidumbre(clave, energias):
+    columnas = st.columns(len(energias) + 2)
+    volatilidades = {}
+    for columna, energia in zip(columnas, energias):
+        volatilidades[energia] = columna.slider(
+            f"Volatilidad del precio de {energia} (%)", 0, 50, 15, key=f"{clave}_vol_{energia}") / 100
+    correlacion = columnas[-2].slider("Correlación entre precios", 0.0, 0.95, 0.5, 0.05, key=f"{clave}_correlacion")
+    n = columnas[-1].select_slider("Sorteos", [1_000, 5_000, 20_000, 50_000, 100_000], SORTEOS, key=f"{clave}_sorteos")
+    return volatilidades, correlacion, n
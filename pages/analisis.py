@@ -1,5 +1,17 @@
+import os
+
 import streamlit as st
 import utilidades as util
+import tiempos
+import costos
+import explorador as exp
+import tco
+
+# Librerías pesadas: se importan solo cuando se dibuja o calcula algo con ellas
+np = util.importar_diferido("numpy")
+pd = util.importar_diferido("pandas")
+px = util.importar_diferido("plotly.express")
+go = util.importar_diferido("plotly.graph_objects")
 
 # Título e icono de la página
 st.set_page_config(page_title="Análisis general", page_icon="📊", layout="wide")
@@ -7,3 +19,158 @@ util.generarMenu()
 
 st.header("Análisis general")
 
+# Proyección de costos operativos a largo plazo
+st.subheader("Costo total de propiedad (TCO) a largo plazo")
+st.write("Proyección año a año del costo de compra, energía y mantenimiento de los vehículos del catálogo de eléctricos e híbridos y de los vehículos de carga nacionales, bajo distintos escenarios de escalamiento de precios. El costo de energía por km usa los precios de la barra lateral.")
+
+# Sin los archivos de datos (p. ej. en una copia recién clonada del repositorio) la página
+# muestra un aviso en lugar de fallar
+try:
+    precios = costos.selector_precios(list(tco.VEHICULOS_TCO))
+    vehiculos = tco.vehiculos_tco(precios)
+except FileNotFoundError as e:
+    st.warning(f"No se encontró el archivo de datos {os.path.basename(e.filename or '')}: "
+               "el análisis se muestra cuando estén disponibles los datos de los vehículos.")
+    st.stop()
+
+
+# Comparación de TCO por categoría. Es un fragmento: editar supuestos o escenarios
+# recalcula solo esta sección.
+@st.fragment
+def comparacion_tco():
+    # Parámetros de la proyección
+    col1, col2, col3 = st.columns(3)
+    categorias = sorted(vehiculos['Categoria'].dropna().unique())
+    with col1:
+        categoria = st.selectbox("Categoría de vehículo", categorias,
+                                 index=categorias.index("N3") if "N3" in categorias else 0)
+    with col2:
+        anios = st.slider("Años de la proyección", 1, 30, 10)
+    with col3:
+        km_anuales = st.number_input("Recorrido anual por vehículo (km)", min_value=0, value=20000, step=1000)
+
+    # Supuestos editables: costos de compra y mantenimiento por energía y escenarios de precios
+    col4, col5 = st.columns(2)
+    with col4:
+        st.write("**Compra y mantenimiento por energía**")
+        energias = sorted(vehiculos['Energia'].dropna().unique())
+        supuestos = st.data_editor(
+            pd.DataFrame({'Energia': energias, 'Precio_compra_COP': 0.0, 'Mantenimiento_COP_km': 0.0},
+                         columns=tco.COLUMNAS_SUPUESTOS),
+            key="tco_supuestos", hide_index=True, disabled=['Energia'], use_container_width=True,
+        )
+    with col5:
+        st.write("**Escenarios (porcentajes anuales)**")
+        escenarios = st.data_editor(
+            pd.DataFrame(tco.ESCENARIOS_BASE, columns=tco.COLUMNAS_ESCENARIOS),
+            key="tco_escenarios", hide_index=True, num_rows="dynamic", use_container_width=True,
+        )
+        escenarios = escenarios.dropna(subset=['Escenario']).fillna(0)
+
+    seleccion = vehiculos[(vehiculos['Categoria'] == categoria) & vehiculos['Energia_COP_km'].notna()]
+    if seleccion.empty or escenarios.empty:
+        st.info("No hay vehículos con costo de energía para esta categoría (revise los precios de la barra lateral) o no hay escenarios.")
+        return
+    # Cada escenario se identifica por su nombre (selector y columnas de la gráfica)
+    repetidos = escenarios.loc[escenarios['Escenario'].duplicated(), 'Escenario'].unique()
+    if len(repetidos):
+        st.warning(f"Hay escenarios con el mismo nombre: {', '.join(map(str, repetidos))}. Use un nombre distinto para cada escenario.")
+        return
+
+    with tiempos.medir_seccion("Proyección de TCO", seleccion):
+        proyeccion = tco.proyeccion_vehiculos(seleccion, supuestos, escenarios, anios, km_anuales)
+
+        # TCO acumulado promedio por energía, año y escenario
+        energias_sel, promedio = tco.promedio_por_grupo(proyeccion["acumulado"], seleccion['Energia'].to_numpy())
+        indices = np.indices(promedio.shape).reshape(3, -1)
+        curvas = pd.DataFrame({
+            'Energía': np.asarray(energias_sel)[indices[0]],
+            'Año': indices[1] + 1,
+            'Escenario': escenarios['Escenario'].to_numpy()[indices[2]],
+            'TCO acumulado (COP)': promedio.ravel(),
+        })
+
+    col6, col7 = st.columns([3, 2])
+    with col6, tiempos.medir_seccion("Curvas de TCO"):
+        fig = px.line(curvas, x='Año', y='TCO acumulado (COP)', color='Energía', facet_col='Escenario',
+                      markers=True, title=f"TCO acumulado promedio por energía — categoría {categoria}")
+        fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+        st.plotly_chart(fig, use_container_width=True)
+
+    with col7, tiempos.medir_seccion("Composición del TCO"):
+        escenario = st.selectbox("Escenario", escenarios['Escenario'].tolist())
+        s = escenarios['Escenario'].tolist().index(escenario)
+
+        # Composición del TCO al final de la proyección: compra + energía + mantenimiento
+        compra = proyeccion["acumulado"][:, 0, s] - proyeccion["energia"][:, 0, s] - proyeccion["mantenimiento"][:, 0, s]
+        partes = np.stack([
+            compra,
+            proyeccion["energia"][:, :, s].sum(axis=1),
+            proyeccion["mantenimiento"][:, :, s].sum(axis=1),
+        ], axis=1)
+        _, composicion = tco.promedio_por_grupo(partes, seleccion['Energia'].to_numpy())
+        composicion = pd.DataFrame(composicion, index=energias_sel, columns=['Compra', 'Energía', 'Mantenimiento'])
+        fig = px.bar(composicion.rename_axis('Tipo de energía').reset_index(), x='Tipo de energía',
+                     y=['Compra', 'Energía', 'Mantenimiento'],
+                     title=f"Composición del TCO a {anios} años — {escenario}",
+                     labels={'value': 'COP', 'variable': 'Componente'})
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Ranking de vehículos por TCO al final de la proyección en el escenario elegido
+    st.write(f"**TCO por vehículo a {anios} años — {escenario}**")
+    ranking = seleccion[['Fuente', 'Vehiculo', 'Energia', 'Energia_COP_km']].assign(
+        TCO_COP=proyeccion["acumulado"][:, -1, s]
+    ).sort_values('TCO_COP')
+    exp.explorador_datos(ranking, "tco_ranking")
+
+
+comparacion_tco()
+
+st.write("---")
+
+
+# Mapa de sensibilidad: fracción de pares diésel–eléctrico (misma categoría) en que el
+# eléctrico es más barato por km, para cada combinación de precios
+@st.fragment
+def mapa_equilibrio():
+    st.subheader("Precio de equilibrio diésel–eléctrico")
+    st.write("Cada punto del mapa es un par de precios (diésel y kWh). El color indica el porcentaje de pares de vehículos de la categoría (un diésel de carga nacional y un eléctrico del catálogo) en que el eléctrico tiene menor costo de energía por km. La línea marca el 50 %.")
+    categorias = costos.categorias_equilibrio()
+    if not categorias:
+        st.info("No hay categorías con vehículos diésel y eléctricos a la vez.")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    categoria = col1.selectbox("Categoría", categorias, key="equilibrio_categoria")
+    resolucion = col2.select_slider("Resolución de la rejilla", [50, 100, 200, 400], 200, key="equilibrio_resolucion")
+    rango_diesel = col3.slider("Diésel (COP/gal)", 2000, 40000, (5000, 20000), 500, key="equilibrio_diesel")
+    rango_kwh = col4.slider("Electricidad (COP/kWh)", 100, 5000, (300, 2500), 50, key="equilibrio_kwh")
+
+    with tiempos.medir_seccion("Superficie de equilibrio") as medicion:
+        equilibrio = costos.equilibrio_categoria(categoria, resolucion, rango_diesel, rango_kwh)
+        medicion["filas"] = equilibrio["pares"] if equilibrio else 0
+
+    fig = go.Figure(go.Heatmap(
+        x=equilibrio["precios_diesel"], y=equilibrio["precios_kwh"], z=equilibrio["fraccion"].T * 100,
+        colorscale="RdYlGn", zmin=0, zmax=100, colorbar=dict(title="% eléctrico<br>más barato"),
+    ))
+    fig.add_trace(go.Contour(
+        x=equilibrio["precios_diesel"], y=equilibrio["precios_kwh"], z=equilibrio["fraccion"].T * 100,
+        contours=dict(start=50, end=50, coloring="lines", showlabels=True),
+        line=dict(color="black", width=2), showscale=False, hoverinfo="skip",
+    ))
+    if precios.get("Diesel") is not None and precios.get("Electricidad") is not None:
+        fig.add_trace(go.Scatter(x=[precios["Diesel"]], y=[precios["Electricidad"]], mode="markers",
+                                 marker=dict(color="black", symbol="x", size=12), name="Precios vigentes"))
+    fig.update_layout(title=f"Categoría {categoria}: {equilibrio['pares']:,} pares de vehículos",
+                      xaxis_title="Precio del diésel (COP/gal)", yaxis_title="Precio de la electricidad (COP/kWh)")
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Precio del kWh de equilibrio al precio vigente del diésel
+    if precios.get("Diesel") is not None:
+        p10, p50, p90 = equilibrio["razones"] * float(precios["Diesel"])
+        st.write(f"Con el diésel a {float(precios['Diesel']):,.0f} COP/gal, el kWh de equilibrio es de {p50:,.0f} COP "
+                 f"para el par mediano (entre {p10:,.0f} y {p90:,.0f} COP para el 80 % central de los pares).")
+
+
+mapa_equilibrio()
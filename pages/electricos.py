@@ -1,15 +1,112 @@
 import streamlit as st
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
 import utilidades as util
+import conjuntos
+import memoria
+import tiempos
+import graficos as graf
+import agregados as agg
+import explorador as exp
+import costos
+import montecarlo as mc
+
+# Librerías pesadas: se importan solo cuando se dibuja o calcula algo con ellas
+sns = util.importar_diferido("seaborn")
+pd = util.importar_diferido("pandas")
 
 # Título e icono de la página
 st.set_page_config(page_title="Vehículos eléctricos", page_icon="🔋", layout="wide")
 util.generarMenu()
 
-autos_eh = pd.read_csv("autos_eh.csv")
+autos_eh = conjuntos.cargar_datos("electricos")
+precios = costos.selector_precios(["electricos"], ["Electricidad"])
+
+# Funciones de dibujo: cada gráfico se renderiza una vez y se reutiliza desde el caché de figuras
+
+# Barras de frecuencias con la etiqueta de cada valor
+def grafico_frecuencias(conteo, color, titulo, xlabel, desplazamiento):
+    etiquetas = conteo.index
+    frecuencias = conteo.values
+
+    fig, ax = graf.subgraficos(figsize=(8, 6))
+    ax.bar(etiquetas, frecuencias, color=[color] * len(etiquetas))
+    ax.set_title(titulo)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Frecuencia")
+    ax.set_xticks(range(len(etiquetas)))
+    ax.set_xticklabels(etiquetas, rotation=90)
+    for i in range(len(etiquetas)):
+        ax.text(i, frecuencias[i] + desplazamiento, str(frecuencias[i]), ha='center', va='bottom', fontsize=8, rotation=90)
+    return fig
+
+# Diagrama de caja por categoría
+def grafico_caja(datos, y, titulo, ylabel):
+    fig, ax = graf.subgraficos(figsize=(4.5, 4.5))
+    sns.boxplot(x="Categoria", y=y, data=datos, ax=ax)
+    ax.set_title(titulo)
+    ax.set_xlabel("Categoría")
+    ax.set_ylabel(ylabel)
+    return fig
+
+# Diagrama de violín por categoría
+def grafico_violin(datos, y, titulo, ylabel):
+    fig, ax = graf.subgraficos(figsize=(6, 4))
+    sns.violinplot(x="Categoria", y=y, data=datos, inner="quartile", palette="muted", ax=ax)
+    ax.set_title(titulo)
+    ax.set_xlabel("Categoría")
+    ax.set_ylabel(ylabel)
+    return fig
+
+# Dispersión entre dos variables
+def grafico_dispersion(datos, x, y, titulo, xlabel, ylabel, color=None):
+    fig, ax = graf.subgraficos(figsize=(8, 6))
+    sns.scatterplot(data=datos, x=x, y=y, ax=ax, color=color)
+    ax.set_title(titulo)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    return fig
+
+# Autonomía y consumo frente al MTMA
+def grafico_autonomia_consumo(datos):
+    fig, ax1 = graf.subgraficos(figsize=(8, 6))
+    sns.lineplot(data=datos, x="MTMA_Kg", y="Consumo_electrico_kWh/km", label="Consumo Eléctrico", ax=ax1)
+    sns.lineplot(data=datos, x="MTMA_Kg", y="Autonomia_electrica_km", label="Autonomía Eléctrica", ax=ax1)
+    ax1.set_title("MTMA vs Autonomía y Consumo")
+    ax1.set_xlabel("MTMA (Kg)")
+    ax1.set_ylabel("Valores")
+    ax1.legend()
+    return fig
+
+# Matriz de correlación de los vehículos eléctricos
+def grafico_correlacion_electricos(correlation_matrix):
+    fig, ax = graf.subgraficos(figsize=(8, 6))
+    sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm", ax=ax)
+    ax.set_title("Matriz de Correlación")
+    return fig
+
+# Matriz de correlación de los vehículos híbridos
+def grafico_correlacion_hibridos(correlation_matrix):
+    fig, ax = graf.subgraficos(figsize=(8, 6))  # Tamaño ajustado para mejor visibilidad
+    sns.heatmap(
+        correlation_matrix,
+        annot=True,
+        cmap='coolwarm',
+        fmt='.2f',
+        linewidths=0.5,
+        cbar_kws={'label': 'Correlación'},
+        ax=ax
+    )
+    ax.set_title('Matriz de Correlación (Consumo, Emisiones, Autonomía)', fontsize=14)
+    return fig
+
+# Dispersión entre emisiones y consumo de los híbridos
+def grafico_emisiones_consumo(datos):
+    fig,ax=graf.subgraficos()
+    ax.scatter(datos['Consumo promedio'], datos['Emisiones promedio'], alpha=0.6)
+    ax.set_title('Relación entre Emisiones y Consumo en Vehículos Híbridos')
+    ax.set_xlabel('Consumo Promedio (L/100 km )')
+    ax.set_ylabel('Emisiones Promedio (g CO2/km)')
+    ax.grid(True)
+    return fig
 
     # Encabezado y descripción
 st.header("Análisis de autos eléctricos e híbridos")
@@ -21,11 +118,11 @@ col1, col2 = st.columns([3, 1])
 
     
 st.subheader("Vista general de los datos")
-st.table(autos_eh.head())
+exp.explorador_datos(autos_eh, "catalogo_electricos", version=conjuntos.version_dataset("electricos"))
 
 
 st.subheader("Resumen estadístico")
-st.table(autos_eh.describe())
+st.dataframe(autos_eh.describe())
 
 st.write("---")
 st.write("   ")
@@ -35,26 +132,13 @@ st.header("Distribución por tipo de vehículo")
 
 col3, col4 = st.columns([3, 1])
 
-with col3:
-        motorizaciones = autos_eh["Motorizacion"].value_counts().index
-        frecuencias = autos_eh["Motorizacion"].value_counts().values
-        colores = ["gold"] * len(motorizaciones)
-
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.bar(motorizaciones, frecuencias, color=colores)
-        ax.set_title("Distribución por tipo de vehículo")
-        ax.set_xlabel("Tipo")
-        ax.set_ylabel("Frecuencia")
-        ax.set_xticks(range(len(motorizaciones)))
-        ax.set_xticklabels(motorizaciones, rotation=90)
-        for i in range(len(motorizaciones)):
-            ax.text(i, frecuencias[i] + 0.1, str(frecuencias[i]), ha='center', va='bottom', fontsize=8, rotation=90)
-
-        st.pyplot(fig)
+with col3, tiempos.medir_seccion("Frecuencias por motorización", autos_eh):
+        graf.mostrar_figura(grafico_frecuencias, autos_eh["Motorizacion"].value_counts(), "gold",
+                            "Distribución por tipo de vehículo", "Tipo", 0.1)
 
 with col4:
         st.subheader("Tabla de Frecuencias")
-        st.table(autos_eh["Motorizacion"].value_counts().rename_axis("Motorización").reset_index(name="Frecuencia"))
+        st.dataframe(autos_eh["Motorizacion"].value_counts().rename_axis("Motorización").reset_index(name="Frecuencia"), hide_index=True)
 
 st.write("---")
 st.write("   ")
@@ -65,42 +149,28 @@ Electricos = autos_eh[autos_eh["Motorizacion"] == "Eléctricos puros"]
 
 col5, col6 = st.columns([2, 1])
 
-with col5:
-        categorias = Electricos["Categoria"].value_counts().index
-        frecuencias = Electricos["Categoria"].value_counts().values
-        colores = ["yellowgreen"] * len(categorias)
-
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.bar(categorias, frecuencias, color=colores)
-        ax.set_title("Distribución por categoría de autos eléctricos")
-        ax.set_xlabel("Categoría")
-        ax.set_ylabel("Frecuencia")
-        ax.set_xticks(range(len(categorias)))
-        ax.set_xticklabels(categorias, rotation=90)
-        for i in range(len(categorias)):
-            ax.text(i, frecuencias[i] + 1, str(frecuencias[i]), ha='center', va='bottom', fontsize=8, rotation=90)
-
-        st.pyplot(fig)
+with col5, tiempos.medir_seccion("Categorías de eléctricos", Electricos):
+        graf.mostrar_figura(grafico_frecuencias, Electricos["Categoria"].value_counts(), "yellowgreen",
+                            "Distribución por categoría de autos eléctricos", "Categoría", 1)
 
 with col6:
         st.subheader("Tabla de Categorías")
-        st.table(Electricos["Categoria"].value_counts().rename_axis("Categoría").reset_index(name="Frecuencia"))
+        st.dataframe(Electricos["Categoria"].value_counts().rename_axis("Categoría").reset_index(name="Frecuencia"), hide_index=True)
 
 st.write("---")
 st.write("   ")
 
 # Consumo eléctrico por categoría
 st.subheader("Vehículos eléctricos con mayor y menor consumo en kWh/km por categoría")
-Electricos.rename(columns={'Consumo_electrico_kWh/10km': 'Consumo_electrico_kWh/100km'}, inplace=True)
-Electricos["Consumo_electrico_kWh/km"] = Electricos['Consumo_electrico_kWh/100km'] / 100
+# Columnas derivadas sobre un DataFrame nuevo (los datos cargados son compartidos y de solo lectura)
+Electricos = Electricos.rename(columns={'Consumo_electrico_kWh/10km': 'Consumo_electrico_kWh/100km'})
+Electricos = Electricos.assign(**{"Consumo_electrico_kWh/km": Electricos['Consumo_electrico_kWh/100km'] / 100})
 
-for i in Electricos["Categoria"].unique():
-        E = Electricos[Electricos["Categoria"] == i]
-        max_consumo = E["Consumo_electrico_kWh/km"].max()
-        min_consumo = E["Consumo_electrico_kWh/km"].min()
-
-        max_vehiculos = E[E["Consumo_electrico_kWh/km"] == max_consumo]["Modelo"].tolist()
-        min_vehiculos = E[E["Consumo_electrico_kWh/km"] == min_consumo]["Modelo"].tolist()
+# Extremos de todas las categorías en una sola pasada
+extremos = agg.extremos_por_grupo(Electricos, "Consumo_electrico_kWh/km", "Categoria", "Modelo")
+for i, fila in extremos.iterrows():
+        max_consumo, max_vehiculos = fila["maximo"], fila["modelos_maximo"]
+        min_consumo, min_vehiculos = fila["minimo"], fila["modelos_minimo"]
 
         st.write(f"Categoría: *{i}*")
         st.write(f"- Mayor consumo: {', '.join(max_vehiculos)} ({max_consumo:.2f} kWh/km)")
@@ -109,40 +179,34 @@ for i in Electricos["Categoria"].unique():
 st.write("---")
 st.write("   ")
 
+# Filtro de valores atípicos de consumo (mediana/MAD por motorización y categoría). La
+# máscara se calcula una vez por versión de los datos y la comparten todas las secciones.
+sin_atipicos = agg.filas_sin_atipicos_electricos()
+Electricos = Electricos[sin_atipicos.loc[Electricos.index].to_numpy()]
+memoria.anotar_objetos(Electricos=Electricos)
+
 # Distribución del consumo eléctrico
 st.header("Distribución del Consumo Eléctrico por Categoría")
 
 col7, col8 = st.columns([1, 1])
-with col7:
-        fig = plt.figure(figsize=(4.5, 4.5))
-        sns.boxplot(x="Categoria", y="Consumo_electrico_kWh/km", data=Electricos)
-        plt.title("Distribución del Consumo Eléctrico por Categoría")
-        plt.xlabel("Categoría")
-        plt.ylabel("Consumo Eléctrico (kWh/km)")
-        st.pyplot(fig)
-
-with col8:
-        fig = plt.figure(figsize=(6, 4))
-        sns.violinplot(x="Categoria", y="Consumo_electrico_kWh/km", data=Electricos, inner="quartile", palette="muted")
-        plt.title("Distribución del Consumo Eléctrico por Categoría")
-        plt.xlabel("Categoría")
-        plt.ylabel("Consumo Eléctrico (kWh/km)")
-        st.pyplot(fig)
+with col7, tiempos.medir_seccion("Caja de consumo eléctrico", Electricos):
+        graf.mostrar_figura(grafico_caja, Electricos[["Categoria", "Consumo_electrico_kWh/km"]], "Consumo_electrico_kWh/km",
+                            "Distribución del Consumo Eléctrico por Categoría", "Consumo Eléctrico (kWh/km)")
+
+with col8, tiempos.medir_seccion("Violín de consumo eléctrico", Electricos):
+        graf.mostrar_figura(grafico_violin, Electricos[["Categoria", "Consumo_electrico_kWh/km"]], "Consumo_electrico_kWh/km",
+                            "Distribución del Consumo Eléctrico por Categoría", "Consumo Eléctrico (kWh/km)")
 
 st.write("---")
 st.write("   ")
     
 col115,col116=st.columns(2)
-with col115:
+with col115, tiempos.medir_seccion("Dispersión MTMA vs consumo", Electricos):
         st.header("Analisis carga")
         # Gráfico 1: Dispersión MTMA_Kg vs Consumo Eléctrico
         st.subheader("Relación entre MTMA (Kg) y Consumo Eléctrico (kWh/km)")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        sns.scatterplot(data=Electricos, x="MTMA_Kg", y="Consumo_electrico_kWh/km", ax=ax)
-        ax.set_title("MTMA vs Consumo Eléctrico")
-        ax.set_xlabel("MTMA (Kg)")
-        ax.set_ylabel("Consumo Eléctrico (kWh/km)")
-        st.pyplot(fig)
+        graf.mostrar_figura(grafico_dispersion, Electricos[["MTMA_Kg", "Consumo_electrico_kWh/km"]], "MTMA_Kg", "Consumo_electrico_kWh/km",
+                            "MTMA vs Consumo Eléctrico", "MTMA (Kg)", "Consumo Eléctrico (kWh/km)")
         
         st.write("""
         ### Tendencia general:
@@ -155,15 +219,11 @@ with col115:
         - Los vehículos más pesados, aunque requieren más energía en términos absolutos, tienden a ser más eficientes por kilómetro recorrido en escenarios de larga distancia o velocidades constantes.
         """)
 
-with col116:
+with col116, tiempos.medir_seccion("Dispersión MTMA vs autonomía", Electricos):
         # Gráfico 2: Dispersión MTMA_Kg vs Autonomía
         st.subheader("Relación entre MTMA (Kg) y Autonomía (Km)")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        sns.scatterplot(data=Electricos, x="MTMA_Kg", y="Autonomia_electrica_km", ax=ax, color="orange")
-        ax.set_title("MTMA vs Autonomía")
-        ax.set_xlabel("MTMA (Kg)")
-        ax.set_ylabel("Autonomía Eléctrica (Km)")
-        st.pyplot(fig)
+        graf.mostrar_figura(grafico_dispersion, Electricos[["MTMA_Kg", "Autonomia_electrica_km"]], "MTMA_Kg", "Autonomia_electrica_km",
+                            "MTMA vs Autonomía", "MTMA (Kg)", "Autonomía Eléctrica (Km)", color="orange")
 
     # Agregar texto explicativo
         st.write("""
@@ -177,36 +237,20 @@ with col116:
             """)
 
 col117,col118=st.columns(2)
-with col117:
+with col117, tiempos.medir_seccion("Autonomía y consumo por MTMA", Electricos):
         # Gráfico 3: Comparación entre Autonomía y Consumo por MTMA
         st.subheader("Comparación de Autonomía y Consumo por MTMA")
-        fig, ax1 = plt.subplots(figsize=(8, 6))
-        sns.lineplot(data=Electricos, x="MTMA_Kg", y="Consumo_electrico_kWh/km", label="Consumo Eléctrico", ax=ax1)
-        sns.lineplot(data=Electricos, x="MTMA_Kg", y="Autonomia_electrica_km", label="Autonomía Eléctrica", ax=ax1)
-        ax1.set_title("MTMA vs Autonomía y Consumo")
-        ax1.set_xlabel("MTMA (Kg)")
-        ax1.set_ylabel("Valores")
-        ax1.legend()
-        st.pyplot(fig)
+        graf.mostrar_figura(grafico_autonomia_consumo, Electricos[["MTMA_Kg", "Consumo_electrico_kWh/km", "Autonomia_electrica_km"]])
 
-with col118:
+with col118, tiempos.medir_seccion("Correlación de eléctricos", Electricos):
 
         # Gráfico 4: Matriz de correlación
         st.subheader("Matriz de correlación entre variables numéricas")
-        fig, ax = plt.subplots(figsize=(8, 6))
         correlation_matrix = Electricos[["MTMA_Kg", "Consumo_electrico_kWh/km", "Autonomia_electrica_km"]].corr()
-        sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm", ax=ax)
-        ax.set_title("Matriz de Correlación")
-        st.pyplot(fig)
+        graf.mostrar_figura(grafico_correlacion_electricos, correlation_matrix)
 
     
-from scipy.stats import zscore
 
-  
-Electricos['z_score'] = zscore(Electricos['Consumo_electrico_kWh/km'])
-
-# Filtrar datos sin valores atípicos (por ejemplo, z-score entre -3 y 3)
-Electricos = Electricos[(Electricos['z_score'] >= -3) & (Electricos['z_score'] <= 3)]
     
 st.header("Precio de KWh en algunos vehiculos electricos")
     
@@ -219,7 +263,6 @@ camiones = [
             "autonomia_km": 500,
             "consumo_kWh_por_km": 1.19,
             "tiempo_carga_horas": 0.833333333,
-            "costo_por_kWh_COP": 1051,
         },
         {
             "nombre": "Tesla Semi",
@@ -228,15 +271,12 @@ camiones = [
             "autonomia_km": 800,
             "consumo_kWh_por_km": 1.1,
             "tiempo_carga_horas": 0.714285714,
-            "costo_por_kWh_COP": 1051,
         },
     ]
 
-    # Cálculo del costo por kilómetro
+    # Cálculo del costo por kilómetro con el precio de la electricidad de la barra lateral
 def calcular_costo_por_km(camion):
-        consumo_por_km = camion["consumo_kWh_por_km"]
-        costo_por_kWh = camion["costo_por_kWh_COP"]
-        return consumo_por_km * costo_por_kWh
+        return float(costos.costo_por_km(camion["consumo_kWh_por_km"], "kWh/km", "Electricidad", precios))
 
 # Crear un DataFrame con los datos y resultados
 data = []
@@ -249,56 +289,68 @@ for camion in camiones:
             "Autonomía (km)": camion["autonomia_km"],
             "Consumo (kWh/km)": camion["consumo_kWh_por_km"],
             "Tiempo de carga (hrs)": camion["tiempo_carga_horas"],
-            "Costo por kWh (COP)": camion["costo_por_kWh_COP"],
+            "Costo por kWh (COP)": precios.get("Electricidad"),
             "Costo por km (COP)": round(costo_por_km, 2),
         })
 
 df = pd.DataFrame(data)
 
 st.subheader("Tabla de datos y resultados")
-st.table(df)
+st.dataframe(df, hide_index=True)
+
+# Costo de energía por km de todo el catálogo, por motorización y categoría
+st.subheader("Costo de energía por km del catálogo (COP)")
+costos_catalogo = costos.costos_dataset("electricos", precios)
+st.dataframe(
+    autos_eh[["Motorizacion", "Categoria"]]
+    .assign(Costo_por_km=costos_catalogo["Costo_por_km"].to_numpy())
+    .groupby(["Motorizacion", "Categoria"])["Costo_por_km"].mean()
+    .unstack()
+)
+
+
+# Incertidumbre del costo por km por categoría (Monte Carlo sobre los precios de energía)
+@st.fragment
+def incertidumbre_costos():
+    st.subheader("Incertidumbre del costo de energía por km (Monte Carlo)")
+    energias = [e for e in costos.energias_dataset("electricos") if precios.get(e) is not None]
+    volatilidades, correlacion, n = mc.controles_incertidumbre("mc_electricos", energias)
+    with tiempos.medir_seccion("Monte Carlo de costos por categoría") as medicion:
+        bandas = mc.bandas_dataset("electricos", "Categoria", "Costo_por_km", volatilidades, correlacion, n, precios=precios)
+        medicion["filas"] = n
+    st.plotly_chart(graf.bandas_percentiles(bandas, "Categoria", f"Costo de energía por km por categoría ({n:,} sorteos)"),
+                    use_container_width=True)
+
+
+if any(precios.get(e) is not None for e in costos.energias_dataset("electricos")):
+    incertidumbre_costos()
 
 # Análisis de vehículos híbridos
 st.header("Análisis de vehículos híbridos")
     
 Hibridos = autos_eh[autos_eh['Motorizacion'].str.contains('híbridos', case=False, na=False)]
-Hibridos.rename(columns={'Consumo_electrico_kWh/10km': 'Consumo_combustible_l/100km'}, inplace=True)
+Hibridos = Hibridos.rename(columns={'Consumo_electrico_kWh/10km': 'Consumo_combustible_l/100km'})
 
 col9, col10 = st.columns([2, 1])
 
-with col9:
-        categorias = Hibridos["Categoria"].value_counts().index
-        frecuencias = Hibridos["Categoria"].value_counts().values
-        colores = ["skyblue"] * len(categorias)
-
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.bar(categorias, frecuencias, color=colores)
-        ax.set_title("Distribución por categoría de autos híbridos")
-        ax.set_xlabel("Categoría")
-        ax.set_ylabel("Frecuencia")
-        ax.set_xticks(range(len(categorias)))
-        ax.set_xticklabels(categorias, rotation=90)
-        for i in range(len(categorias)):
-            ax.text(i, frecuencias[i] + 1, str(frecuencias[i]), ha='center', va='bottom', fontsize=8, rotation=90)
-
-        st.pyplot(fig)
+with col9, tiempos.medir_seccion("Categorías de híbridos", Hibridos):
+        graf.mostrar_figura(grafico_frecuencias, Hibridos["Categoria"].value_counts(), "skyblue",
+                            "Distribución por categoría de autos híbridos", "Categoría", 1)
 
 with col10:
         st.subheader("Tabla de Categorías")
-        st.table(Hibridos["Categoria"].value_counts().rename_axis("Categoría").reset_index(name="Frecuencia"))
+        st.dataframe(Hibridos["Categoria"].value_counts().rename_axis("Categoría").reset_index(name="Frecuencia"), hide_index=True)
 
 st.write("---")
 
 # Vehículos híbridos: Consumo
 st.subheader("Vehículos híbridos con mayor y menor consumo en L/100km por categoría")
 
-for i in Hibridos["Categoria"].unique():
-        E = Hibridos[Hibridos["Categoria"] == i]
-        max_consumo = E["Consumo_combustible_l/100km"].max()
-        min_consumo = E["Consumo_combustible_l/100km"].min()
-
-        max_vehiculos = E[E["Consumo_combustible_l/100km"] == max_consumo]["Modelo"].tolist()
-        min_vehiculos = E[E["Consumo_combustible_l/100km"] == min_consumo]["Modelo"].tolist()
+# Extremos de todas las categorías en una sola pasada
+extremos = agg.extremos_por_grupo(Hibridos, "Consumo_combustible_l/100km", "Categoria", "Modelo")
+for i, fila in extremos.iterrows():
+        max_consumo, max_vehiculos = fila["maximo"], fila["modelos_maximo"]
+        min_consumo, min_vehiculos = fila["minimo"], fila["modelos_minimo"]
 
         st.write(f"Categoría: *{i}*")
         st.write(f"- Mayor consumo: {', '.join(max_vehiculos)} ({max_consumo:.2f} L/100km)")
@@ -312,41 +364,30 @@ st.header("Distribución del Consumo de Combustible por Categoría")
 
 col11, col12 = st.columns([1, 1])
 
-with col11:
-        fig = plt.figure(figsize=(4.5, 4.5))
-        sns.boxplot(x="Categoria", y="Consumo_combustible_l/100km", data=Hibridos)
-        plt.title("Distribución del Consumo de Combustible por Categoría")
-        plt.xlabel("Categoría")
-        plt.ylabel("Consumo (L/100km)")
-        st.pyplot(fig)
-
-with col12:
-        fig = plt.figure(figsize=(6, 4))
-        sns.violinplot(x="Categoria", y="Consumo_combustible_l/100km", data=Hibridos, inner="quartile", palette="muted")
-        plt.title("Distribución del Consumo de Combustible por Categoría")
-        plt.xlabel("Categoría")
-        plt.ylabel("Consumo (L/100km)")
-        st.pyplot(fig)
+with col11, tiempos.medir_seccion("Caja de consumo de híbridos", Hibridos):
+        graf.mostrar_figura(grafico_caja, Hibridos[["Categoria", "Consumo_combustible_l/100km"]], "Consumo_combustible_l/100km",
+                            "Distribución del Consumo de Combustible por Categoría", "Consumo (L/100km)")
+
+with col12, tiempos.medir_seccion("Violín de consumo de híbridos", Hibridos):
+        graf.mostrar_figura(grafico_violin, Hibridos[["Categoria", "Consumo_combustible_l/100km"]], "Consumo_combustible_l/100km",
+                            "Distribución del Consumo de Combustible por Categoría", "Consumo (L/100km)")
 
 st.write("---")
 
 # Mostrar tabla
-st.table(df)
-Hibridos['z_score'] = zscore(Hibridos['Consumo_combustible_l/100km'])
+st.dataframe(df, hide_index=True)
 
-# Filtrar datos sin valores atípicos (por ejemplo, z-score entre -3 y 3)
-Hibridos = Hibridos[(Hibridos['z_score'] >= -3) & (Hibridos['z_score'] <= 3)]
+# Filtrar datos sin valores atípicos (misma máscara que los eléctricos)
+Hibridos = Hibridos[sin_atipicos.loc[Hibridos.index].to_numpy()]
 
 # Análisis adicional: autonomía
 st.subheader("Análisis de autonomía por categoría")
 
-for i in Hibridos["Categoria"].unique():
-        E = Hibridos[Hibridos["Categoria"] == i]
-        max_autonomia = E["Autonomia_electrica_km"].max()
-        min_autonomia = E["Autonomia_electrica_km"].min()
-
-        max_vehiculos = E[E["Autonomia_electrica_km"] == max_autonomia]["Modelo"].tolist()
-        min_vehiculos = E[E["Autonomia_electrica_km"] == min_autonomia]["Modelo"].tolist()
+# Extremos de todas las categorías en una sola pasada
+extremos = agg.extremos_por_grupo(Hibridos, "Autonomia_electrica_km", "Categoria", "Modelo")
+for i, fila in extremos.iterrows():
+        max_autonomia, max_vehiculos = fila["maximo"], fila["modelos_maximo"]
+        min_autonomia, min_vehiculos = fila["minimo"], fila["modelos_minimo"]
 
         st.write(f"Categoría: *{i}*")
         st.write(f"- Mayor autonomía: {', '.join(max_vehiculos)} ({max_autonomia:.2f} km)")
@@ -355,20 +396,17 @@ for i in Hibridos["Categoria"].unique():
 st.write("---")
     
 st.header("Analisis consumo combustible, emisiones")
-Hibridos["Consumo promedio"]=(Hibridos['Consumo Máximo']+Hibridos['Consumo Mínimo'])/2
-Hibridos["Emisiones promedio"]=(Hibridos['Emisiones Mínimo']+Hibridos['Emisiones Máximo'])/2
+Hibridos = Hibridos.assign(**{
+    "Consumo promedio": (Hibridos['Consumo Máximo'] + Hibridos['Consumo Mínimo']) / 2,
+    "Emisiones promedio": (Hibridos['Emisiones Mínimo'] + Hibridos['Emisiones Máximo']) / 2,
+})
+memoria.anotar_objetos(Hibridos=Hibridos)
 
 col111, col112 = st.columns([1, 1])
     
-with col111:
+with col111, tiempos.medir_seccion("Emisiones vs consumo de híbridos", Hibridos):
         # Gráfico de dispersión entre Emisiones y Consumo
-        fig,ax=plt.subplots()
-        plt.scatter(Hibridos['Consumo promedio'], Hibridos['Emisiones promedio'], alpha=0.6)
-        plt.title('Relación entre Emisiones y Consumo en Vehículos Híbridos')
-        plt.xlabel('Consumo Promedio (L/100 km )')
-        plt.ylabel('Emisiones Promedio (g CO2/km)')
-        plt.grid(True)
-        st.pyplot(fig)
+        graf.mostrar_figura(grafico_emisiones_consumo, Hibridos[['Consumo promedio', 'Emisiones promedio']])
 with col112:
         st.header("Análisis")
         st.text("Hay una correlación positiva entre el consumo promedio de combustible (L/100 km) y las emisiones promedio (g CO₂/km). Esto significa que a medida que aumenta el consumo promedio de combustible, las emisiones de CO₂ también aumentan.")
@@ -387,32 +425,17 @@ if missing_vars:
 else:
         
 # Pairplot en la primera columna
-        with col113:
+        with col113, tiempos.medir_seccion("Pares de variables clave de híbridos", Hibridos):
             st.subheader("Pairplot de Variables Clave")
-            pairplot_fig = sns.pairplot(
-                Hibridos[key_variables].dropna(),
-                diag_kind='kde',
-                plot_kws={'alpha': 0.7}
-            )
-            pairplot_fig.fig.suptitle('Pairplot de Variables Clave', y=1.02)  # Ajustar el título
-            st.pyplot(pairplot_fig)
+            # Densidades por FFT e histogramas 2D: el tiempo no crece con el número de filas
+            graf.mostrar_figura(graf.grafico_pares_densidad, Hibridos[key_variables].dropna(), key_variables,
+                                titulo='Pairplot de Variables Clave')
 
         # Matriz de correlación en la segunda columna
-        with col114:
+        with col114, tiempos.medir_seccion("Correlación de híbridos", Hibridos):
             st.subheader("Matriz de Correlación")
             correlation_matrix = Hibridos[key_variables].corr()
-
-            fig, ax = plt.subplots(figsize=(8, 6))  # Tamaño ajustado para mejor visibilidad
-            sns.heatmap(
-                correlation_matrix,
-                annot=True,
-                cmap='coolwarm',
-                fmt='.2f',
-                linewidths=0.5,
-                cbar_kws={'label': 'Correlación'}
-            )
-            ax.set_title('Matriz de Correlación (Consumo, Emisiones, Autonomía)', fontsize=14)
-            st.pyplot(fig)
+            graf.mostrar_figura(grafico_correlacion_hibridos, correlation_matrix)
         
         st.text("""Consumo promedio: Su distribución está concentrada cerca de valores bajos (cercanos a 0), indicando que la mayoría de los vehículos tienen un consumo promedio eficiente.
                 Autonomía eléctrica (km): La distribución está altamente concentrada en un rango bajo, con unos pocos valores que alcanzan los 400 km, sugiriendo que la mayoría de los vehículos tienen una autonomía limitada.
@@ -0,0 +1,140 @@
+import time
+
+import streamlit as st
+import utilidades as util
+import compartidos
+import memoria
+import tiempos
+import graficos as graf
+
+# Librerías pesadas: se importan solo cuando se dibuja o calcula algo con ellas
+pd = util.importar_diferido("pandas")
+px = util.importar_diferido("plotly.express")
+
+# Título e icono de la página
+st.set_page_config(page_title="Memoria (operador)", page_icon="🧠", layout="wide")
+util.generarMenu()
+
+st.header("Memoria del proceso")
+
+
+# Vista de operador: contabilidad de memoria por página y por sesión. Solo se muestra con
+# el modo de depuración (?depurar=1).
+def vista_memoria():
+    if not st.session_state.get("depurar_tiempos"):
+        st.info("Vista de operador: abrir la aplicación con ?depurar=1 para verla.")
+        return
+
+    contabilidad = memoria.contabilidad_memoria()
+    rss, pico, trazada = tiempos.memoria_residente(), memoria.memoria_residente_pico(), memoria.memoria_trazada()
+    figuras, lienzos = memoria.figuras_abiertas()
+    almacen = graf._almacen()
+
+    # Estado actual del proceso
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Memoria residente", f"{rss / 2**20:,.0f} MB" if rss is not None else "—")
+    col2.metric("Pico de memoria residente", f"{pico / 2**20:,.0f} MB" if pico is not None else "—")
+    col3.metric("Memoria trazada", f"{trazada / 2**20:,.0f} MB" if trazada is not None else "Perfil inactivo")
+    col4.metric("Datos compartidos", f"{compartidos.bytes_compartidos() / 2**20:,.1f} MB")
+    col5.metric("Figuras abiertas", f"{figuras}", f"{lienzos / 2**20:,.1f} MB en lienzos", delta_color="off")
+    st.caption(f"Caché de figuras renderizadas: {len(almacen['figuras'])} figuras, {almacen['bytes'] / 2**20:,.1f} MB. "
+               f"Muestreo cada {memoria.INTERVALO_MUESTREO_MEMORIA:g} s.")
+
+    # Memoria residente en el tiempo
+    muestras = pd.DataFrame(contabilidad["muestras"])
+    if not muestras.empty:
+        columnas = [c for c in ("rss_mb", "trazada_mb", "compartidos_mb") if muestras[c].notna().any()]
+        fig = px.line(muestras, x="hora", y=columnas, title="Memoria del proceso (MB)",
+                      labels={"value": "MB", "variable": "Medida", "hora": "Hora"})
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Por página
+    st.subheader("Por página")
+    paginas = pd.DataFrame([
+        {
+            "Página": pagina,
+            "Ejecuciones": datos["ejecuciones"],
+            "Pico RSS en ejecución (MB)": datos["rss_pico"] / 2**20,
+            "Ejecuciones concurrentes (máx.)": datos["concurrentes_pico"],
+            "Variación RSS media (MB)": datos["rss_delta_suma"] / datos["ejecuciones"] / 2**20,
+            "Variación trazada media (MB)": datos["trazada_delta_suma"] / datos["ejecuciones"] / 2**20,
+        }
+        for pagina, datos in contabilidad["paginas"].items() if datos["ejecuciones"]
+    ])
+    if paginas.empty:
+        st.write("Aún no hay ejecuciones terminadas.")
+    else:
+        st.dataframe(paginas.sort_values("Pico RSS en ejecución (MB)", ascending=False), hide_index=True,
+                     use_container_width=True)
+    if contabilidad["en_curso"]:
+        st.write("**En ejecución:** " + ", ".join(
+            f"{e['pagina']} ({e['sesion'][:8]}, {time.time() - e['inicio']:.0f} s)" for e in contabilidad["en_curso"]
+        ))
+
+    # Por sesión y objetos anotados por las páginas
+    col6, col7 = st.columns(2)
+    with col6:
+        st.subheader("Por sesión")
+        sesiones = pd.DataFrame([
+            {
+                "Sesión": sesion[:8],
+                "Página": datos["pagina"],
+                "Ejecuciones": datos["ejecuciones"],
+                "Estado de la sesión (MB)": datos["estado_bytes"] / 2**20,
+                "Objetos anotados (MB)": sum(
+                    b for (s, _), objetos in contabilidad["objetos"].items() if s == sesion for _, b in objetos.values()
+                ) / 2**20,
+                "Última ejecución": time.strftime("%H:%M:%S", time.localtime(datos["ultima"])),
+            }
+            for sesion, datos in contabilidad["sesiones"].items()
+        ])
+        st.dataframe(sesiones, hide_index=True, use_container_width=True)
+    with col7:
+        st.subheader("Objetos de las páginas")
+        objetos = pd.DataFrame([
+            {"Sesión": sesion[:8], "Página": pagina, "Objeto": nombre, "Filas": filas, "MB propios": b / 2**20}
+            for (sesion, pagina), anotados in contabilidad["objetos"].items() for nombre, (filas, b) in anotados.items()
+        ])
+        st.dataframe(objetos, hide_index=True, use_container_width=True)
+        st.caption("Solo cuentan los arreglos propios de cada objeto: las vistas de los datos compartidos no suman.")
+
+    # DataFrame del registro compartido (una sola copia por proceso)
+    with st.expander("Datos compartidos"):
+        st.dataframe(compartidos.datos_compartidos(), hide_index=True, use_container_width=True)
+
+    # Métricas exportadas (también en ARCHIVO_METRICAS_MEMORIA si está definido)
+    st.download_button("Descargar métricas (Prometheus)", memoria.metricas_prometheus(), "memoria.prom", "text/plain")
+
+    # Asignaciones vivas atribuidas a la línea de la página o del módulo que las hizo
+    st.subheader("Asignaciones vivas por origen (tracemalloc)")
+    col8, col9 = st.columns([1, 4])
+    if memoria.memoria_trazada() is None:
+        col9.write("El perfil está inactivo: al activarlo se trazan las asignaciones nuevas (hace más lentas las páginas).")
+        if col8.button("Activar perfil"):
+            memoria.activar_perfil_memoria()
+            st.rerun()
+        return
+    if col8.button("Desactivar perfil"):
+        memoria.desactivar_perfil_memoria()
+        st.rerun()
+    if not col9.button("Tomar instantánea"):
+        return
+    with tiempos.medir_seccion("Instantánea de memoria") as medicion:
+        origenes = pd.DataFrame(memoria.memoria_por_origen())
+        medicion["filas"] = len(origenes)
+    if origenes.empty:
+        st.write("No hay asignaciones trazadas.")
+        return
+    origenes["MB"] = origenes["bytes"] / 2**20
+    por_archivo = origenes.groupby("archivo", as_index=False)[["MB", "bloques"]].sum().sort_values("MB", ascending=False)
+    col10, col11 = st.columns([1, 2])
+    col10.dataframe(por_archivo.rename(columns={"archivo": "Archivo", "bloques": "Bloques"}), hide_index=True,
+                    use_container_width=True)
+    col11.dataframe(
+        origenes.head(50)[["archivo", "linea", "MB", "bloques"]].rename(
+            columns={"archivo": "Archivo", "linea": "Línea", "bloques": "Bloques"}),
+        hide_index=True, use_container_width=True,
+    )
+
+
+vista_memoria()
@@ -1,15 +1,81 @@
 import streamlit as st
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
 import utilidades as util
+import conjuntos
+import tiempos
+import graficos as graf
+import agregados as agg
+import costos
+import montecarlo as mc
+
+# Librerías pesadas: se importan solo cuando se dibuja o calcula algo con ellas
+sns = util.importar_diferido("seaborn")
+pd = util.importar_diferido("pandas")
 
 # Título e icono de la página
 st.set_page_config(page_title="Trayecto nacional", page_icon="🗺️", layout="wide")
 util.generarMenu()
 
-df = pd.read_csv("BDVehiculosLHOK.csv")
+df = conjuntos.cargar_datos("nacional")
+
+# Cubo de agregados (suma y conteo de todas las métricas LHL_/LHR_ por categoría, marca y
+# combustible). Se calcula una vez por versión del archivo y todos los gráficos salen de él.
+cubo = agg.cubo_nacional()
+
+# Funciones de dibujo: cada gráfico se renderiza una vez y se reutiliza desde el caché de figuras
+
+# Gráfico de barras por tipo de vehículo y marca
+def grafico_ranking(datos, y, ylabel, titulo):
+    fig, ax = graf.subgraficos(figsize=(12, 8))
+    sns.barplot(x='MS_VehicleCategoryCode', y=y, hue='OEM_Make', data=datos, ax=ax)
+    ax.set_xlabel('Tipo de Vehículo')
+    ax.set_ylabel(ylabel)
+    ax.set_title(titulo)
+    ax.legend(title='Marca')
+
+    #Ajustar Labels
+    fig.tight_layout()
+    return fig
+
+# Gráfico combinado: barras de consumo y línea de emisiones por marca
+def grafico_eficiencia(datos, consumo, emisiones, etiqueta_consumo, etiqueta_emisiones, color_barras, color_linea, titulo):
+    fig, ax1 = graf.subgraficos(figsize=(14, 8))
+
+    # Barras para consumo promedio de combustible
+    sns.barplot(data=datos, x='OEM_Make', y=consumo, color=color_barras, alpha=0.7, label=etiqueta_consumo, ax=ax1)
+    ax1.set_ylabel(etiqueta_consumo, color=color_barras)
+    ax1.set_xlabel('Marca')
+    ax1.tick_params(axis='y', labelcolor=color_barras)
+    ax1.set_xticklabels(datos['OEM_Make'], rotation=45, ha='right')
+
+    # Eje secundario para emisiones promedio
+    ax2 = ax1.twinx()
+    sns.lineplot(data=datos, x='OEM_Make', y=emisiones, color=color_linea, label=etiqueta_emisiones, marker='o', ax=ax2)
+    ax2.set_ylabel(etiqueta_emisiones, color=color_linea)
+    ax2.tick_params(axis='y', labelcolor=color_linea)
+
+    # Añadir leyendas y título
+    fig.suptitle(titulo, fontsize=16)
+    ax1.legend(loc='upper left', bbox_to_anchor=(0, 1))
+    ax2.legend(loc='upper right', bbox_to_anchor=(1, 1))
+
+    #Ajustar Labels
+    fig.tight_layout()
+    return fig
+
+# Gráfico de costo promedio por kilómetro por tipo de vehículo y marca
+def grafico_costo(datos, y, titulo):
+    fig, ax = graf.subgraficos(figsize=(8, 6))
+    sns.barplot(data=datos, x='Tipo_de_Vehículo', y=y, hue='Marca', ax=ax)
+
+    # Títulos y etiquetas
+    ax.set_title(titulo)
+    ax.set_xlabel('Tipo de Vehículo')
+    ax.set_ylabel('Costo Promedio por Km (COP)')
+    ax.set_xticklabels(datos['Tipo_de_Vehículo'].unique(), rotation=45, ha='right')
+
+    #Ajustar Labels
+    fig.tight_layout()
+    return fig
 
 st.title('Análisis de Datos de Vehículos con recorridos de Larga Distancia')
 st.header("Recorridos de larga distancia")
@@ -58,7 +124,7 @@ st.header("Análisis gráfico vehículos con recorridos de larga distancia")
 st.write("**Gráfico que muestra las emisiones de CO2 por tipo de vehículo y por marca**")
 
 # Agrupar por tipo de vehículo y marca y calcular las emisiones promedio de CO2 LHL y LHR
-Emisiones_marca_tVeh = df.groupby(['MS_VehicleCategoryCode', 'OEM_Make'])[['LHL_CO2_gkm', 'LHR_CO2_gkm']].mean().reset_index()
+Emisiones_marca_tVeh = agg.promedios(cubo, ['MS_VehicleCategoryCode', 'OEM_Make'], ['LHL_CO2_gkm', 'LHR_CO2_gkm'])
 # Ordenar el DataFrame por tipo de vehículo y por las menores emisiones LHL y LHR
 Emisiones_marca_tVeh = Emisiones_marca_tVeh.sort_values(by=['MS_VehicleCategoryCode', 'LHL_CO2_gkm', 'LHR_CO2_gkm'])
 
@@ -66,37 +132,19 @@ Emisiones_marca_tVeh = Emisiones_marca_tVeh.sort_values(by=['MS_VehicleCategoryC
 col1, col2, col3 = st.columns(3)
 
 # Primer gráfico: Emisiones de CO2 LHL
-with col1:
+with col1, tiempos.medir_seccion("Ranking de emisiones LHL"):
     # Crear el gráfico de barras para LHL
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.barplot(x='MS_VehicleCategoryCode', y='LHL_CO2_gkm', hue='OEM_Make', data=Emisiones_marca_tVeh, ax=ax)
-    ax.set_xlabel('Tipo de Vehículo')
-    ax.set_ylabel('Emisiones de CO2 (g/km)')
-    ax.set_title('Ranking de Emisiones de CO2 LHL por Marca para cada Tipo de Vehículo')
-    ax.legend(title='Marca')
-
-    #Ajustar Labels
-    plt.tight_layout()
-
-    st.pyplot(fig)
+    graf.mostrar_figura(grafico_ranking, Emisiones_marca_tVeh, 'LHL_CO2_gkm', 'Emisiones de CO2 (g/km)',
+                        'Ranking de Emisiones de CO2 LHL por Marca para cada Tipo de Vehículo')
     
     # Texto debajo del gráfico LHL
     st.markdown("**Gráfico LHL (Long Haul)**: Emisiones de CO2 por tipo de vehículo y marca para LHL.")
 
 # Segundo gráfico: Emisiones de CO2 LHR
-with col2:
+with col2, tiempos.medir_seccion("Ranking de emisiones LHR"):
     # Crear el gráfico de barras para LHR
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.barplot(x='MS_VehicleCategoryCode', y='LHR_CO2_gkm', hue='OEM_Make', data=Emisiones_marca_tVeh, ax=ax)
-    ax.set_xlabel('Tipo de Vehículo')
-    ax.set_ylabel('Emisiones de CO2 (g/km)')
-    ax.set_title('Ranking de Emisiones de CO2 LHR por Marca para cada Tipo de Vehículo')
-    ax.legend(title='Marca')
-
-    #Ajustar Labels
-    plt.tight_layout()
-
-    st.pyplot(fig)
+    graf.mostrar_figura(grafico_ranking, Emisiones_marca_tVeh, 'LHR_CO2_gkm', 'Emisiones de CO2 (g/km)',
+                        'Ranking de Emisiones de CO2 LHR por Marca para cada Tipo de Vehículo')
     
     # Texto debajo del gráfico LHR
     st.markdown("**Gráfico LHR (Long Haul Return)**: Emisiones de CO2 por tipo de vehículo y marca para LHR.")
@@ -115,7 +163,7 @@ with col3:
 st.write("**Gráfico que muestra el consumo de combustible (lts/100km) por tipo de vehículo y por marca**")
 
 # Agrupar por tipo de vehículo y marca y calcular el consumo promedio de combustible LHL y LHR
-Consumo_marca_tVeh = df.groupby(['MS_VehicleCategoryCode', 'OEM_Make'])[['LHL_FuelConsumption_l100km', 'LHR_FuelConsumption_l100km']].mean().reset_index()
+Consumo_marca_tVeh = agg.promedios(cubo, ['MS_VehicleCategoryCode', 'OEM_Make'], ['LHL_FuelConsumption_l100km', 'LHR_FuelConsumption_l100km'])
 
 # Ordenar el DataFrame por tipo de vehículo y por el menor consumo LHL y LHR
 Consumo_marca_tVeh = Consumo_marca_tVeh.sort_values(by=['MS_VehicleCategoryCode', 'LHL_FuelConsumption_l100km', 'LHR_FuelConsumption_l100km'])
@@ -124,38 +172,19 @@ Consumo_marca_tVeh = Consumo_marca_tVeh.sort_values(by=['MS_VehicleCategoryCode'
 col1, col2, col3 = st.columns(3)
 
 # Primer gráfico: Consumo de combustible LHL
-with col1:
+with col1, tiempos.medir_seccion("Ranking de consumo LHL"):
     # Crear el gráfico de barras para LHL
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.barplot(x='MS_VehicleCategoryCode', y='LHL_FuelConsumption_l100km', hue='OEM_Make', data=Consumo_marca_tVeh, ax=ax)
-    ax.set_xlabel('Tipo de Vehículo')
-    ax.set_ylabel('Consumo de Combustible (L/100 km)')
-    ax.set_title('Ranking de Consumo de Combustible LHL por Marca para cada Tipo de Vehículo')
-    ax.legend(title='Marca')
-
-    #Ajustar Labels
-    plt.tight_layout()
-
-    st.pyplot(fig)
+    graf.mostrar_figura(grafico_ranking, Consumo_marca_tVeh, 'LHL_FuelConsumption_l100km', 'Consumo de Combustible (L/100 km)',
+                        'Ranking de Consumo de Combustible LHL por Marca para cada Tipo de Vehículo')
     
     # Texto debajo del gráfico LHL
     st.markdown("**Gráfico LHL (Long Haul)**: Consumo de combustible por tipo de vehículo y marca para LHL.")
 
 # Segundo gráfico: Consumo de combustible LHR
-with col2:
+with col2, tiempos.medir_seccion("Ranking de consumo LHR"):
     # Crear el gráfico de barras para LHR
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.barplot(x='MS_VehicleCategoryCode', y='LHR_FuelConsumption_l100km', hue='OEM_Make', data=Consumo_marca_tVeh, ax=ax)
-    ax.set_xlabel('Tipo de Vehículo')
-    ax.set_ylabel('Consumo de Combustible (L/100 km)')
-    ax.set_title('Ranking de Consumo de Combustible LHR por Marca para cada Tipo de Vehículo')
-    ax.legend(title='Marca')
-
-    #Ajustar Labels
-    plt.tight_layout()
-
-    
-    st.pyplot(fig)
+    graf.mostrar_figura(grafico_ranking, Consumo_marca_tVeh, 'LHR_FuelConsumption_l100km', 'Consumo de Combustible (L/100 km)',
+                        'Ranking de Consumo de Combustible LHR por Marca para cada Tipo de Vehículo')
     
     # Texto debajo del gráfico LHR
     st.markdown("**Gráfico LHR (Long Haul Return)**: Consumo de combustible por tipo de vehículo y marca para LHR.")
@@ -189,16 +218,16 @@ st.write("""
 """)
 
 # Calcular métricas promedio por marca para LHL
-eficiencia_marcas_lhl = df.groupby('OEM_Make').agg(
-    Consumo_FuelPromedio_LHL=('LHL_FuelConsumption_l100km', 'mean'),
-    Emisiones_Promedio_LHL=('LHL_CO2_gkm', 'mean')
-).reset_index()
+eficiencia_marcas_lhl = agg.promedios(cubo, ['OEM_Make'], ['LHL_FuelConsumption_l100km', 'LHL_CO2_gkm']).rename(columns={
+    'LHL_FuelConsumption_l100km': 'Consumo_FuelPromedio_LHL',
+    'LHL_CO2_gkm': 'Emisiones_Promedio_LHL'
+})
 
 # Calcular métricas promedio por marca para LHR
-eficiencia_marcas_lhr = df.groupby('OEM_Make').agg(
-    Consumo_FuelPromedio_LHR=('LHR_FuelConsumption_l100km', 'mean'),
-    Emisiones_Promedio_LHR=('LHR_CO2_gkm', 'mean')
-).reset_index()
+eficiencia_marcas_lhr = agg.promedios(cubo, ['OEM_Make'], ['LHR_FuelConsumption_l100km', 'LHR_CO2_gkm']).rename(columns={
+    'LHR_FuelConsumption_l100km': 'Consumo_FuelPromedio_LHR',
+    'LHR_CO2_gkm': 'Emisiones_Promedio_LHR'
+})
 
 # Ordenar las marcas por menor consumo de combustible para LHL
 eficiencia_marcas_lhl = eficiencia_marcas_lhl.sort_values('Consumo_FuelPromedio_LHL')
@@ -210,58 +239,16 @@ eficiencia_marcas_lhr = eficiencia_marcas_lhr.sort_values('Consumo_FuelPromedio_
 col1, col2 = st.columns(2)
 
 # Primer gráfico: Consumo y emisiones para LHL
-with col1:
-    fig, ax1 = plt.subplots(figsize=(14, 8))
-
-    # Barras para consumo promedio de combustible LHL
-    sns.barplot(data=eficiencia_marcas_lhl, x='OEM_Make', y='Consumo_FuelPromedio_LHL', color='blue', alpha=0.7, label='Consumo Promedio LHL (l/100km)', ax=ax1)
-    ax1.set_ylabel('Consumo Promedio LHL (l/100km)', color='blue')
-    ax1.set_xlabel('Marca')
-    ax1.tick_params(axis='y', labelcolor='blue')
-    ax1.set_xticklabels(eficiencia_marcas_lhl['OEM_Make'], rotation=45, ha='right')
-
-    # Eje secundario para emisiones promedio LHL
-    ax2 = ax1.twinx()
-    sns.lineplot(data=eficiencia_marcas_lhl, x='OEM_Make', y='Emisiones_Promedio_LHL', color='red', label='Emisiones Promedio LHL (CO₂ g/km)', marker='o', ax=ax2)
-    ax2.set_ylabel('Emisiones Promedio LHL (CO₂ g/km)', color='red')
-    ax2.tick_params(axis='y', labelcolor='red')
-
-    # Añadir leyendas y título
-    fig.suptitle('Marcas Más Eficientes en Consumo de Combustible LHL vs. Emisiones de CO₂ LHL', fontsize=16)
-    ax1.legend(loc='upper left', bbox_to_anchor=(0, 1))
-    ax2.legend(loc='upper right', bbox_to_anchor=(1, 1))
-
-    #Ajustar Labels
-    plt.tight_layout()
-
-    st.pyplot(fig)
+with col1, tiempos.medir_seccion("Eficiencia por marca LHL"):
+    graf.mostrar_figura(grafico_eficiencia, eficiencia_marcas_lhl, 'Consumo_FuelPromedio_LHL', 'Emisiones_Promedio_LHL',
+                        'Consumo Promedio LHL (l/100km)', 'Emisiones Promedio LHL (CO₂ g/km)', 'blue', 'red',
+                        'Marcas Más Eficientes en Consumo de Combustible LHL vs. Emisiones de CO₂ LHL')
 
 # Segundo gráfico: Consumo y emisiones para LHR
-with col2:
-    fig, ax1 = plt.subplots(figsize=(14, 8))
-
-    # Barras para consumo promedio de combustible LHR
-    sns.barplot(data=eficiencia_marcas_lhr, x='OEM_Make', y='Consumo_FuelPromedio_LHR', color='green', alpha=0.7, label='Consumo Promedio LHR (l/100km)', ax=ax1)
-    ax1.set_ylabel('Consumo Promedio LHR (l/100km)', color='green')
-    ax1.set_xlabel('Marca')
-    ax1.tick_params(axis='y', labelcolor='green')
-    ax1.set_xticklabels(eficiencia_marcas_lhr['OEM_Make'], rotation=45, ha='right')
-
-    # Eje secundario para emisiones promedio LHR
-    ax2 = ax1.twinx()
-    sns.lineplot(data=eficiencia_marcas_lhr, x='OEM_Make', y='Emisiones_Promedio_LHR', color='orange', label='Emisiones Promedio LHR (CO₂ g/km)', marker='o', ax=ax2)
-    ax2.set_ylabel('Emisiones Promedio LHR (CO₂ g/km)', color='orange')
-    ax2.tick_params(axis='y', labelcolor='orange')
-
-    # Añadir leyendas y título
-    fig.suptitle('Marcas Más Eficientes en Consumo de Combustible LHR vs. Emisiones de CO₂ LHR', fontsize=16)
-    ax1.legend(loc='upper left', bbox_to_anchor=(0, 1))
-    ax2.legend(loc='upper right', bbox_to_anchor=(1, 1))
-
-    #Ajustar Labels
-    plt.tight_layout()
-
-    st.pyplot(fig)
+with col2, tiempos.medir_seccion("Eficiencia por marca LHR"):
+    graf.mostrar_figura(grafico_eficiencia, eficiencia_marcas_lhr, 'Consumo_FuelPromedio_LHR', 'Emisiones_Promedio_LHR',
+                        'Consumo Promedio LHR (l/100km)', 'Emisiones Promedio LHR (CO₂ g/km)', 'green', 'orange',
+                        'Marcas Más Eficientes en Consumo de Combustible LHR vs. Emisiones de CO₂ LHR')
 
 # Tercera columna: Conclusión
 st.write("""
@@ -275,25 +262,27 @@ st.write("""
 # Título del análisis en Streamlit
 st.header("Análisis de costo por kilometro recorrido para cada tipo de vehiculo y marca")
 
-# Definir el costo del diésel por galón en COP
-costo_diesel_por_galon = 10561  # COP
+# Precio del diésel ajustable desde la barra lateral (motor de costos compartido)
+precios = costos.selector_precios(["nacional"])
 
-# Filtrar los vehículos diésel
-df_diesel = df[df['MS_FuelType'] == 'Diesel'].copy()
+# Consumo promedio de los vehículos diésel por marca y tipo de vehículo (desde el cubo).
+# El costo por km es lineal en el consumo, así que el promedio del costo es el costo del consumo promedio.
+costo_por_km_por_marca_y_tipo = agg.promedios(
+    cubo, ['OEM_Make', 'MS_VehicleCategoryCode'],
+    ['LHL_FuelConsumption_l100km', 'LHR_FuelConsumption_l100km'],
+    filtro={'MS_FuelType': 'Diesel'}
+)
 
-# Convertir el consumo de l/100 km a galones/100 km para LHL
-df_diesel['Consumo_por_galon_LHL'] = df_diesel['LHL_FuelConsumption_l100km'] / 3.78541
-df_diesel['Costo_por_km_LHL'] = (df_diesel['Consumo_por_galon_LHL'] / 100) * costo_diesel_por_galon
+# Convertir el consumo de l/100 km a costo por km para LHL y LHR
+costo_por_km_por_marca_y_tipo['Costo_por_km_LHL'] = costos.costo_por_km(costo_por_km_por_marca_y_tipo['LHL_FuelConsumption_l100km'], 'l/100km', 'Diesel', precios)
+costo_por_km_por_marca_y_tipo['Costo_por_km_LHR'] = costos.costo_por_km(costo_por_km_por_marca_y_tipo['LHR_FuelConsumption_l100km'], 'l/100km', 'Diesel', precios)
+costo_por_km_por_marca_y_tipo = costo_por_km_por_marca_y_tipo[['OEM_Make', 'MS_VehicleCategoryCode', 'Costo_por_km_LHL', 'Costo_por_km_LHR']]
 
-# Convertir el consumo de l/100 km a galones/100 km para LHR
-df_diesel['Consumo_por_galon_LHR'] = df_diesel['LHR_FuelConsumption_l100km'] / 3.78541
-df_diesel['Costo_por_km_LHR'] = (df_diesel['Consumo_por_galon_LHR'] / 100) * costo_diesel_por_galon
-
-# Agrupar por marca y tipo de vehículo y calcular el costo promedio por kilómetro para LHL y LHR
-costo_por_km_por_marca_y_tipo = df_diesel.groupby(['OEM_Make', 'MS_VehicleCategoryCode'])[['Costo_por_km_LHL', 'Costo_por_km_LHR']].mean().reset_index()
+# Tabla para los gráficos con columnas en español
+costo_grafico = costo_por_km_por_marca_y_tipo.copy()
 
 # Renombrar columnas en español
-costo_por_km_por_marca_y_tipo.columns = ['Marca', 'Tipo_de_Vehículo', 'Costo_promedio_por_km_LHL (COP)', 'Costo_promedio_por_km_LHR (COP)']
+costo_grafico.columns = ['Marca', 'Tipo_de_Vehículo', 'Costo_promedio_por_km_LHL (COP)', 'Costo_promedio_por_km_LHR (COP)']
 
 # Graficar los resultados usando Streamlit y seaborn
 
@@ -301,67 +290,22 @@ costo_por_km_por_marca_y_tipo.columns = ['Marca', 'Tipo_de_Vehículo', 'Costo_pr
 col1, col2 = st.columns(2)
 
 # Gráfico para LHL
-with col1:
-    fig, ax1 = plt.subplots(figsize=(8, 6))
-    
-    # Graficar LHL por tipo de vehículo y marca
-    sns.barplot(data=costo_por_km_por_marca_y_tipo, x='Tipo_de_Vehículo', y='Costo_promedio_por_km_LHL (COP)', hue='Marca', ax=ax1)
-    
-    # Títulos y etiquetas
-    ax1.set_title('Costo Promedio por Kilómetro LHL (COP) por Tipo de Vehículo')
-    ax1.set_xlabel('Tipo de Vehículo')
-    ax1.set_ylabel('Costo Promedio por Km (COP)')
-    ax1.set_xticklabels(costo_por_km_por_marca_y_tipo['Tipo_de_Vehículo'].unique(), rotation=45, ha='right')
-
-    #Ajustar Labels
-    plt.tight_layout()
-
-    # Mostrar el gráfico en Streamlit
-    st.pyplot(fig)
+with col1, tiempos.medir_seccion("Costo por km LHL"):
+    graf.mostrar_figura(grafico_costo, costo_grafico, 'Costo_promedio_por_km_LHL (COP)',
+                        'Costo Promedio por Kilómetro LHL (COP) por Tipo de Vehículo')
 
 # Gráfico para LHR
-with col2:
-    fig, ax2 = plt.subplots(figsize=(8, 6))
-    
-    # Graficar LHR por tipo de vehículo y marca
-    sns.barplot(data=costo_por_km_por_marca_y_tipo, x='Tipo_de_Vehículo', y='Costo_promedio_por_km_LHR (COP)', hue='Marca', ax=ax2)
-    
-    # Títulos y etiquetas
-    ax2.set_title('Costo Promedio por Kilómetro LHR (COP) por Tipo de Vehículo')
-    ax2.set_xlabel('Tipo de Vehículo')
-    ax2.set_ylabel('Costo Promedio por Km (COP)')
-    ax2.set_xticklabels(costo_por_km_por_marca_y_tipo['Tipo_de_Vehículo'].unique(), rotation=45, ha='right')
-    
-    #Ajustar Labels
-    plt.tight_layout()
-
-    # Mostrar el gráfico en Streamlit
-    st.pyplot(fig)
-
-    # Definir el costo del diésel por galón en COP 
-costo_diesel_por_galon = 10561  # COP
-
-# Filtrar los vehículos diésel
-df_diesel = df[df['MS_FuelType'] == 'Diesel'].copy()
-
-# Convertir el consumo de l/100 km a galones/100 km para LHL
-df_diesel['Consumo_por_galon_LHL'] = df_diesel['LHL_FuelConsumption_l100km'] / 3.78541
-df_diesel['Costo_por_km_LHL'] = (df_diesel['Consumo_por_galon_LHL'] / 100) * costo_diesel_por_galon
-
-# Convertir el consumo de l/100 km a galones/100 km para LHR
-df_diesel['Consumo_por_galon_LHR'] = df_diesel['LHR_FuelConsumption_l100km'] / 3.78541
-df_diesel['Costo_por_km_LHR'] = (df_diesel['Consumo_por_galon_LHR'] / 100) * costo_diesel_por_galon
-
-# Agrupar por marca y tipo de vehículo y calcular el costo promedio por kilómetro
-costo_por_km_por_marca_y_tipo = df_diesel.groupby(['OEM_Make', 'MS_VehicleCategoryCode'])[['Costo_por_km_LHL', 'Costo_por_km_LHR']].mean().reset_index()
-
-# Ordenar de menor a mayor por costo por kilómetro para LHL y LHR
-costo_por_km_por_marca_y_tipo_sorted_LHL = costo_por_km_por_marca_y_tipo.sort_values(by=['MS_VehicleCategoryCode', 'Costo_por_km_LHL'])
-costo_por_km_por_marca_y_tipo_sorted_LHR = costo_por_km_por_marca_y_tipo.sort_values(by=['MS_VehicleCategoryCode', 'Costo_por_km_LHR'])
-
-# Seleccionar la mejor marca (menor costo por km) por tipo de vehículo
-mejores_marcas_LHL = costo_por_km_por_marca_y_tipo_sorted_LHL.groupby('MS_VehicleCategoryCode').first().reset_index()
-mejores_marcas_LHR = costo_por_km_por_marca_y_tipo_sorted_LHR.groupby('MS_VehicleCategoryCode').first().reset_index()
+with col2, tiempos.medir_seccion("Costo por km LHR"):
+    graf.mostrar_figura(grafico_costo, costo_grafico, 'Costo_promedio_por_km_LHR (COP)',
+                        'Costo Promedio por Kilómetro LHR (COP) por Tipo de Vehículo')
+
+# Seleccionar la mejor marca (menor costo por km) por tipo de vehículo, a partir de la misma tabla de costos
+mejores_marcas_LHL = costo_por_km_por_marca_y_tipo.loc[
+    costo_por_km_por_marca_y_tipo.groupby('MS_VehicleCategoryCode')['Costo_por_km_LHL'].idxmin().dropna()
+]
+mejores_marcas_LHR = costo_por_km_por_marca_y_tipo.loc[
+    costo_por_km_por_marca_y_tipo.groupby('MS_VehicleCategoryCode')['Costo_por_km_LHR'].idxmin().dropna()
+]
 
 # Unir los resultados de LHL y LHR
 mejores_marcas = pd.merge(mejores_marcas_LHL[['MS_VehicleCategoryCode', 'OEM_Make', 'Costo_por_km_LHL']], 
@@ -375,6 +319,30 @@ mejores_marcas.columns = ['Tipo_de_Vehículo', 'Marca_LHL', 'Costo_por_km_LHL (C
 st.write("### Mejores Marcas por Categoría (Menor Costo por Kilómetro)")
 st.dataframe(mejores_marcas)
 
+
+# Incertidumbre del costo por km: bandas de percentiles con precios de energía sorteados.
+# Es un fragmento: mover los controles recalcula solo esta sección.
+@st.fragment
+def incertidumbre_costos():
+    st.subheader("Incertidumbre del costo por kilómetro (Monte Carlo)")
+    st.write("El costo por km de cada marca se recalcula con miles de precios de energía sorteados alrededor de los precios vigentes. La barra gruesa cubre el 50 % central de los resultados (P25–P75) y la línea el 90 % (P5–P95).")
+    energias = [e for e in costos.energias_dataset("nacional") if precios.get(e) is not None]
+    if not energias:
+        st.info("Ingrese el precio de al menos una energía en la barra lateral.")
+        return
+    volatilidades, correlacion, n = mc.controles_incertidumbre("mc_nacional", energias)
+    recorrido = st.radio("Recorrido", ["LHL", "LHR"], horizontal=True, key="mc_nacional_recorrido")
+    with tiempos.medir_seccion("Monte Carlo de costos por marca") as medicion:
+        bandas = mc.bandas_dataset("nacional", "OEM_Make", f"Costo_por_km_{recorrido}",
+                                   volatilidades, correlacion, n, precios=precios)
+        medicion["filas"] = n
+    st.plotly_chart(graf.bandas_percentiles(bandas, "OEM_Make", f"Costo por km {recorrido} por marca ({n:,} sorteos)"),
+                    use_container_width=True)
+    st.dataframe(bandas, hide_index=True)
+
+
+incertidumbre_costos()
+
 st.write("---")
 st.write("   ")
 
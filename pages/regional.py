@@ -1,41 +1,42 @@
 import streamlit as st
-import pandas as pd
 import utilidades as util
-import plotly.express as px
-import matplotlib.pyplot as plt
-import seaborn as sns
+import tiempos
+import agregados as agg
+import escenarios as esc
+import graficos as graf
+
+# Plotly se importa solo cuando se construye el primer gráfico
+px = util.importar_diferido("plotly.express")
+go = util.importar_diferido("plotly.graph_objects")
 
 # Título e icono de la página
 st.set_page_config(page_title="Trayecto regional", page_icon="🏔️", layout="wide")
 util.generarMenu()
 
 # Función para cargar y procesar datos
-@st.cache_data
-def cargar_y_procesar_datos(ruta_archivo):
+def cargar_y_procesar_datos():
     try:
-        # Cargar archivo CSV
-        emisiones_df = pd.read_csv(ruta_archivo, encoding="latin1", sep=",")
-
-        # Agrupar por 'OEM_Make' y 'Mission'
-        emisiones_por_vehiculo_mision = emisiones_df.groupby(['OEM_Make', 'Mission'])['Emision_CO2_avg'].mean().reset_index()
-
-        # Emisión promedio por fabricante
-        emisiones_promedio_por_fabricante = emisiones_por_vehiculo_mision.groupby('OEM_Make')['Emision_CO2_avg'].mean().reset_index()
-        emisiones_promedio_por_fabricante = emisiones_promedio_por_fabricante.sort_values('Emision_CO2_avg')
+        # Cargar los datos desde la capa compartida (una sola copia por proceso)
+        emisiones_df = agg.datos_regionales()
+        # Agregados por fabricante y misión de cada columna de emisiones, calculados una vez
+        # por versión del archivo: {columna: (por_fabricante_y_mision, por_fabricante)}
+        agregados_emisiones = agg.agregados_regionales()
 
-        return emisiones_df, emisiones_por_vehiculo_mision, emisiones_promedio_por_fabricante
+        return emisiones_df, agregados_emisiones
 
     except Exception as e:
         st.error(f"Error al procesar el archivo: {str(e)}")
-        return None, None, None
+        return None, None
 
 # Cargar los datos
-ruta_archivo = "datos_vehiculo_regional.csv"
 with st.spinner("Cargando y procesando datos..."):
-    emisiones_df, emisiones_por_vehiculo_mision, emisiones_promedio_por_fabricante = cargar_y_procesar_datos(ruta_archivo)
+    emisiones_df, agregados_emisiones = cargar_y_procesar_datos()
 
-# Verificar si se cargaron los datos correctamente
-if emisiones_df is not None:
+# Análisis de emisiones por fabricante y misión. Es un fragmento: al cambiar el filtro solo
+# se vuelve a ejecutar (y a enviar) esta sección, no toda la página.
+@st.fragment
+@tiempos.medir_seccion("Análisis de emisiones")
+def analisis_emisiones(agregados_emisiones):
     st.header("Análisis de emisiones")
     st.write("""
     Este análisis evalúa las emisiones promedio de CO2 al agrupar los datos por tipo de misión (Mission) 
@@ -58,21 +59,8 @@ if emisiones_df is not None:
     else:
         columna_emisiones = "Emision_CO2_avg"  # Información inicial por defecto
 
-    # Agrupar los datos dinámicamente según la columna seleccionada
-    emisiones_por_vehiculo_mision_seleccion = (
-        emisiones_df.groupby(['OEM_Make', 'Mission'])[columna_emisiones]
-        .mean()
-        .reset_index()
-        .rename(columns={columna_emisiones: "Emision_CO2_avg"})
-    )
-
-    # Calcular la emisión promedio por fabricante
-    emisiones_promedio_por_fabricante = (
-        emisiones_por_vehiculo_mision_seleccion.groupby('OEM_Make')['Emision_CO2_avg']
-        .mean()
-        .reset_index()
-        .sort_values(by="Emision_CO2_avg")
-    )
+    # Agregados precalculados de la columna seleccionada (por fabricante y misión, y por fabricante)
+    emisiones_por_vehiculo_mision_seleccion, emisiones_promedio_por_fabricante = agregados_emisiones[columna_emisiones]
 
     # Layout con dos columnas
     col1, col2 = st.columns([3, 1])
@@ -115,6 +103,11 @@ if emisiones_df is not None:
             value=f"{marca_menor_emision}",
             delta=f"{delta_emision:.2f} g/km respecto al promedio",
         )
+
+
+# Verificar si se cargaron los datos correctamente
+if emisiones_df is not None:
+    analisis_emisiones(agregados_emisiones)
 else:
     st.error("No se pudieron cargar los datos. Verifique el archivo.")
 
@@ -129,9 +122,10 @@ with col5:
                 
                 \nOtras misiones presentan variabilidad, pero la predominancia del Diesel es clara en los niveles de CO2.""")
 
-with col6:
+with col6, tiempos.medir_seccion("Emisiones por combustible", emisiones_df):
 
-        fig = px.box(emisiones_df, x='MS_FuelType', y='Emision_CO2_avg',
+        # Con muchas filas se envían solo los estadísticos de cada caja
+        fig = graf.caja(emisiones_df, x='MS_FuelType', y='Emision_CO2_avg',
                     title='Distribución de emisiones de CO2 por tipo de combustible',
                     labels={'MS_FuelType': 'Tipo de combustible', 'Emision_CO2_avg': 'Emisiones de CO2 (g/km)'},
                     color='MS_FuelType') #Añadimos color por cada tipo de combustible.
@@ -145,7 +139,7 @@ st.write("---")
 st.write("   ")
 
 col7, col8 = st.columns([3, 2])
-with col7:
+with col7, tiempos.medir_seccion("Emisiones por categoría", emisiones_df):
         if emisiones_df is not None:
             # 1. Calcular las emisiones totales por categoría
             emisiones_por_categoria = (
@@ -216,9 +210,10 @@ st.header("Análisis integral del consumo de combustible")
 col9, col10, col11 = st.columns(3)
 
     # Gráfica 1: Relación entre consumo y carga transportada
-with col9:
+with col9, tiempos.medir_seccion("Consumo vs carga", emisiones_df):
         st.subheader("Consumo vs Carga")
-        fig1 = px.scatter(
+        # Con muchas filas se dibuja con WebGL una muestra representativa
+        fig1 = graf.dispersion(
             emisiones_df,
             x="L_Payload_kg",
             y="Consumo_avg",
@@ -231,7 +226,7 @@ with col9:
         st.plotly_chart(fig1, use_container_width=True)
 
     # Gráfica 2: Comparación por tipo de combustible
-with col10:
+with col10, tiempos.medir_seccion("Consumo y emisiones por combustible", emisiones_df):
         st.subheader("Consumo y emisiones por combustible")
         consumo_emisiones_combustible = emisiones_df.groupby("MS_FuelType")[["Consumo_avg", "Emision_CO2_avg"]].mean().reset_index()
         fig2 = px.bar(
@@ -245,9 +240,10 @@ with col10:
         st.plotly_chart(fig2, use_container_width=True)
 
     # Gráfica 3: Distribución del consumo promedio
-with col11:
+with col11, tiempos.medir_seccion("Distribución del consumo", emisiones_df):
         st.subheader("Distribución del consumo")
-        fig3 = px.histogram(
+        # Con muchas filas los intervalos se cuentan en el servidor
+        fig3 = graf.histograma(
             emisiones_df,
             x="Consumo_avg",
             nbins=20,
@@ -266,114 +262,107 @@ st.write("""
 
 ## Añadido recientemente
 
-# Sección para calcular el nivel de emisión basado en una cantidad de vehículos
-st.header("Cálculo de emisiones para una cantidad específica de vehículos")
-
-# Obtener las 5 marcas con más referencias
-top5_marcas = emisiones_df['OEM_Make'].value_counts().head(5).index.tolist()
-st.write("Las **5 marcas con más referencias** en la base de datos son:", ", ".join(top5_marcas))
-
-# Crear una selección de marca y textbox para la cantidad de vehículos
-col15, col16 = st.columns(2)
-with col15:
-    marca_seleccionada = st.selectbox("Selecciona una marca de las 5 principales:", [""] + top5_marcas)
-
-with col16:
-    cantidad_vehiculos = st.number_input("Cantidad de vehículos a analizar:", min_value=1, value=10, step=1)
-
-# Calcular las emisiones si la marca está seleccionada
-if marca_seleccionada:
-    # Filtrar por la marca seleccionada y calcular las emisiones promedio
-    emisiones_marca = emisiones_df[emisiones_df['OEM_Make'] == marca_seleccionada]
-
-    # Seleccionar las 5 referencias con menor emisión promedio
-    top5_referencias = (
-        emisiones_marca.groupby('OEM_Model')['Emision_CO2_avg']
-        .mean()
-        .nsmallest(5)
-        .reset_index()
-    )
-
-    # Calcular emisiones totales para la cantidad seleccionada de vehículos
-    top5_referencias['Emisiones Totales'] = top5_referencias['Emision_CO2_avg'] * cantidad_vehiculos
-
-    # Mostrar resultados
-    st.write(f"**Marca seleccionada:** {marca_seleccionada}")
-    st.write(f"**Emisiones totales calculadas para las referencias de la marca:**")
-
-    # Mostrar tabla con resultados
-    st.table(top5_referencias.rename(columns={
-        'OEM_Model': 'Modelo de Vehículo',
-        'Emision_CO2_avg': 'Emisión Promedio (g/km)',
-        'Emisiones Totales': 'Emisiones Totales (g/km)'
-    }))
-
-    # Gráfica interactiva con Plotly
-    st.subheader("Top 5 referencias con menor emisión promedio de CO₂")
-    import plotly.express as px
-
-    fig = px.bar(
-        top5_referencias,
-        x='OEM_Model',
-        y='Emisiones Totales',
-        text='Emisiones Totales',
-        title=f"Top 5 referencias con menor emisión en {marca_seleccionada}",
-        labels={
+# Sección para calcular el nivel de emisión basado en una cantidad de vehículos.
+# Es un fragmento: cambiar la marca o la cantidad de vehículos solo vuelve a ejecutar
+# esta sección (y la comparación con Medellín, que depende de ellas).
+@st.fragment
+@tiempos.medir_seccion("Cálculo de emisiones para una flota")
+def calculo_emisiones_flota():
+    st.header("Cálculo de emisiones para una cantidad específica de vehículos")
+
+    # Marcas ordenadas por número de referencias (índice precalculado)
+    marcas = agg.marcas_regionales()
+    top5_marcas = marcas[:5]
+    st.write("Las **5 marcas con más referencias** en la base de datos son:", ", ".join(top5_marcas))
+
+    # Crear una selección de marca y textbox para la cantidad de vehículos
+    col15, col16 = st.columns(2)
+    with col15:
+        marca_seleccionada = st.selectbox("Selecciona una marca (ordenadas por número de referencias):", [""] + marcas)
+
+    with col16:
+        cantidad_vehiculos = st.number_input("Cantidad de vehículos a analizar:", min_value=1, value=10, step=1)
+
+    top5_referencias = None
+    # Calcular las emisiones si la marca está seleccionada
+    if marca_seleccionada:
+        # Las 5 referencias con menor emisión promedio, desde el índice por marca
+        top5_referencias = agg.modelos_por_emision(marca_seleccionada, k=5)
+
+        # Calcular emisiones totales para la cantidad seleccionada de vehículos
+        top5_referencias['Emisiones Totales'] = top5_referencias['Emision_CO2_avg'] * cantidad_vehiculos
+
+        # Mostrar resultados
+        st.write(f"**Marca seleccionada:** {marca_seleccionada}")
+        st.write(f"**Emisiones totales calculadas para las referencias de la marca:**")
+
+        # Mostrar tabla con resultados
+        st.dataframe(top5_referencias.rename(columns={
             'OEM_Model': 'Modelo de Vehículo',
+            'Emision_CO2_avg': 'Emisión Promedio (g/km)',
             'Emisiones Totales': 'Emisiones Totales (g/km)'
-        },
-        color='Emisiones Totales',  # Añadir un degradado de color
-        color_continuous_scale='Blues'
-    )
+        }), hide_index=True)
 
-    # Ajustes adicionales para la gráfica
-    fig.update_traces(texttemplate='%{text:.2f}', textposition='outside')
-    fig.update_layout(
-        xaxis_title="Modelo de Vehículo",
-        yaxis_title="Emisiones Totales (g/km)",
-        xaxis_tickangle=-45
-    )
+        # Gráfica interactiva con Plotly
+        st.subheader("Top 5 referencias con menor emisión promedio de CO₂")
+        fig = px.bar(
+            top5_referencias,
+            x='OEM_Model',
+            y='Emisiones Totales',
+            text='Emisiones Totales',
+            title=f"Top 5 referencias con menor emisión en {marca_seleccionada}",
+            labels={
+                'OEM_Model': 'Modelo de Vehículo',
+                'Emisiones Totales': 'Emisiones Totales (g/km)'
+            },
+            color='Emisiones Totales',  # Añadir un degradado de color
+            color_continuous_scale='Blues'
+        )
 
-    # Mostrar gráfica en Streamlit
-    st.plotly_chart(fig)
+        # Ajustes adicionales para la gráfica
+        fig.update_traces(texttemplate='%{text:.2f}', textposition='outside')
+        fig.update_layout(
+            xaxis_title="Modelo de Vehículo",
+            yaxis_title="Emisiones Totales (g/km)",
+            xaxis_tickangle=-45
+        )
 
-else:
-    st.info("Por favor selecciona una marca y la cantidad de vehículos para realizar el cálculo.")
+        # Mostrar gráfica en Streamlit
+        st.plotly_chart(fig)
 
+    else:
+        st.info("Por favor selecciona una marca y la cantidad de vehículos para realizar el cálculo.")
 
-## Métrica
-# Calcular la referencia con menos y más emisiones
-referencia_menor_emision = top5_referencias.iloc[0]
-referencia_mayor_emision = top5_referencias.iloc[-1]
+    # Resumen de la marca seleccionada
+    if top5_referencias is not None:
+        ## Métrica
+        # Calcular la referencia con menos y más emisiones
+        referencia_menor_emision = top5_referencias.iloc[0]
+        referencia_mayor_emision = top5_referencias.iloc[-1]
 
-# Métricas
-# Calcular la referencia con menos y más emisiones
-referencia_menor_emision = top5_referencias.iloc[0]
-referencia_mayor_emision = top5_referencias.iloc[-1]
+        # Métricas
+        st.subheader("Resumen de Emisiones")
 
-# Métricas
-st.subheader("Resumen de Emisiones")
+        col17, col18 = st.columns(2)
 
-col17, col18 = st.columns(2)
+        with col17:
+            st.metric(
+                label="Referencia con menores emisiones",
+                value=f"{referencia_menor_emision['OEM_Model']} ({referencia_menor_emision['Emision_CO2_avg']:.2f} g/km)"
+            )
 
-with col17:
-    st.metric(
-        label="Referencia con menores emisiones",
-        value=f"{referencia_menor_emision['OEM_Model']} ({referencia_menor_emision['Emision_CO2_avg']:.2f} g/km)"
-    )
+        with col18:
+            delta_emision = referencia_mayor_emision['Emision_CO2_avg'] - referencia_menor_emision['Emision_CO2_avg']
+            promedio_emisiones = top5_referencias['Emision_CO2_avg'].mean()
 
-with col18:
-    delta_emision = referencia_mayor_emision['Emision_CO2_avg'] - referencia_menor_emision['Emision_CO2_avg']
-    promedio_emisiones = top5_referencias['Emision_CO2_avg'].mean()
-    
-    st.metric(
-        label="Comparación promedio vs mayor emisión",
-        value=f"{promedio_emisiones:.2f} g/km",
-        delta=f"{-delta_emision:.2f} g/km respecto a {referencia_mayor_emision['OEM_Model']}"
-    )
+            st.metric(
+                label="Comparación promedio vs mayor emisión",
+                value=f"{promedio_emisiones:.2f} g/km",
+                delta=f"{-delta_emision:.2f} g/km respecto a {referencia_mayor_emision['OEM_Model']}"
+            )
 
-st.subheader("Análisis de emisiones de CO₂ por referencia de vehículos")
-st.write("""El análisis presentado se centra en la comparación de las 5 referencias de vehículos con menor emisión de CO₂ dentro de la marca seleccionada. Se calcularon las emisiones totales para una cantidad específica de vehículos, facilitando así la evaluación del impacto ambiental a escala.
+    st.subheader("Análisis de emisiones de CO₂ por referencia de vehículos")
+    st.write("""El análisis presentado se centra en la comparación de las 5 referencias de vehículos con menor emisión de CO₂ dentro de la marca seleccionada. Se calcularon las emisiones totales para una cantidad específica de vehículos, facilitando así la evaluación del impacto ambiental a escala.
 
 Referencia con menores emisiones:
 La referencia {modelo_menor_emision} destaca por registrar la menor emisión promedio, con {emision_menor:.2f} g/km, lo que representa una reducción de {abs(delta):.2f} g/km en comparación con la referencia que más emite, {modelo_mayor_emision}.
@@ -385,76 +374,160 @@ Impacto acumulado:
 Al considerar una cantidad determinada de vehículos, se evidenció el impacto acumulativo de las emisiones totales. Esta métrica permite a los responsables de flotas y tomadores de decisiones identificar modelos más sostenibles y promover su adopción a gran escala.
          """)
 
+    comparacion_medellin(marca_seleccionada, cantidad_vehiculos, top5_referencias)
+
+
 ## Emisiones Medellín
-# Sección para comparar las emisiones con el nivel de emisiones de Medellín
-st.header("Comparación de emisiones con el nivel de emisiones de Medellín")
-
-# Input: Nivel de emisiones de Medellín (en toneladas)
-emisiones_medellin = st.number_input(
-    "Ingresa el nivel de emisiones de Medellín (en toneladas de CO₂):", 
-    min_value=0.0, 
-    value=10000.0,  # Ejemplo: 10,000 toneladas
-    step=100.0
-)
-
-# Input: Recorrido diario promedio en kilómetros
-recorrido_diario = st.number_input(
-    "Ingresa el recorrido promedio diario de los vehículos (en km):", 
-    min_value=1, 
-    value=100, 
-    step=10
-)
-
-if marca_seleccionada and cantidad_vehiculos:
-    # Calcular emisiones totales diarias de la cantidad de vehículos seleccionados
-    emision_total_diaria = top5_referencias['Emision_CO2_avg'].mean() * cantidad_vehiculos * recorrido_diario
-    emision_total_toneladas = emision_total_diaria / 1_000_000  # Convertir a toneladas
-
-    # Relación entre las emisiones de los vehículos seleccionados y las de Medellín
-    porcentaje_emisiones = (emision_total_toneladas / emisiones_medellin) * 100
-
-    # Mostrar resultados
-    st.write("### Resultados del análisis:")
-    st.metric(
-        label="Emisiones totales diarias de los vehículos seleccionados",
-        value=f"{emision_total_toneladas:.2f} toneladas de CO₂",
-        delta=f"{porcentaje_emisiones:.2f}% del total de Medellín"
+# Sección para comparar las emisiones con el nivel de emisiones de Medellín. Fragmento
+# anidado: sus entradas solo vuelven a ejecutar la comparación.
+@st.fragment
+@tiempos.medir_seccion("Comparación con Medellín")
+def comparacion_medellin(marca_seleccionada, cantidad_vehiculos, top5_referencias):
+    st.header("Comparación de emisiones con el nivel de emisiones de Medellín")
+
+    # Input: Nivel de emisiones de Medellín (en toneladas)
+    emisiones_medellin = st.number_input(
+        "Ingresa el nivel de emisiones de Medellín (en toneladas de CO₂):", 
+        min_value=0.0, 
+        value=10000.0,  # Ejemplo: 10,000 toneladas
+        step=100.0
     )
 
-    # Gráfica comparativa con Plotly
-    st.subheader("Comparación gráfica de emisiones")
-    import plotly.graph_objects as go
-
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=["Emisiones de los vehículos seleccionados", "Nivel de emisiones de Medellín"],
-        y=[emision_total_toneladas, emisiones_medellin],
-        text=[f"{emision_total_toneladas:.2f} toneladas", f"{emisiones_medellin:.2f} toneladas"],
-        textposition='auto',
-        marker_color=['skyblue', 'lightgreen']
-    ))
-
-    fig.update_layout(
-        title="Comparación de emisiones entre vehículos seleccionados y Medellín",
-        xaxis_title="Fuente de emisiones",
-        yaxis_title="Toneladas de CO₂",
-        showlegend=False
+    # Input: Recorrido diario promedio en kilómetros
+    recorrido_diario = st.number_input(
+        "Ingresa el recorrido promedio diario de los vehículos (en km):", 
+        min_value=1, 
+        value=100, 
+        step=10
     )
 
-    st.plotly_chart(fig)
+    if marca_seleccionada and cantidad_vehiculos:
+        # Emisiones totales diarias de la cantidad de vehículos seleccionados (en toneladas) y su
+        # relación con las emisiones de Medellín: un escenario del motor de escenarios
+        escenario = esc.evaluar_escenarios(
+            {marca_seleccionada: top5_referencias['Emision_CO2_avg'].mean()},
+            [cantidad_vehiculos], [recorrido_diario], [emisiones_medellin],
+        ).iloc[0]
+        emision_total_toneladas = escenario['Emision_diaria_ton']
+        porcentaje_emisiones = escenario['Porcentaje_inventario']
+
+        # Mostrar resultados
+        st.write("### Resultados del análisis:")
+        st.metric(
+            label="Emisiones totales diarias de los vehículos seleccionados",
+            value=f"{emision_total_toneladas:.2f} toneladas de CO₂",
+            delta=f"{porcentaje_emisiones:.2f}% del total de Medellín"
+        )
 
-    # Interpretación
-    st.write("### Interpretación del análisis")
-    st.write(f"""
-        - Las emisiones totales de los **{cantidad_vehiculos} vehículos seleccionados**, 
-          recorriendo un promedio de **{recorrido_diario} km/día**, equivalen a **{emision_total_toneladas:.2f} toneladas de CO₂ por día**.
-        - Esto representa aproximadamente un **{porcentaje_emisiones:.2f}%** del nivel total de emisiones registrado en Medellín, 
-          que se estima en **{emisiones_medellin} toneladas**.
+        # Gráfica comparativa con Plotly
+        st.subheader("Comparación gráfica de emisiones")
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            x=["Emisiones de los vehículos seleccionados", "Nivel de emisiones de Medellín"],
+            y=[emision_total_toneladas, emisiones_medellin],
+            text=[f"{emision_total_toneladas:.2f} toneladas", f"{emisiones_medellin:.2f} toneladas"],
+            textposition='auto',
+            marker_color=['skyblue', 'lightgreen']
+        ))
+
+        fig.update_layout(
+            title="Comparación de emisiones entre vehículos seleccionados y Medellín",
+            xaxis_title="Fuente de emisiones",
+            yaxis_title="Toneladas de CO₂",
+            showlegend=False
+        )
+
+        st.plotly_chart(fig)
+
+        # Interpretación
+        st.write("### Interpretación del análisis")
+        st.write(f"""
+            - Las emisiones totales de los **{cantidad_vehiculos} vehículos seleccionados**, 
+              recorriendo un promedio de **{recorrido_diario} km/día**, equivalen a **{emision_total_toneladas:.2f} toneladas de CO₂ por día**.
+            - Esto representa aproximadamente un **{porcentaje_emisiones:.2f}%** del nivel total de emisiones registrado en Medellín, 
+              que se estima en **{emisiones_medellin} toneladas**.
+        """)
+    else:
+        st.info("Por favor, selecciona una marca, la cantidad de vehículos y proporciona los datos para realizar la comparación.")
+
+
+## Escenarios de flota
+# Simulador de escenarios: evalúa de una vez todas las combinaciones de marcas, tamaños de
+# flota, recorridos diarios e inventarios de referencia. Es un fragmento independiente.
+@st.fragment
+@tiempos.medir_seccion("Escenarios de flota")
+def simulador_escenarios():
+    st.header("Simulador de escenarios de flota")
+    st.write("""
+    Evalúa a la vez todas las combinaciones de marcas, tamaños de flota, recorridos diarios
+    e inventarios de referencia. La emisión de cada marca es el promedio de sus referencias.
     """)
-else:
-    st.info("Por favor, selecciona una marca, la cantidad de vehículos y proporciona los datos para realizar la comparación.")
 
-    
+    marcas = agg.marcas_regionales()
+    col19, col20 = st.columns(2)
+    with col19:
+        marcas_escenario = st.multiselect("Marcas:", marcas, default=marcas[:5])
+        referencia = st.radio(
+            "Emisión de referencia por marca:",
+            ["Promedio de las 5 referencias de menor emisión", "Promedio de todas las referencias"],
+        )
+    with col20:
+        texto_cantidades = st.text_input("Tamaños de flota (separados por comas):", "10, 50, 100, 500")
+        texto_recorridos = st.text_input("Recorridos diarios en km (separados por comas):", "50, 100, 200")
+        texto_inventarios = st.text_input("Inventarios de referencia en toneladas de CO₂ (separados por comas):", "10000")
+
+    if not marcas_escenario:
+        st.info("Selecciona al menos una marca para evaluar los escenarios.")
+        return
+
+    try:
+        emisiones_marcas = agg.emision_referencia_marcas(
+            marcas_escenario, k=5 if referencia.startswith("Promedio de las 5") else None
+        )
+        resultados = esc.evaluar_escenarios(
+            emisiones_marcas,
+            esc.leer_lista_numeros(texto_cantidades),
+            esc.leer_lista_numeros(texto_recorridos),
+            esc.leer_lista_numeros(texto_inventarios),
+        )
+    except ValueError as e:
+        st.error(f"Revisa los valores de los escenarios: {e}")
+        return
+
+    st.write(f"**{len(resultados)} escenarios evaluados**")
+
+    # Las emisiones no dependen del inventario: se grafican una vez por combinación
+    fig = px.line(
+        resultados.drop_duplicates(['Referencia', 'Cantidad_vehiculos', 'Recorrido_diario_km']),
+        x='Cantidad_vehiculos',
+        y='Emision_diaria_ton',
+        color='Referencia',
+        facet_col='Recorrido_diario_km',
+        markers=True,
+        title="Emisiones diarias por tamaño de flota y recorrido diario",
+        labels={
+            'Cantidad_vehiculos': 'Cantidad de vehículos',
+            'Emision_diaria_ton': 'Toneladas de CO₂ por día',
+            'Referencia': 'Marca',
+            'Recorrido_diario_km': 'Recorrido (km/día)',
+        },
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(resultados, hide_index=True, use_container_width=True)
+    st.download_button(
+        "Descargar escenarios (CSV)",
+        resultados.to_csv(index=False).encode('utf-8'),
+        file_name="escenarios_flota.csv",
+        mime="text/csv",
+    )
+
+
+if emisiones_df is not None:
+    calculo_emisiones_flota()
+    simulador_escenarios()
+
+
 ## Botones
 st.write("---")
 st.write("   ")
@@ -1,28 +1,38 @@
 import streamlit as st
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
 import utilidades as util
+import conjuntos
+import memoria
+import tiempos
+import graficos as graf
+import explorador as exp
+import costos
+
+# Librerías pesadas: se importan solo cuando se dibuja o calcula algo con ellas
+sns = util.importar_diferido("seaborn")
+pd = util.importar_diferido("pandas")
 
 # Título e icono de la página
 st.set_page_config(page_title="Trayecto urbano", page_icon="🏙️", layout="wide")
 util.generarMenu()
 
- # Cargar los datos
-dfu = pd.read_csv('datos_vehiculo_urbano.csv')
-# Crear DataFrame
-dfu = pd.DataFrame(dfu)
+ # Cargar los datos (copia compartida, no se modifica en sitio)
+dfu = conjuntos.cargar_datos("urbano")
+precios = costos.selector_precios(["urbano"])
 
 st.header("TABLA CON LOS DATOS DE LAS MARCAS DE VEHICULOS")
-# Calcular la carga promedio
-dfu['Carga_Promedio'] = (dfu['R_Payload_kg'])
-
-# Calcular la emisión promedio de CO2
-dfu['Emision_CO2'] = (dfu['R_CO2_gkm'] )
-
-# Calcular el consumo específico promedio
-dfu['Consumo_Especifico'] = (dfu['Cs_R_Gal_km_Ton'] )
+dfu = dfu.assign(
+    # Calcular la carga promedio
+    Carga_Promedio=dfu['R_Payload_kg'],
+    # Calcular la emisión promedio de CO2
+    Emision_CO2=dfu['R_CO2_gkm'],
+    # Calcular el consumo específico promedio
+    Consumo_Especifico=dfu['Cs_R_Gal_km_Ton'],
+    # Costo del combustible por km (con carga) a los precios de la barra lateral; los
+    # combustibles sin precio conservan el costo del archivo
+    precio_total_COP_Gal_km=pd.Series(
+        costos.costos_dataset("urbano", precios)['Costo_por_km_R'].to_numpy(), index=dfu.index
+    ).fillna(dfu['precio_total_COP_Gal_km']),
+)
 
 # Agrupar los datos por categoría de vehículo y marca
 dfu_agrupado = dfu.groupby(['OEM_Make']).agg({
@@ -41,8 +51,76 @@ dfu_agrupado.columns = [
         'Costo_Consumo_Combustible'
     ]
 
-# Mostrar las primeras filas de los datos
-st.table(dfu_agrupado)
+# Mostrar los datos agrupados, paginados en el servidor
+exp.explorador_datos(dfu_agrupado, "marcas_urbano",
+                      version=(conjuntos.version_dataset("urbano"), tuple(sorted(precios.items()))))
+
+# Funciones de dibujo: cada gráfico se renderiza una vez y se reutiliza desde el caché de figuras
+
+# Costo promedio de combustible por marca
+def grafico_costo_marca(costo_por_marca):
+    fig,ax= graf.subgraficos(figsize=(5, 3))
+    costo_por_marca.plot(kind='bar', ax=ax)
+    ax.set_xlabel('Marca de Vehículo')
+    ax.set_ylabel('Costo COP (Gal/km)')
+    ax.set_title('Costo Promedio de Combustible por Marca')
+    ax.tick_params(axis='x', labelrotation=90)  # Rotate x-axis labels
+    return fig
+
+# Consumo específico por marca
+def grafico_consumo_especifico(dfu_grouped_sorted):
+    fig, ax= graf.subgraficos(figsize=(5,3))
+    ax.bar(dfu_grouped_sorted['OEM_Make'], dfu_grouped_sorted['Cs_R_Gal_km_Ton'] * 100) # Convert to percentage
+    ax.set_xlabel('Marca vehículo')
+    ax.set_ylabel('Consumo específico Gal/km * Ton (%)')
+    ax.set_title('Consumo específico de los vehículos por marca')
+    ax.tick_params(axis='x', labelrotation=90)
+    return fig
+
+# Gráfico combinado: consumo (barras) y emisiones (línea) por marca.
+# Con precios, se agrega la dispersión del precio por km de cada vehículo.
+def grafico_eficiencia(eficiencia_marcas, titulo, precios=None):
+    fig, ax1 = graf.subgraficos(figsize=(6, 4))
+
+    # Barras para consumo promedio de combustible
+    sns.barplot(data=eficiencia_marcas, x='OEM_Make', y='Consumo_FuelPromedio', color='blue', alpha=0.7, label='Consumo (Gal/km)', ax=ax1)
+    ax1.set_ylabel('Consumo (Gal/km)')
+    ax1.set_xlabel('Marca')
+    ax1.tick_params(axis='y')
+    ax1.set_xticklabels(eficiencia_marcas['OEM_Make'], rotation=45, ha='right')
+
+    # Eje secundario para emisiones promedio
+    ax2 = ax1.twinx()
+    sns.lineplot(data=eficiencia_marcas, x='OEM_Make', y='Emisiones_Promedio', color='red', label='Emisiones CO₂ (g/km)', marker='o', ax=ax2)
+    ax2.set_ylabel('Emisiones CO₂ (g/km)')
+    ax2.tick_params(axis='y')
+
+    # Añadir leyendas y título
+    fig.suptitle(titulo, fontsize=16)
+    ax1.legend(loc='upper left', bbox_to_anchor=(0, 1))
+    ax2.legend(loc='upper left', bbox_to_anchor=(0, 0.9))
+
+    if precios is not None:
+        ax2.scatter(precios['OEM_Make'], precios['precio_total_COP_Gal_km'])
+        ax2.set_xlabel('Marca del combustible ')
+        ax2.set_ylabel('Consumo de Combustible (G/km)')
+        ax2.tick_params(axis='x', labelrotation=90)
+    return fig
+
+# Dispersión CO2 vs precio por km, coloreada por consumo específico
+def grafico_co2_precio(grouped_dfu):
+    fig,ax=graf.subgraficos()
+    scatter = ax.scatter(grouped_dfu['R_CO2_gkm'], grouped_dfu['precio_total_COP_Gal_km'], c=grouped_dfu['Cs_R_Gal_km_Ton'], cmap='viridis', alpha=0.6)
+    fig.colorbar(scatter, ax=ax, label='Consumo especifico (g/km * Ton)')
+    ax.set_xlabel('CO2 (g/km)')
+    ax.set_ylabel('Precio_total COP (Gal/Km)')
+    ax.set_title('Relación entre Precio en COP (Gal), Consumo de CO2 (g) y Consumo especifico (Gal/Ton) de marcas Vehiculos con carga por km ')
+    ax.grid(True)
+
+    # Agregar etiquetas dinámicas por marca de vehículo
+    for i in range(len(grouped_dfu)):
+        ax.text(grouped_dfu['R_CO2_gkm'].iloc[i], grouped_dfu['precio_total_COP_Gal_km'].iloc[i], grouped_dfu['OEM_Make'].iloc[i], fontsize=8, alpha=0.7)
+    return fig
 
 # Crear columnas para mostrar gráficos
 col11, col12 = st.columns(2) 
@@ -50,20 +128,14 @@ col13, col14 = st.columns(2)
 col15,col16=st.columns(2)
 col17,col18=st.columns(2)
     
-with col11:
+with col11, tiempos.medir_seccion("Costo por marca", dfu):
         st.header("GRAFICO DEL CONSUMO DE CO2")
         # Sort the DataFrame by price in ascending order
         dfu_sorted = dfu.sort_values('precio_total_COP_Gal_km')
 
         # Create the bar plot
-        fig,ax= plt.subplots(figsize=(5, 3))
-        dfu_sorted.groupby('OEM_Make')['precio_total_COP_Gal_km'].mean().plot(kind='bar')
-        plt.xlabel('Marca de Vehículo')
-        plt.ylabel('Costo COP (Gal/km)')
-        plt.title('Costo Promedio de Combustible por Marca')
-        plt.xticks(rotation=90)  # Rotate x-axis labels
-        st.pyplot(fig)
-with col12: 
+        graf.mostrar_figura(grafico_costo_marca, dfu_sorted.groupby('OEM_Make')['precio_total_COP_Gal_km'].mean())
+with col12, tiempos.medir_seccion("Tablas de consumo de CO2", dfu):
     # mostrar datos en tabla de precios de combustible por km de marcas de vehiculos menos costosas
         
     # Seleccionar las columnas relacionadas con el costo del combustible
@@ -77,26 +149,20 @@ with col12:
         dfu_agrupado = dfu.groupby('OEM_Make')['precio_total_COP_Gal_km'].mean().reset_index()
 
       
-        st.table(dfu_agrupado)
+        st.dataframe(dfu_agrupado, hide_index=True)
         
 
          
-with col13:
+with col13, tiempos.medir_seccion("Consumo específico", dfu):
         st.header("GRAFICO DEL CONSUMO ESPECIFICO")
         # Agrupar por OEM_Make y calcular la media de Cs_L_Gal_km_Ton y Cs_R_Gal_km_Ton para cada grupo
         dfu_grouped = dfu.groupby('OEM_Make')[['Cs_L_Gal_km_Ton', 'Cs_R_Gal_km_Ton']].mean().reset_index()
         # Plotting the results
-        fig, ax= plt.subplots(figsize=(5,3))
         dfu_grouped_sorted = dfu_grouped.sort_values(by='Cs_R_Gal_km_Ton')
-        plt.bar(dfu_grouped_sorted['OEM_Make'], dfu_grouped_sorted['Cs_R_Gal_km_Ton'] * 100) # Convert to percentage
-        plt.xlabel('Marca vehículo')
-        plt.ylabel('Consumo específico Gal/km * Ton (%)')
-        plt.title('Consumo específico de los vehículos por marca')
-        plt.xticks(rotation=90)
-        st.pyplot(fig)
+        graf.mostrar_figura(grafico_consumo_especifico, dfu_grouped_sorted)
   
 
-with col14:       
+with col14, tiempos.medir_seccion("Tabla de consumo específico", dfu):
          # Seleccionar las columnas relacionadas con el consumo especifico
        # Crear DataFrame
 
@@ -109,9 +175,9 @@ with col14:
         dfu_agrupado = dfu.groupby('OEM_Make')['Cs_R_Gal_km_Ton'].mean().reset_index()
 
       
-        st.table(dfu_agrupado)
+        st.dataframe(dfu_agrupado, hide_index=True)
 
-with col15:   
+with col15, tiempos.medir_seccion("Eficiencia con carga", dfu):
       
         st.header("GRAFICO DEL CO2 Y GAL/KM CUANDO EL VEHICULO ESTA CARGADO")
         st.subheader("Hallazgos")
@@ -128,29 +194,11 @@ with col15:
         eficiencia_marcas = eficiencia_marcas.sort_values('Consumo_FuelPromedio')
 
         # Crear el gráfico combinado
-        fig, ax1 = plt.subplots(figsize=(6, 4))
-
-        # Barras para consumo promedio de combustible
-        sns.barplot(data=eficiencia_marcas, x='OEM_Make', y='Consumo_FuelPromedio', color='blue', alpha=0.7, label='Consumo (Gal/km)', ax=ax1)
-        ax1.set_ylabel('Consumo (Gal/km)')
-        ax1.set_xlabel('Marca')
-        ax1.tick_params(axis='y')
-        ax1.set_xticklabels(eficiencia_marcas['OEM_Make'], rotation=45, ha='right')
-
-        # Eje secundario para emisiones promedio
-        ax2 = ax1.twinx()
-        sns.lineplot(data=eficiencia_marcas, x='OEM_Make', y='Emisiones_Promedio', color='red', label='Emisiones CO₂ (g/km)', marker='o', ax=ax2)
-        ax2.set_ylabel('Emisiones CO₂ (g/km)')
-        ax2.tick_params(axis='y')
+        graf.mostrar_figura(grafico_eficiencia, eficiencia_marcas,
+                            'Marcas Más Eficientes en Consumo de Combustible vs. Emisiones de CO₂ cuando esta cargado')
 
-        # Añadir leyendas y título
-        fig.suptitle('Marcas Más Eficientes en Consumo de Combustible vs. Emisiones de CO₂ cuando esta cargado', fontsize=16)
-        ax1.legend(loc='upper left', bbox_to_anchor=(0, 1))
-        ax2.legend(loc='upper left', bbox_to_anchor=(0, 0.9))
-        st.pyplot(fig)
 
-
-with col16:
+with col16, tiempos.medir_seccion("Eficiencia sin carga", dfu):
         st.header("GRAFICO DEL CO2 Y GAL/KM CUANDO EL VEHICULO ESTA  SIN CARGA")
 
         st.subheader("Hallazgos")
@@ -164,33 +212,11 @@ with col16:
         eficiencia_marcas = eficiencia_marcas.sort_values('Consumo_FuelPromedio')
 
         # Crear el gráfico combinado
-        fig, ax1 = plt.subplots(figsize=(6, 4))
-
-        # Barras para consumo promedio de combustible
-        sns.barplot(data=eficiencia_marcas, x='OEM_Make', y='Consumo_FuelPromedio', color='blue', alpha=0.7, label='Consumo (Gal/km)', ax=ax1)
-        ax1.set_ylabel('Consumo (Gal/km)')
-        ax1.set_xlabel('Marca')
-        ax1.tick_params(axis='y')
-        ax1.set_xticklabels(eficiencia_marcas['OEM_Make'], rotation=45, ha='right')
-
-        # Eje secundario para emisiones promedio
-        ax2 = ax1.twinx()
-        sns.lineplot(data=eficiencia_marcas, x='OEM_Make', y='Emisiones_Promedio', color='red', label='Emisiones CO₂ (g/km)', marker='o', ax=ax2)
-        ax2.set_ylabel('Emisiones CO₂ (g/km)')
-        ax2.tick_params(axis='y')
-
-        # Añadir leyendas y título
-        fig.suptitle('Marcas Más Eficientes en Consumo de Combustible vs. Emisiones de CO₂ cuando esta sin carga', fontsize=16)
-        ax1.legend(loc='upper left', bbox_to_anchor=(0, 1))
-        ax2.legend(loc='upper left', bbox_to_anchor=(0, 0.9))
-
-        plt.scatter(dfu['OEM_Make'], dfu['precio_total_COP_Gal_km'])
-        plt.xlabel('Marca del combustible ')
-        plt.ylabel('Consumo de Combustible (G/km)')
-        plt.xticks(rotation=90)
-        st.pyplot(fig)
-
-with col17:
+        graf.mostrar_figura(grafico_eficiencia, eficiencia_marcas,
+                            'Marcas Más Eficientes en Consumo de Combustible vs. Emisiones de CO₂ cuando esta sin carga',
+                            precios=dfu[['OEM_Make', 'precio_total_COP_Gal_km']])
+
+with col17, tiempos.medir_seccion("CO2 y precio por km", dfu):
         # GRAFICO DE DISPERSION DE RELACION ENTRE  LA EMISION DE CO2 Y CONSUMO DE COMBUSTIBLE POR KM Y CONSUMO ESPECIFICO DE VEHICULOS CUANDO ESTAN CARGADOS
         st.header("GRAFICO DEL CO2, GAL/KM  PRECIO /KM CUANDO EL VEHICULO ESTA CARGADO")
         st.subheader("Hallazgos")
@@ -202,21 +228,9 @@ with col17:
         grouped_dfu = dfu.groupby('OEM_Make')[numeric_columns].mean().reset_index()
 
         # Crear el gráfico de dispersión
-        fig,ax=plt.subplots()
-        scatter = plt.scatter(grouped_dfu['R_CO2_gkm'], grouped_dfu['precio_total_COP_Gal_km'], c=grouped_dfu['Cs_R_Gal_km_Ton'], cmap='viridis', alpha=0.6)
-        plt.colorbar(scatter, label='Consumo especifico (g/km * Ton)')
-        plt.xlabel('CO2 (g/km)')
-        plt.ylabel('Precio_total COP (Gal/Km)')
-        plt.title('Relación entre Precio en COP (Gal), Consumo de CO2 (g) y Consumo especifico (Gal/Ton) de marcas Vehiculos con carga por km ')
-        plt.grid(True)
-
-        # Agregar etiquetas dinámicas por marca de vehículo
-        for i in range(len(grouped_dfu)):
-            plt.text(grouped_dfu['R_CO2_gkm'].iloc[i], grouped_dfu['precio_total_COP_Gal_km'].iloc[i], grouped_dfu['OEM_Make'].iloc[i], fontsize=8, alpha=0.7)
+        graf.mostrar_figura(grafico_co2_precio, grouped_dfu)
 
-        st.pyplot(fig)
-
-with col18:
+with col18, tiempos.medir_seccion("Tabla de CO2 y precio por km", dfu):
         st.header("TABLA DEL CO2, GAL/KM  PRECIO /KM CUANDO EL VEHICULO ESTA CARGADO")
         # Crear DataFrame
         dfu = pd.DataFrame(dfu)
@@ -237,7 +251,10 @@ with col18:
         ]
 
         # Mostrar la tabla agrupada
-        st.table(dfu_agrupado)
+        st.dataframe(dfu_agrupado, hide_index=True)
+
+# Memoria propia de los DataFrame de la página (vista de operador)
+memoria.anotar_objetos(dfu=dfu, dfu_agrupado=dfu_agrupado)
 
 # Botones    
 st.write("---")
@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+
+import streamlit as st
+
+import conjuntos
+
+
+## Precalentamiento de cachés en segundo plano
+#
+# Al entrar a la página de inicio se lanza (una vez por proceso y por versión de los
+# datos) un hilo que ejecuta las tareas de carga y agregación de las páginas, para que
+# la primera navegación encuentre los cachés calientes.
+
+# Estado compartido del precalentamiento
+@st.cache_resource(show_spinner=False)
+def _estado_precalentamiento():
+    return {
+        "candado": threading.Lock(),
+        "hilo": None,
+        "versiones": None,
+        "tareas": [],
+        "completadas": [],
+        "errores": {},
+    }
+
+
+# Versiones de los archivos de datos presentes en disco
+def _versiones_datos():
+    return {nombre: conjuntos.version_dataset(nombre) for nombre in conjuntos.DATASETS if os.path.exists(conjuntos.ruta_dataset(nombre))}
+
+
+def _ejecutar_precalentamiento(estado, tareas):
+    for descripcion, tarea in tareas:
+        try:
+            tarea()
+        except Exception as e:
+            with estado["candado"]:
+                estado["errores"][descripcion] = str(e)
+        with estado["candado"]:
+            estado["completadas"].append(descripcion)
+
+
+# Lanza el precalentamiento si no está en curso y los datos cambiaron desde la última vez.
+# `tareas` es una lista de (descripción, función sin argumentos).
+def iniciar_precalentamiento(tareas):
+    estado = _estado_precalentamiento()
+    versiones = _versiones_datos()
+    with estado["candado"]:
+        hilo = estado["hilo"]
+        if hilo is not None and (hilo.is_alive() or estado["versiones"] == versiones):
+            return
+        estado.update(versiones=versiones, tareas=[descripcion for descripcion, _ in tareas], completadas=[], errores={})
+        estado["hilo"] = threading.Thread(
+            target=_ejecutar_precalentamiento, args=(estado, tareas), name="precalentamiento", daemon=True
+        )
+        estado["hilo"].start()
+
+
+# Copia del progreso actual del precalentamiento
+def progreso_precalentamiento():
+    estado = _estado_precalentamiento()
+    with estado["candado"]:
+        total = len(estado["tareas"])
+        completadas = list(estado["completadas"])
+        return {
+            "total": total,
+            "completadas": completadas,
+            "errores": dict(estado["errores"]),
+            "terminado": len(completadas) >= total,
+        }
+
+
+def _panel_precalentamiento(terminado_al_inicio):
+    progreso = progreso_precalentamiento()
+    if progreso["terminado"]:
+        st.caption("✅ Datos precargados")
+        for descripcion, error in progreso["errores"].items():
+            st.caption(f"⚠️ {descripcion}: {error}")
+        if not terminado_al_inicio:
+            # Recargar una vez para detener la actualización periódica del panel
+            st.rerun()
+    else:
+        st.progress(
+            len(progreso["completadas"]) / progreso["total"],
+            text=f"Precargando datos ({len(progreso['completadas'])}/{progreso['total']})",
+        )
+
+
+# Mientras hay tareas pendientes el panel se actualiza cada segundo sin recargar la página
+_panel_precalentamiento_en_curso = st.fragment(run_every=1)(_panel_precalentamiento)
+
+
+# Muestra el progreso del precalentamiento
+def mostrar_precalentamiento():
+    progreso = progreso_precalentamiento()
+    if not progreso["total"]:
+        return
+    if progreso["terminado"]:
+        _panel_precalentamiento(True)
+    else:
+        _panel_precalentamiento_en_curso(False)
+    actualizaciones = actualizaciones_datos()
+    if actualizaciones:
+        ultima = actualizaciones[-1]
+        st.caption(f"🔄 {ultima['hora']}: {ultima['dataset']} actualizado ({ultima['tipo']}, {ultima['filas']:,} filas leídas)")
+
+
+## Vigilancia de los archivos de datos
+#
+# Un hilo por proceso revisa cada INTERVALO_VIGILANCIA segundos la versión de los CSV.
+# Cuando uno cambia, actualiza su copia Arrow (solo las filas nuevas si fue un anexo) y
+# relanza el precalentamiento, que recalcula los agregados de forma incremental: la
+# siguiente visita a una página encuentra los datos nuevos con los cachés calientes.
+
+INTERVALO_VIGILANCIA = float(os.environ.get("INTERVALO_VIGILANCIA_DATOS", 10))
+
+
+# Estado compartido de la vigilancia
+@st.cache_resource(show_spinner=False)
+def _estado_vigilancia():
+    return {
+        "candado": threading.Lock(),
+        "hilo": None,
+        "versiones": {},
+        "tareas": [],
+        "actualizaciones": [],
+    }
+
+
+def _vigilar(estado):
+    while True:
+        time.sleep(INTERVALO_VIGILANCIA)
+        versiones = _versiones_datos()
+        with estado["candado"]:
+            cambiados = [nombre for nombre, version in versiones.items() if estado["versiones"].get(nombre) != version]
+            estado["versiones"] = versiones
+            tareas = estado["tareas"]
+        if not cambiados:
+            continue
+        for nombre in cambiados:
+            try:
+                _, tipo, filas = conjuntos.actualizar_arrow(nombre)
+            except Exception as e:
+                conjuntos.registro_ingesta.warning("%s: no se pudo actualizar la copia Arrow (%s)", nombre, e)
+                continue
+            with estado["candado"]:
+                estado["actualizaciones"].append(
+                    {"dataset": nombre, "tipo": tipo, "filas": filas, "hora": time.strftime("%H:%M:%S")}
+                )
+                del estado["actualizaciones"][:-20]
+        iniciar_precalentamiento(tareas)
+
+
+# Lanza (una vez por proceso) el hilo que vigila los CSV. `tareas` son las del
+# precalentamiento que se relanzan cuando cambian los datos.
+def iniciar_vigilancia(tareas):
+    estado = _estado_vigilancia()
+    with estado["candado"]:
+        estado["tareas"] = tareas
+        if estado["hilo"] is not None and estado["hilo"].is_alive():
+            return
+        estado["versiones"] = _versiones_datos()
+        estado["hilo"] = threading.Thread(target=_vigilar, args=(estado,), name="vigilancia_datos", daemon=True)
+        estado["hilo"].start()
+
+
+# Últimas actualizaciones detectadas por la vigilancia (la más reciente al final)
+def actualizaciones_datos():
+    estado = _estado_vigilancia()
+    with estado["candado"]:
+        return list(estado["actualizaciones"])
@@ -0,0 +1,134 @@
+import streamlit as st
+
+import compartidos
+import conjuntos
+import utilidades as util
+import costos
+
+np = util.importar_diferido("numpy")
+pd = util.importar_diferido("pandas")
+
+## Proyección del costo total de propiedad (TCO)
+#
+# Para cada vehículo y año se proyectan el costo de energía y de mantenimiento, con un
+# escalamiento anual de precios por escenario, y se suman al precio de compra (año 0).
+# Todo se calcula en una sola pasada sobre un arreglo vehículos × años × escenarios.
+
+# Vehículos que entran en la proyección: catálogo de eléctricos e híbridos y vehículos de
+# carga nacionales. El costo de energía por km sale del motor de costos (promedio de las
+# columnas de costo si hay varias, p. ej. LHL y LHR).
+VEHICULOS_TCO = {
+    "electricos": {
+        "fuente": "Eléctricos e híbridos",
+        "vehiculo": ["Modelo"],
+        "categoria": "Categoria",
+        "costos": ["Costo_por_km"],
+    },
+    "nacional": {
+        "fuente": "Carga nacional",
+        "vehiculo": ["OEM_Make", "OEM_Model"],
+        "categoria": "MS_VehicleCategoryCode",
+        "costos": ["Costo_por_km_LHL", "Costo_por_km_LHR"],
+    },
+}
+
+# Columnas de los supuestos por energía y de los escenarios
+COLUMNAS_SUPUESTOS = ['Energia', 'Precio_compra_COP', 'Mantenimiento_COP_km']
+COLUMNAS_ESCENARIOS = ['Escenario', 'Escalamiento_energia_pct', 'Escalamiento_mantenimiento_pct', 'Tasa_descuento_pct']
+
+# Escenarios de referencia (porcentajes anuales)
+ESCENARIOS_BASE = [
+    ('Precios estables', 0.0, 0.0, 0.0),
+    ('Escalamiento moderado', 3.0, 3.0, 0.0),
+    ('Escalamiento alto', 6.0, 4.0, 0.0),
+]
+
+
+# Proyecta el TCO de V vehículos durante `anios` años bajo S escenarios.
+# Entradas por vehículo (longitud V): costo de energía por km en el año 1, mantenimiento
+# por km en el año 1 y precio de compra. Entradas por escenario (longitud S): escalamiento
+# anual de la energía y del mantenimiento y tasa de descuento, como fracciones (0.03 = 3 %).
+# Devuelve arreglos (V, anios, S) con el costo anual descontado de energía y mantenimiento
+# y el TCO acumulado al final de cada año (compra incluida).
+def proyectar_tco(energia_km, mantenimiento_km, precio_compra, km_anuales, anios,
+                  escalamiento_energia, escalamiento_mantenimiento, tasa_descuento):
+    energia_km = np.asarray(energia_km, dtype=float)
+    mantenimiento_km = np.broadcast_to(np.asarray(mantenimiento_km, dtype=float), energia_km.shape)
+    precio_compra = np.broadcast_to(np.asarray(precio_compra, dtype=float), energia_km.shape)
+    escalamiento_energia = np.atleast_1d(np.asarray(escalamiento_energia, dtype=float))
+    escalamiento_mantenimiento = np.broadcast_to(
+        np.asarray(escalamiento_mantenimiento, dtype=float), escalamiento_energia.shape)
+    tasa_descuento = np.broadcast_to(np.asarray(tasa_descuento, dtype=float), escalamiento_energia.shape)
+    if anios < 1:
+        raise ValueError("'anios' debe ser al menos 1")
+    if km_anuales < 0:
+        raise ValueError("'km_anuales' no puede ser negativo")
+
+    # (1, anios, 1): años transcurridos desde el primero
+    t = np.arange(anios, dtype=float)[None, :, None]
+    # (1, anios, S): factores de escalamiento y de descuento (al final de cada año)
+    descuento = (1 + tasa_descuento[None, None, :]) ** -(t + 1)
+    factor_energia = (1 + escalamiento_energia[None, None, :]) ** t * descuento
+    factor_mantenimiento = (1 + escalamiento_mantenimiento[None, None, :]) ** t * descuento
+
+    energia = energia_km[:, None, None] * km_anuales * factor_energia
+    mantenimiento = mantenimiento_km[:, None, None] * km_anuales * factor_mantenimiento
+    acumulado = precio_compra[:, None, None] + np.cumsum(energia + mantenimiento, axis=1)
+    return {"energia": energia, "mantenimiento": mantenimiento, "acumulado": acumulado}
+
+
+# Promedio por grupo de un arreglo (V, ...) con un solo producto matricial.
+# Los valores NaN no cuentan; devuelve (grupos, arreglo de forma (G, ...)).
+def promedio_por_grupo(valores, grupos):
+    codigos, etiquetas = pd.factorize(pd.Series(grupos), sort=True)
+    forma = valores.shape
+    planos = valores.reshape(forma[0], -1)
+    validos = ~np.isnan(planos)
+    pertenencia = np.zeros((len(etiquetas), forma[0]))
+    pertenencia[codigos[codigos >= 0], np.flatnonzero(codigos >= 0)] = 1
+    sumas = pertenencia @ np.where(validos, planos, 0.0)
+    conteos = pertenencia @ validos
+    with np.errstate(invalid='ignore'):
+        promedio = sumas / conteos
+    return etiquetas, promedio.reshape((len(etiquetas),) + forma[1:])
+
+
+# Vehículos de todos los conjuntos con su costo de energía por km a un vector de precios
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _vehiculos(versiones, precios):
+    partes = []
+    for nombre, config in VEHICULOS_TCO.items():
+        columnas = [*config["vehiculo"], config["categoria"]]
+        df = conjuntos.cargar_datos(nombre, columnas)
+        costos_df = costos.costos_dataset(nombre, dict(precios))
+        partes.append(pd.DataFrame({
+            'Fuente': config["fuente"],
+            'Vehiculo': df[config["vehiculo"]].astype(str).agg(' '.join, axis=1).to_numpy(),
+            'Categoria': df[config["categoria"]].to_numpy(),
+            'Energia': costos_df['Energia'].to_numpy(),
+            'Energia_COP_km': costos_df[config["costos"]].mean(axis=1).to_numpy(),
+        }))
+    return compartidos.compartir(("vehiculos_tco", versiones, precios), pd.concat(partes, ignore_index=True))
+
+
+# Tabla de vehículos de la proyección (vista de la tabla compartida, valores de solo lectura)
+def vehiculos_tco(precios=None):
+    precios = costos.precios_vigentes() if precios is None else precios
+    versiones = tuple(conjuntos.version_dataset(nombre) for nombre in VEHICULOS_TCO)
+    vector = tuple(sorted((e, float(p)) for e, p in precios.items() if p is not None))
+    return compartidos.vista(_vehiculos(versiones, vector))
+
+
+# Proyección de los vehículos indicados (índices de vehiculos_tco) con supuestos por energía
+# (DataFrame con COLUMNAS_SUPUESTOS) y escenarios (DataFrame con COLUMNAS_ESCENARIOS)
+def proyeccion_vehiculos(vehiculos, supuestos, escenarios, anios, km_anuales):
+    supuestos = supuestos.set_index('Energia')
+    energia = vehiculos['Energia']
+    compra = energia.map(supuestos['Precio_compra_COP']).fillna(0).to_numpy(dtype=float)
+    mantenimiento = energia.map(supuestos['Mantenimiento_COP_km']).fillna(0).to_numpy(dtype=float)
+    return proyectar_tco(
+        vehiculos['Energia_COP_km'].to_numpy(dtype=float), mantenimiento, compra, km_anuales, anios,
+        escenarios['Escalamiento_energia_pct'].to_numpy(dtype=float) / 100,
+        escenarios['Escalamiento_mantenimiento_pct'].to_numpy(dtype=float) / 100,
+        escenarios['Tasa_descuento_pct'].to_numpy(dtype=float) / 100,
+    )
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Los módulos de la aplicación están en la raíz del repositorio (sin paquete)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import agregados as agg
+
+
+# Referencia: el mismo filtro grupo por grupo con un bucle sobre groupby
+def mascara_referencia(df, columna, grupos, metodo, umbral):
+    conservar = pd.Series(False, index=df.index)
+    for _, grupo in df.groupby(grupos, dropna=False, sort=False):
+        valores = grupo[columna].astype(float)
+        validos = valores.dropna()
+        if len(validos) < 3:
+            conservar[validos.index] = True
+            continue
+        if metodo == 'mad':
+            desvio = (validos - validos.median()).abs()
+            escala = desvio.median() / 0.6745
+            if not escala > 0:
+                escala = desvio.mean() * 1.2533
+            atipico = (desvio > umbral * escala) & (escala > 0)
+        else:
+            q1, q3 = validos.quantile(0.25), validos.quantile(0.75)
+            atipico = (validos < q1 - umbral * (q3 - q1)) | (validos > q3 + umbral * (q3 - q1))
+        conservar[validos.index[~atipico.to_numpy()]] = True
+    return conservar.to_numpy()
+
+
+def datos_con_atipicos(semilla):
+    rng = np.random.default_rng(semilla)
+    n = 600
+    df = pd.DataFrame({
+        'Motorizacion': rng.choice(['Eléctrico', 'Híbrido'], n),
+        'Categoria': rng.choice(['M1', 'N1', 'N2', None], n),
+        'Consumo': rng.lognormal(2.5, 0.3, n),
+    })
+    # Atípicos, nulos, un grupo de menos de 3 valores y un grupo con MAD 0
+    df.loc[rng.choice(n, 15, replace=False), 'Consumo'] *= 8
+    df.loc[rng.choice(n, 10, replace=False), 'Consumo'] = np.nan
+    pequeno = pd.DataFrame({'Motorizacion': 'Híbrido', 'Categoria': 'L7', 'Consumo': [1.0, 900.0]})
+    constante = pd.DataFrame({'Motorizacion': 'Eléctrico', 'Categoria': 'M3',
+                              'Consumo': [5.0] * 6 + [5.5, 40.0]})
+    return pd.concat([df, pequeno, constante], ignore_index=True)
+
+
+@pytest.mark.parametrize("metodo", ['mad', 'iqr'])
+@pytest.mark.parametrize("semilla", [0, 1, 2])
+def test_mascara_igual_a_referencia_por_grupo(metodo, semilla):
+    df = datos_con_atipicos(semilla)
+    grupos = ['Motorizacion', 'Categoria']
+    umbral = agg.UMBRALES_ATIPICOS[metodo]
+    mascara = agg.mascara_sin_atipicos(df, 'Consumo', grupos, metodo)
+    np.testing.assert_array_equal(mascara, mascara_referencia(df, 'Consumo', grupos, metodo, umbral))
+
+
+def test_mascara_descarta_nulos_y_conserva_grupos_pequenos():
+    df = datos_con_atipicos(0)
+    mascara = agg.mascara_sin_atipicos(df, 'Consumo', ['Motorizacion', 'Categoria'])
+    assert not mascara[df['Consumo'].isna().to_numpy()].any()
+    assert mascara[(df['Categoria'] == 'L7').to_numpy()].all()
+    assert not mascara[df['Consumo'].notna().to_numpy()].all()
+
+
+def test_metodo_desconocido():
+    with pytest.raises(ValueError):
+        agg.mascara_sin_atipicos(datos_con_atipicos(0), 'Consumo', ['Categoria'], 'zscore')
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+
+import agregados as agg
+import conjuntos
+
+DIMENSIONES = ['MS_VehicleCategoryCode', 'OEM_Make', 'MS_FuelType']
+METRICAS = ['R_CO2_gkm', 'R_FuelConsumption_Gal_km']
+
+
+def filas_urbanas(n, semilla):
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        'OEM_Make': rng.choice(['Marca A', 'Marca B', 'Marca C'], n),
+        'OEM_Model': [f"Modelo {i}" for i in rng.integers(0, 50, n)],
+        'MS_VehicleCategoryCode': rng.choice(['N2', 'N3', None], n),
+        'MS_FuelType': rng.choice(['Diesel', 'Electricidad'], n),
+        'R_CO2_gkm': rng.uniform(300, 900, n),
+        'R_FuelConsumption_Gal_km': rng.uniform(0.05, 0.2, n),
+    })
+    df.loc[rng.choice(n, n // 10, replace=False), 'R_CO2_gkm'] = np.nan
+    return df
+
+
+# Conjunto "urbano" en una carpeta temporal, con cachés limpios
+@pytest.fixture
+def urbano(tmp_path, monkeypatch):
+    monkeypatch.setattr(conjuntos, "RUTA_BASE", str(tmp_path))
+    monkeypatch.setattr(conjuntos, "CARPETA_ARROW", str(tmp_path / "datos_arrow"))
+    st.cache_resource.clear()
+    yield tmp_path / conjuntos.DATASETS["urbano"]["archivo"]
+    st.cache_resource.clear()
+
+
+# Registra el número de filas con que se construye cada cubo
+@pytest.fixture
+def construidos(monkeypatch):
+    filas = []
+    construir = agg.construir_cubo
+
+    def construir_cubo(df, dimensiones, metricas):
+        filas.append(len(df))
+        return construir(df, dimensiones, metricas)
+
+    monkeypatch.setattr(agg, "construir_cubo", construir_cubo)
+    return filas
+
+
+def cubo_completo(df):
+    return agg.construir_cubo(df, DIMENSIONES, METRICAS).sort_index()
+
+
+def test_anexo_suma_solo_las_filas_nuevas(urbano, construidos):
+    inicial, nuevas = filas_urbanas(300, 0), filas_urbanas(40, 1)
+    inicial.to_csv(urbano, index=False)
+    agg.cubo_dataset("urbano", DIMENSIONES, METRICAS)
+
+    nuevas.to_csv(urbano, mode="a", header=False, index=False)
+    cubo = agg.cubo_dataset("urbano", DIMENSIONES, METRICAS)
+
+    assert construidos == [300, 40]
+    pd.testing.assert_frame_equal(cubo.sort_index(), cubo_completo(pd.concat([inicial, nuevas])),
+                                  check_dtype=False)
+    # Los promedios del cubo acumulado son los de un groupby sobre todas las filas
+    referencia = pd.concat([inicial, nuevas]).groupby('OEM_Make')[METRICAS].mean().reset_index()
+    pd.testing.assert_frame_equal(agg.promedios(cubo, ['OEM_Make'], METRICAS), referencia)
+
+
+def test_archivo_reescrito_reconstruye_el_cubo(urbano, construidos):
+    filas_urbanas(300, 0).to_csv(urbano, index=False)
+    agg.cubo_dataset("urbano", DIMENSIONES, METRICAS)
+
+    reescrito = filas_urbanas(320, 2)
+    reescrito.to_csv(urbano, index=False)
+    cubo = agg.cubo_dataset("urbano", DIMENSIONES, METRICAS)
+
+    assert construidos == [300, 320]
+    pd.testing.assert_frame_equal(cubo.sort_index(), cubo_completo(reescrito), check_dtype=False)
+
+
+def test_sumar_cubos_igual_a_cubo_completo():
+    a, b = filas_urbanas(200, 3), filas_urbanas(50, 4)
+    suma = agg.sumar_cubos(agg.construir_cubo(a, DIMENSIONES, METRICAS), agg.construir_cubo(b, DIMENSIONES, METRICAS))
+    pd.testing.assert_frame_equal(suma.sort_index(), cubo_completo(pd.concat([a, b])), check_dtype=False)
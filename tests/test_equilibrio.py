@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import costos
+
+
+# Referencia: fracción de pares (diésel, eléctrico) en que el eléctrico es más barato,
+# contando los pares uno a uno
+def fraccion_referencia(consumos_diesel, consumos_electricos, precio_diesel, precio_kwh):
+    return np.mean([
+        a_e * precio_kwh < a_d * precio_diesel
+        for a_d in consumos_diesel for a_e in consumos_electricos
+    ])
+
+
+@pytest.mark.parametrize("semilla", [0, 1, 2])
+def test_superficie_igual_a_conteo_de_pares(semilla):
+    rng = np.random.default_rng(semilla)
+    diesel = rng.lognormal(-1.2, 0.3, 25)
+    electricos = rng.lognormal(-0.2, 0.4, 40)
+    precios_diesel = np.linspace(5000, 20000, 15)
+    precios_kwh = np.linspace(300, 2500, 12)
+
+    fraccion = costos.superficie_equilibrio(costos.distribucion_log_razon(diesel, electricos),
+                                            precios_diesel, precios_kwh)
+
+    referencia = np.array([[fraccion_referencia(diesel, electricos, p_d, p_k) for p_k in precios_kwh]
+                           for p_d in precios_diesel])
+    assert fraccion.shape == (15, 12)
+    # La rejilla del histograma solo puede mover los pares que caen a menos de dos
+    # intervalos del umbral: unos pocos de los 1000 pares
+    np.testing.assert_allclose(fraccion, referencia, atol=3 / (len(diesel) * len(electricos)))
+
+
+def test_cuantiles_de_la_razon():
+    rng = np.random.default_rng(3)
+    diesel = rng.lognormal(-1.2, 0.3, 30)
+    electricos = rng.lognormal(-0.2, 0.4, 30)
+    razones = (diesel[:, None] / electricos[None, :]).ravel()
+
+    cuantiles = costos.cuantiles_razon(costos.distribucion_log_razon(diesel, electricos), [0.1, 0.5, 0.9])
+
+    np.testing.assert_allclose(cuantiles, np.quantile(razones, [0.1, 0.5, 0.9]), rtol=0.01)
+
+
+def test_extremos_de_la_rejilla():
+    distribucion = costos.distribucion_log_razon([0.3, 0.4], [1.0, 1.2])
+    fraccion = costos.superficie_equilibrio(distribucion, [10000.0], [1.0, 1e6])
+    np.testing.assert_allclose(fraccion, [[1.0, 0.0]])
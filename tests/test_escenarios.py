@@ -0,0 +1,40 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import escenarios as esc
+
+
+def test_rejilla_igual_a_bucles():
+    emisiones = pd.Series({'Marca A': 650.0, 'Marca B': 480.5, 'Marca C': np.nan, 'Marca D': 910.0})
+    cantidades, recorridos, inventarios = [1, 10, 250], [50.0, 180.0], [0.0, 12.5, 400.0]
+    tabla = esc.evaluar_escenarios(emisiones, cantidades, recorridos, inventarios)
+
+    filas = []
+    for (referencia, emision), cantidad, recorrido, inventario in itertools.product(
+            emisiones.dropna().items(), cantidades, recorridos, inventarios):
+        toneladas = emision * cantidad * recorrido / 1_000_000
+        filas.append((referencia, cantidad, recorrido, inventario, emision, toneladas,
+                      toneladas / inventario * 100 if inventario > 0 else np.nan))
+    referencia = pd.DataFrame(filas, columns=esc.COLUMNAS_ESCENARIOS)
+
+    pd.testing.assert_frame_equal(tabla, referencia, check_dtype=False)
+
+
+@pytest.mark.parametrize("cantidades", [[], [-1], [np.inf]])
+def test_ejes_invalidos(cantidades):
+    with pytest.raises(ValueError):
+        esc.evaluar_escenarios({'Marca A': 500.0}, cantidades, [100], [10])
+
+
+def test_sin_emisiones():
+    with pytest.raises(ValueError):
+        esc.evaluar_escenarios({'Marca A': np.nan}, [1], [100], [10])
+
+
+def test_leer_lista_numeros():
+    assert esc.leer_lista_numeros("10, 50;100 ,") == [10.0, 50.0, 100.0]
+    with pytest.raises(ValueError):
+        esc.leer_lista_numeros("10, diez")
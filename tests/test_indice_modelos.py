@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+
+import agregados as agg
+import conjuntos
+
+
+def filas_regionales(filas):
+    df = pd.DataFrame(filas, columns=['OEM_Make', 'OEM_Model', 'Emision_CO2_avg'])
+    for columna, tipo in conjuntos.DATASETS["regional"]["esquema"].items():
+        if columna not in df:
+            df[columna] = "N3" if tipo == "object" else 1.0
+    return df
+
+
+# Conjunto "regional" en una carpeta temporal, con cachés limpios
+@pytest.fixture
+def regional(tmp_path, monkeypatch):
+    monkeypatch.setattr(conjuntos, "RUTA_BASE", str(tmp_path))
+    monkeypatch.setattr(conjuntos, "CARPETA_ARROW", str(tmp_path / "datos_arrow"))
+    st.cache_resource.clear()
+    yield tmp_path / conjuntos.DATASETS["regional"]["archivo"]
+    st.cache_resource.clear()
+
+
+def test_marca_sin_emisiones_no_se_ofrece(regional):
+    filas_regionales([
+        ('Marca A', 'M1', 500.0),
+        ('Marca A', 'M2', 600.0),
+        ('Sin datos', 'S1', np.nan),
+        ('Sin datos', 'S2', np.nan),
+        ('Sin datos', 'S3', np.nan),
+    ]).to_csv(regional, index=False, encoding="latin1")
+
+    assert agg.marcas_regionales() == ['Marca A']
+    assert agg.modelos_por_emision('Sin datos').empty
+    assert agg.modelos_por_emision('Marca A', menores=False)['OEM_Model'].tolist() == ['M2', 'M1']
+
+
+@pytest.mark.parametrize("menores", [True, False])
+def test_empates_en_el_orden_de_nsmallest_y_nlargest(regional, menores):
+    rng = np.random.default_rng(0)
+    modelos = [f"M{i:02d}" for i in range(30)]
+    df = filas_regionales([
+        (marca, modelo, float(rng.choice([400, 500, 600])))
+        for marca in ['Marca A', 'Marca B'] for modelo in modelos
+    ])
+    df.to_csv(regional, index=False, encoding="latin1")
+
+    for marca in ['Marca A', 'Marca B']:
+        promedios = df[df['OEM_Make'] == marca].groupby('OEM_Model')['Emision_CO2_avg'].mean()
+        # Orden de nsmallest/nlargest (keep='first'); con k >= n pandas ordena sin estabilidad
+        ordenados = promedios.sort_values(ascending=menores, kind='stable')
+        for k in (1, 5, 12, 40):
+            esperado = ordenados.iloc[:k]
+            if k < len(promedios):
+                pd.testing.assert_series_equal(esperado, promedios.nsmallest(k) if menores else promedios.nlargest(k))
+            obtenido = agg.modelos_por_emision(marca, k=k, menores=menores)
+            assert obtenido['OEM_Model'].tolist() == esperado.index.tolist()
+            assert obtenido['Emision_CO2_avg'].tolist() == esperado.tolist()
@@ -0,0 +1,26 @@
+import memoria
+
+
+def test_metricas_por_pagina_sin_id_de_sesion(monkeypatch):
+    contabilidad = {
+        "muestras": [], "paginas": {}, "en_curso": [],
+        "sesiones": {
+            "s1": {"pagina": "urbano", "estado_bytes": 100, "ejecuciones": 1},
+            "s2": {"pagina": "urbano", "estado_bytes": 300, "ejecuciones": 2},
+            "s3": {"pagina": "regional", "estado_bytes": 50, "ejecuciones": 1},
+        },
+        "objetos": {
+            ("s1", "urbano"): {"dfu": (10, 1000)},
+            ("s2", "urbano"): {"dfu": (10, 3000)},
+        },
+    }
+    monkeypatch.setattr(memoria, "contabilidad_memoria", lambda: contabilidad)
+    lineas = memoria.metricas_prometheus().splitlines()
+
+    assert not any("sesion=" in linea for linea in lineas)
+    assert 'impulso_verde_pagina_sesiones{pagina="urbano"} 2' in lineas
+    assert 'impulso_verde_pagina_estado_sesion_bytes{pagina="urbano"} 400' in lineas
+    assert 'impulso_verde_pagina_estado_sesion_max_bytes{pagina="urbano"} 300' in lineas
+    assert 'impulso_verde_pagina_estado_sesion_bytes{pagina="regional"} 50' in lineas
+    assert 'impulso_verde_objetos_bytes{pagina="urbano",objeto="dfu"} 4000' in lineas
+    assert 'impulso_verde_objetos_max_bytes{pagina="urbano",objeto="dfu"} 3000' in lineas
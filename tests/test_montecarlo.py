@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import montecarlo as mc
+
+
+def test_camino_rapido_igual_al_producto_completo():
+    rng = np.random.default_rng(0)
+    sorteos = mc.sortear_precios([10500.0, 900.0, 14000.0], [0.2, 0.1, 0.3], correlacion=0.4, n=4000)
+    # Filas de una sola energía (camino rápido), de varias, con peso negativo y sin energía
+    pesos = np.vstack([
+        np.diag(rng.uniform(0.1, 2.0, 3)),
+        rng.uniform(0.0, 1.0, (5, 3)),
+        [[0.5, -0.2, 0.0], [0.0, 0.0, 0.0]],
+    ])
+
+    resultado = mc.bandas(pesos, sorteos)
+
+    referencia = np.percentile(pesos @ sorteos.T, mc.PERCENTILES, axis=1).T
+    np.testing.assert_allclose(resultado, referencia, rtol=1e-10, atol=1e-9)
+
+
+def test_bloques_igual_a_un_solo_producto(monkeypatch):
+    rng = np.random.default_rng(1)
+    sorteos = mc.sortear_precios([10500.0, 900.0], [0.2, 0.1], n=1000)
+    pesos = rng.uniform(0.0, 1.0, (23, 2))
+    monkeypatch.setattr(mc, "ELEMENTOS_POR_BLOQUE", 5000)
+
+    np.testing.assert_allclose(mc.bandas(pesos, sorteos),
+                               np.percentile(pesos @ sorteos.T, mc.PERCENTILES, axis=1).T)
+
+
+def test_sorteos_con_media_y_correlacion_pedidas():
+    precios = np.array([10500.0, 900.0, 14000.0])
+    sorteos = mc.sortear_precios(precios, [0.2, 0.1, 0.3], correlacion=0.5, n=200_000, semilla=3)
+
+    np.testing.assert_allclose(sorteos.mean(axis=0), precios, rtol=0.01)
+    np.testing.assert_allclose(sorteos.std(axis=0) / precios, [0.2, 0.1, 0.3], rtol=0.03)
+    correlacion = np.corrcoef(np.log(sorteos).T)
+    np.testing.assert_allclose(correlacion[np.triu_indices(3, 1)], 0.5, atol=0.01)
+
+
+@pytest.mark.parametrize("volatilidades, correlacion", [([-0.1, 0.1], 0.0), ([0.1, 0.1], 1.0), ([0.1, 0.1], -1.0)])
+def test_parametros_invalidos(volatilidades, correlacion):
+    with pytest.raises(ValueError):
+        mc.sortear_precios([1.0, 2.0], volatilidades, correlacion, n=10)
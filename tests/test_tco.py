@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import tco
+
+
+# Referencia: el TCO vehículo por vehículo, escenario por escenario y año por año
+def tco_referencia(energia_km, mantenimiento_km, precio_compra, km_anuales, anios, escenarios):
+    acumulado = np.zeros((len(energia_km), anios, len(escenarios)))
+    for v in range(len(energia_km)):
+        for s, (esc_energia, esc_mantenimiento, tasa) in enumerate(escenarios):
+            total = precio_compra[v]
+            for anio in range(anios):
+                descuento = (1 + tasa) ** (anio + 1)
+                total += energia_km[v] * km_anuales * (1 + esc_energia) ** anio / descuento
+                total += mantenimiento_km[v] * km_anuales * (1 + esc_mantenimiento) ** anio / descuento
+                acumulado[v, anio, s] = total
+    return acumulado
+
+
+def test_proyeccion_igual_a_bucle():
+    rng = np.random.default_rng(0)
+    energia_km = rng.uniform(200, 2000, 7)
+    mantenimiento_km = rng.uniform(50, 400, 7)
+    precio_compra = rng.uniform(1e8, 6e8, 7)
+    escenarios = [(0.0, 0.0, 0.0), (0.03, 0.02, 0.05), (0.08, -0.01, 0.12)]
+
+    proyeccion = tco.proyectar_tco(energia_km, mantenimiento_km, precio_compra, 35000, 12,
+                                   *np.array(escenarios).T)
+
+    assert proyeccion["acumulado"].shape == (7, 12, 3)
+    np.testing.assert_allclose(
+        proyeccion["acumulado"],
+        tco_referencia(energia_km, mantenimiento_km, precio_compra, 35000, 12, escenarios),
+        rtol=1e-12,
+    )
+    # El primer año incluye la compra; los costos anuales suman el resto
+    np.testing.assert_allclose(
+        proyeccion["acumulado"][:, -1, :],
+        precio_compra[:, None] + (proyeccion["energia"] + proyeccion["mantenimiento"]).sum(axis=1),
+    )
+
+
+@pytest.mark.parametrize("anios, km_anuales", [(0, 1000), (5, -1)])
+def test_parametros_invalidos(anios, km_anuales):
+    with pytest.raises(ValueError):
+        tco.proyectar_tco([1.0], 0.0, 0.0, km_anuales, anios, [0.0], [0.0], [0.0])
+
+
+def test_promedio_por_grupo_igual_a_groupby():
+    rng = np.random.default_rng(1)
+    valores = rng.normal(size=(40, 3, 2))
+    valores[rng.random(valores.shape) < 0.2] = np.nan
+    grupos = rng.choice(['Diesel', 'Electricidad', 'Gasolina'], 40).astype(object)
+    grupos[[3, 17]] = None
+
+    etiquetas, promedio = tco.promedio_por_grupo(valores, grupos)
+
+    referencia = pd.DataFrame(valores.reshape(40, -1)).groupby(pd.Series(grupos)).mean()
+    assert list(etiquetas) == list(referencia.index)
+    np.testing.assert_allclose(promedio.reshape(len(etiquetas), -1), referencia.to_numpy())
@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import in_cached_function
+
+# Carpeta del proyecto: las páginas se identifican por su ruta relativa a ella
+RUTA_BASE = os.path.dirname(os.path.abspath(__file__))
+
+
+## Tiempos por sección
+#
+# `medir_seccion` envuelve un bloque de una página (como `with` o como decorador) y registra
+# su duración, las filas procesadas y la variación de la memoria residente del proceso.
+# Cada medición se escribe como una línea JSON en el registro "impulso_verde.tiempos" y,
+# si el panel de depuración está activo (abrir la aplicación con ?depurar=1), se muestra
+# en la barra lateral.
+
+registro_tiempos = logging.getLogger("impulso_verde.tiempos")
+if not registro_tiempos.handlers:
+    _manejador = logging.StreamHandler()
+    _manejador.setFormatter(logging.Formatter("%(message)s"))
+    registro_tiempos.addHandler(_manejador)
+    registro_tiempos.setLevel(os.environ.get("NIVEL_REGISTRO_TIEMPOS", "INFO"))
+    registro_tiempos.propagate = False
+
+
+# Memoria residente actual del proceso en bytes (None si no se puede leer)
+def memoria_residente():
+    try:
+        with open("/proc/self/statm") as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# Página que se está ejecutando, relativa a la carpeta del proyecto
+def pagina_actual():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return None
+    try:
+        paginas = ctx.pages_manager.get_pages()
+        return os.path.relpath(paginas[ctx.pages_manager.current_page_script_hash]["script_path"], RUTA_BASE)
+    except (AttributeError, KeyError, TypeError):
+        return None
+
+
+# Número de filas de un DataFrame/Series (o el número dado)
+def _contar_filas(filas):
+    if filas is None or isinstance(filas, int):
+        return filas
+    return len(filas)
+
+
+# Activa el panel de depuración con ?depurar=1 (queda activo el resto de la sesión)
+# y prepara su espacio en la barra lateral
+def iniciar_panel_tiempos():
+    if st.query_params.get("depurar") == "1":
+        st.session_state["depurar_tiempos"] = True
+    st.session_state["_mediciones_tiempos"] = []
+    if st.session_state.get("depurar_tiempos"):
+        with st.expander("⏱️ Tiempos por sección", expanded=True):
+            st.session_state["_panel_tiempos"] = st.empty()
+    else:
+        st.session_state.pop("_panel_tiempos", None)
+
+
+def _mostrar_mediciones(mediciones):
+    panel = st.session_state.get("_panel_tiempos")
+    ctx = get_script_run_ctx(suppress_warning=True)
+    # Desde un fragmento no se puede escribir fuera de él, ni desde una función en caché
+    # (Streamlit no podría repetir la escritura al reutilizar el resultado): el panel se
+    # actualiza con la siguiente medición (la medición sí queda en el registro)
+    if panel is None or ctx is None or ctx.current_fragment_id is not None or in_cached_function.get():
+        return
+    panel.dataframe(
+        [{c: m[c] for c in ("seccion", "tiempo_ms", "filas", "memoria_delta_mb")} for m in mediciones],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+# Mide un bloque de código. `filas` puede ser un número o un DataFrame; también se puede
+# fijar dentro del bloque: `with tiempos.medir_seccion("Gráfico") as medicion: ... medicion["filas"] = n`
+@contextmanager
+def medir_seccion(nombre, filas=None):
+    medicion = {"seccion": nombre, "filas": _contar_filas(filas)}
+    memoria_inicial = memoria_residente()
+    inicio = time.perf_counter()
+    error = None
+    try:
+        yield medicion
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        memoria_final = memoria_residente()
+        ctx = get_script_run_ctx(suppress_warning=True)
+        medicion.update(
+            filas=_contar_filas(medicion["filas"]),
+            tiempo_ms=round((time.perf_counter() - inicio) * 1000, 2),
+            memoria_delta_mb=(
+                round((memoria_final - memoria_inicial) / 2**20, 2)
+                if memoria_inicial is not None and memoria_final is not None else None
+            ),
+        )
+        registro_tiempos.info(json.dumps({
+            "evento": "seccion",
+            "pagina": pagina_actual(),
+            "sesion": ctx.session_id if ctx is not None else None,
+            **medicion,
+            "error": error,
+        }, ensure_ascii=False))
+
+        if ctx is not None and "_mediciones_tiempos" in st.session_state:
+            st.session_state["_mediciones_tiempos"].append(medicion)
+            _mostrar_mediciones(st.session_state["_mediciones_tiempos"])
@@ -1,5 +1,10 @@
 import streamlit as st
 
+import memoria
+import tiempos
+from importaciones import importar_diferido  # noqa: F401 (las páginas lo usan como util.importar_diferido)
+
+
 def generarMenu():
     with st.sidebar:
         st.page_link('main.py', label = "Inicio", icon = "🏠")
@@ -7,5 +12,8 @@ def generarMenu():
         st.page_link('pages/regional.py', label = "Trayecto regional", icon = "🏔️")
         st.page_link('pages/nacional.py', label = "Trayecto largo", icon = "🗺️")
         st.page_link('pages/electricos.py', label = "Eléctricos", icon = "🔋")
-
-
+        st.page_link('pages/analisis.py', label = "Análisis general", icon = "📊")
+        tiempos.iniciar_panel_tiempos()
+        if st.session_state.get("depurar_tiempos"):
+            st.page_link('pages/memoria.py', label = "Memoria (operador)", icon = "🧠")
+    memoria.registrar_ejecucion()